@@ -0,0 +1,294 @@
+'''
+Move generation for many boards at once. Each board is three unsigned
+32-bit masks, as in Bitboard, stored in NumPy arrays so that the masks of
+thousands of boards are shifted and combined by a handful of array
+operations. Requires NumPy.
+'''
+
+import numpy as np
+from bitboard import Bitboard, FORWARD_SHIFTS, BACKWARD_SHIFTS, \
+    BLACK_KING_ROW, RED_KING_ROW, FULL_BOARD, get_jumped_index
+
+# The four directions in the order of the columns of the target arrays.
+DIRECTIONS = FORWARD_SHIFTS + BACKWARD_SHIFTS
+
+
+def count_bits(masks):
+    '''
+    Function -- count_bits
+        Counts the set bits of every mask in an array.
+    Parameters:
+        masks -- an array of uint32 masks
+    Returns:
+        An array of the counts, as uint32.
+    '''
+    masks = masks - ((masks >> 1) & 0x55555555)
+    masks = (masks & 0x33333333) + ((masks >> 2) & 0x33333333)
+    masks = (masks + (masks >> 4)) & 0x0F0F0F0F
+    return (masks * 0x01010101) >> 24
+
+
+class BatchBoards:
+    '''
+    Class -- BatchBoards
+        Represents a batch of positions, each with its own player to move,
+            and generates the legal moves of every position together.
+    Attributes:
+        black -- uint32 array, the black pieces of each board
+        red -- uint32 array, the red pieces of each board
+        kings -- uint32 array, the kings of each board
+        black_to_move -- bool array, True where black is to move
+    Methods:
+        from_bitboards -- builds a batch from Bitboard objects
+        get_bitboard -- Gets one board of the batch as a Bitboard
+        get_movers -- Gets the pieces of the player to move that may move
+            in each direction
+        get_capture_targets -- Gets the landing squares of every capture
+        get_step_targets -- Gets the landing squares of every
+            non-capturing move
+        get_legal_targets -- Gets the landing squares of every legal move,
+            honouring forced captures
+        get_start_squares -- Helper method. Shifts landing squares back
+            to the start squares of the moves
+        get_capture_mask -- Gets the pieces that can capture
+        get_movable -- Gets the pieces that can legally be moved
+        get_promotions -- Gets the pieces crowned by a legal move
+        count_moves -- Counts the legal moves of every board
+        get_moves -- Gets the legal moves of one board as index tuples
+    '''
+
+    def __init__(self, black, red, kings, black_to_move):
+        '''
+        Constructor -- creates a new instance of BatchBoards
+        Parameters:
+            self -- the current BatchBoards object
+            black -- sequence of black piece masks, one per board
+            red -- sequence of red piece masks
+            kings -- sequence of king masks
+            black_to_move -- sequence of booleans, True where black moves
+        '''
+        self.black = np.asarray(black, dtype=np.uint32)
+        self.red = np.asarray(red, dtype=np.uint32)
+        self.kings = np.asarray(kings, dtype=np.uint32)
+        self.black_to_move = np.asarray(black_to_move, dtype=bool)
+
+    @classmethod
+    def from_bitboards(cls, positions):
+        '''
+        Method -- from_bitboards
+            Builds a batch from single boards.
+        Parameters:
+            cls -- the BatchBoards class
+            positions -- a list of (Bitboard, color) tuples
+        Returns:
+            A BatchBoards object holding the positions in the same order.
+        '''
+        return cls([board.black for board, color in positions],
+                   [board.red for board, color in positions],
+                   [board.kings for board, color in positions],
+                   [color == "BLACK" for board, color in positions])
+
+    def __len__(self):
+        '''
+        Method -- __len__
+            Gets the number of boards in the batch.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            The number of boards.
+        '''
+        return len(self.black)
+
+    def get_bitboard(self, index):
+        '''
+        Method -- get_bitboard
+            Gets one board of the batch.
+        Parameters:
+            self -- the current BatchBoards object
+            index -- the position of the board in the batch
+        Returns:
+            A tuple (Bitboard, player to move).
+        '''
+        board = Bitboard(int(self.black[index]), int(self.red[index]),
+                         int(self.kings[index]))
+        return board, "BLACK" if self.black_to_move[index] else "RED"
+
+    def get_movers(self):
+        '''
+        Method -- get_movers
+            Gets the pieces of the player to move, and which of them may
+                move forwards (towards row 7) and backwards.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A tuple (own pieces, opponent pieces, list of four arrays of
+                the pieces allowed to move in each of DIRECTIONS).
+        '''
+        own = np.where(self.black_to_move, self.black, self.red)
+        opponent = np.where(self.black_to_move, self.red, self.black)
+        own_kings = own & self.kings
+        forward = np.where(self.black_to_move, own, own_kings)
+        backward = np.where(self.black_to_move, own_kings, own)
+        return own, opponent, [forward, forward, backward, backward]
+
+    def get_capture_targets(self):
+        '''
+        Method -- get_capture_targets
+            Gets the squares each board's pieces can land on by capturing.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A uint32 array of shape (4, number of boards). Row d holds the
+                landing squares of captures in direction DIRECTIONS[d].
+        '''
+        own, opponent, movers = self.get_movers()
+        empty = ~(self.black | self.red) & FULL_BOARD
+        targets = np.empty((len(DIRECTIONS), len(self)), dtype=np.uint32)
+        for direction, (shift, inverse) in enumerate(DIRECTIONS):
+            targets[direction] = \
+                shift(shift(movers[direction]) & opponent) & empty
+        return targets
+
+    def get_step_targets(self):
+        '''
+        Method -- get_step_targets
+            Gets the squares each board's pieces can step to without
+                capturing.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A uint32 array of shape (4, number of boards), as
+                get_capture_targets.
+        '''
+        own, opponent, movers = self.get_movers()
+        empty = ~(self.black | self.red) & FULL_BOARD
+        targets = np.empty((len(DIRECTIONS), len(self)), dtype=np.uint32)
+        for direction, (shift, inverse) in enumerate(DIRECTIONS):
+            targets[direction] = shift(movers[direction]) & empty
+        return targets
+
+    def get_legal_targets(self):
+        '''
+        Method -- get_legal_targets
+            Gets the landing squares of the legal moves of every board.
+                Captures are forced, so boards with a capture only keep
+                their capture targets.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A tuple (targets, is_capture): a uint32 array of shape
+                (4, number of boards) as get_capture_targets, and a bool
+                array that is True for boards whose moves are captures.
+        '''
+        captures = self.get_capture_targets()
+        is_capture = np.bitwise_or.reduce(captures, axis=0) != 0
+        steps = self.get_step_targets()
+        return np.where(is_capture, captures, steps), is_capture
+
+    def get_start_squares(self, targets, is_capture):
+        '''
+        Method -- get_start_squares
+            Helper method. Shifts landing squares back to the squares the
+                moving pieces start on.
+        Parameters:
+            self -- the current BatchBoards object
+            targets -- a (4, number of boards) array of landing squares
+            is_capture -- bool array, True where the targets are captures
+        Returns:
+            A (4, number of boards) uint32 array of start squares.
+        '''
+        starts = np.empty_like(targets)
+        for direction, (shift, inverse) in enumerate(DIRECTIONS):
+            back = inverse(targets[direction])
+            starts[direction] = np.where(is_capture, inverse(back), back)
+        return starts
+
+    def get_capture_mask(self):
+        '''
+        Method -- get_capture_mask
+            Gets the pieces of the player to move that can capture.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A uint32 array of piece masks, one per board.
+        '''
+        targets = self.get_capture_targets()
+        starts = self.get_start_squares(
+            targets, np.ones(len(self), dtype=bool))
+        return np.bitwise_or.reduce(starts, axis=0)
+
+    def get_movable(self):
+        '''
+        Method -- get_movable
+            Gets the pieces of the player to move that can legally move,
+                matching GameState.get_valid_pieces.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A uint32 array of piece masks, one per board.
+        '''
+        targets, is_capture = self.get_legal_targets()
+        return np.bitwise_or.reduce(
+            self.get_start_squares(targets, is_capture), axis=0)
+
+    def get_promotions(self):
+        '''
+        Method -- get_promotions
+            Gets the men whose next legal step or jump lands on their king
+                row, crowning them.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            A uint32 array of piece masks, one per board.
+        '''
+        targets, is_capture = self.get_legal_targets()
+        king_row = np.where(self.black_to_move, np.uint32(BLACK_KING_ROW),
+                            np.uint32(RED_KING_ROW))
+        starts = self.get_start_squares(targets & king_row, is_capture)
+        return np.bitwise_or.reduce(starts, axis=0) & ~self.kings
+
+    def count_moves(self):
+        '''
+        Method -- count_moves
+            Counts the legal single steps and jumps of every board, which
+                matches the length of Bitboard.get_moves.
+        Parameters:
+            self -- the current BatchBoards object
+        Returns:
+            An array of counts, one per board.
+        '''
+        targets, is_capture = self.get_legal_targets()
+        return count_bits(targets).sum(axis=0)
+
+    def get_moves(self, index, targets=None, is_capture=None):
+        '''
+        Method -- get_moves
+            Gets the legal moves of one board in the form Bitboard.get_moves
+                returns them.
+        Parameters:
+            self -- the current BatchBoards object
+            index -- the position of the board in the batch
+            targets, is_capture -- the result of get_legal_targets, to
+                avoid working it out again for every board
+        Returns:
+            A sorted list of (start, jumped, end) tuples, where jumped is
+                -1 for non-capturing moves.
+        '''
+        if targets is None:
+            targets, is_capture = self.get_legal_targets()
+        capture = bool(is_capture[index])
+        moves = []
+        for direction, (shift, inverse) in enumerate(DIRECTIONS):
+            landings = int(targets[direction, index])
+            while landings:
+                land = landings & -landings
+                landings ^= land
+                start = inverse(land)
+                if capture:
+                    start = inverse(start)
+                start = start.bit_length() - 1
+                end = land.bit_length() - 1
+                jumped = get_jumped_index(start, end) if capture else -1
+                moves.append((start, jumped, end))
+        moves.sort()
+        return moves
@@ -0,0 +1,656 @@
+'''
+Benchmarks for the checkers engine. Run one benchmark by name, e.g.
+    python benchmark.py movegen
+or every benchmark with
+    python benchmark.py all
+'''
+
+import argparse
+import copy
+import os
+import random
+import tempfile
+import time
+import turtle
+from gamestate import GameState, unpack_position
+from game import Game
+from bitboard import Bitboard
+from searchplayer import SearchPlayer, evaluate
+from evaluator import make_evaluator
+from parallelsearch import ParallelSearchPlayer
+from tablebase import Tablebase, generate, write_tablebase
+from openingbook import OpeningBook, encode_move, write_book
+from zobrist import hash_bitboard
+from computerplayer import ComputerPlayer
+from gamerecord import GameRecord, GameRecordWriter, read_records
+from sketch import Sketch
+from snapshotstore import SnapshotStore, restore_sessions
+from perft import get_sample_positions, SAMPLE_SEED
+
+
+def time_call(function, repeat):
+    '''
+    Function -- time_call
+        Times repeated calls of a function.
+    Parameters:
+        function -- a function taking no arguments
+        repeat -- the number of times to call it
+    Returns:
+        The elapsed time in seconds.
+    '''
+    start = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return time.perf_counter() - start
+
+
+def benchmark_move_generation(count=200, repeat=20):
+    '''
+    Function -- benchmark_move_generation
+        Compares generating every legal move with GameState and
+            CheckerPiece objects against the Bitboard generator. The move
+            cache of every GameState is cleared before each pass, so the
+            objects work every move out again as the bitboards do. A pass
+            with the cache kept is timed as well. On one core the
+            bitboards are about 12 times as fast as the uncached objects
+            but only about 1.5 times as fast as the cached ones, which
+            just return the moves found on an earlier pass.
+    Parameters:
+        count -- the number of sample positions
+        repeat -- the number of passes over the sample positions
+    Returns:
+        A dict of timings in seconds, the resulting speedup and the
+            cache hits and misses of each object pass.
+    '''
+    samples = get_sample_positions(count)
+    games = []
+    for board, color in samples:
+        game = GameState()
+        game.load_squares(board.to_squares())
+        game.current_player = color
+        games.append(game)
+
+    def object_pass(clear_cache):
+        for game in games:
+            if clear_cache:
+                game.clear_move_cache()
+            for piece in game.get_valid_pieces():
+                piece.get_possible_moves(game.squares)
+
+    def bitboard_pass():
+        for board, color in samples:
+            board.get_moves(color)
+
+    def count_cache(key):
+        return sum(game.get_cache_stats()[key] for game in games)
+
+    object_time = time_call(lambda: object_pass(True), repeat)
+    object_hits, object_misses = count_cache("hits"), count_cache("misses")
+    cached_time = time_call(lambda: object_pass(False), repeat)
+    bitboard_time = time_call(bitboard_pass, repeat)
+    positions = count * repeat
+    return {"positions": positions,
+            "object_seconds": object_time,
+            "cached_object_seconds": cached_time,
+            "bitboard_seconds": bitboard_time,
+            "object_per_second": positions / object_time,
+            "cached_object_per_second": positions / cached_time,
+            "bitboard_per_second": positions / bitboard_time,
+            "speedup": object_time / bitboard_time,
+            "cached_speedup": cached_time / bitboard_time,
+            "object_cache_hits": object_hits,
+            "object_cache_misses": object_misses,
+            "cached_cache_hits": count_cache("hits") - object_hits,
+            "cached_cache_misses": count_cache("misses") - object_misses}
+
+
+def benchmark_batch_generation(count=4096, repeat=5):
+    '''
+    Function -- benchmark_batch_generation
+        Compares finding the legal moves of many boards one at a time,
+            with GameState objects and with Bitboard objects, against
+            finding them for the whole batch with BatchBoards. Needs NumPy.
+    Parameters:
+        count -- the number of boards in the batch
+        repeat -- the number of passes over the boards
+    Returns:
+        A dict with boards per second for each generator and the speedup
+            of the batch generator over the other two.
+    '''
+    from batchboards import BatchBoards
+    samples = get_sample_positions(count)
+    games = []
+    for board, color in samples:
+        game = GameState()
+        game.load_squares(board.to_squares())
+        game.current_player = color
+        games.append(game)
+
+    def object_pass():
+        for game in games:
+            for piece in game.get_valid_pieces():
+                piece.get_possible_moves(game.squares)
+
+    def bitboard_pass():
+        for board, color in samples:
+            board.get_movable(color)
+            board.get_moves(color)
+
+    def batch_pass():
+        batch = BatchBoards.from_bitboards(samples)
+        batch.get_legal_targets()
+        batch.get_movable()
+        batch.get_promotions()
+
+    # The object generator is far slower, so it gets a single pass.
+    object_rate = count / time_call(object_pass, 1)
+    bitboard_rate = count * repeat / time_call(bitboard_pass, repeat)
+    batch_rate = count * repeat / time_call(batch_pass, repeat)
+    return {"boards": count,
+            "object_boards_per_second": object_rate,
+            "bitboard_boards_per_second": bitboard_rate,
+            "batch_boards_per_second": batch_rate,
+            "speedup_over_objects": batch_rate / object_rate,
+            "speedup_over_bitboard": batch_rate / bitboard_rate}
+
+
+def benchmark_make_unmake(depth=4):
+    '''
+    Function -- benchmark_make_unmake
+        Walks every line of play from the starting position with GameState
+            objects, once making and unmaking each move in place and once
+            playing each move on a deep copy of the GameState.
+    Parameters:
+        depth -- the number of turns to look ahead
+    Returns:
+        A dict with the number of nodes visited, the time each way takes
+            and the speedup of make and unmake over copying.
+    '''
+    def walk_in_place(game, depth):
+        if depth == 0:
+            return 1
+        nodes = 1
+        for move in game.get_legal_moves():
+            undo = game.make_move(move)
+            nodes += walk_in_place(game, depth - 1)
+            game.unmake_move(undo)
+        return nodes
+
+    def walk_copies(game, depth):
+        if depth == 0:
+            return 1
+        nodes = 1
+        for move in game.get_legal_moves():
+            child = copy.deepcopy(game)
+            child.make_move(move)
+            nodes += walk_copies(child, depth - 1)
+        return nodes
+
+    game = GameState()
+    start = time.perf_counter()
+    nodes = walk_in_place(game, depth)
+    in_place_time = time.perf_counter() - start
+    start = time.perf_counter()
+    copy_nodes = walk_copies(game, depth)
+    copy_time = time.perf_counter() - start
+    return {"depth": depth,
+            "nodes": nodes,
+            "nodes_match": nodes == copy_nodes,
+            "make_unmake_seconds": in_place_time,
+            "deepcopy_seconds": copy_time,
+            "make_unmake_per_second": nodes / in_place_time,
+            "deepcopy_per_second": nodes / copy_time,
+            "speedup": copy_time / in_place_time}
+
+
+def benchmark_valid_pieces(games=20, calls_per_turn=3):
+    '''
+    Function -- benchmark_valid_pieces
+        Replays random games and, like the user interface, asks for the
+            valid pieces several times every turn. The cached GameState
+            answers are timed against scanning the whole board each time.
+    Parameters:
+        games -- the number of games to play
+        calls_per_turn -- the number of times to ask every turn
+    Returns:
+        A dict with the time taken each way, the speedup and the cache
+            statistics of the cached replay.
+    '''
+    MAX_TURNS = 100
+    rng = random.Random(SAMPLE_SEED)
+    records = []
+    for game_number in range(games):
+        game = Game()
+        while not game.is_over() and len(game.history) < MAX_TURNS:
+            moves = game.get_legal_moves()
+            game.apply_move(moves[rng.randint(0, len(moves) - 1)])
+        records.append(game.history)
+
+    def scan_valid_pieces(state):
+        capturing = []
+        movable = []
+        for row in state.squares:
+            for piece in row:
+                if piece is None or piece.color != state.current_player:
+                    continue
+                if len(piece.get_capturing_moves(state.squares)) != 0:
+                    capturing.append(piece)
+                elif len(piece.get_non_capturing_moves(state.squares)) != 0:
+                    movable.append(piece)
+        return capturing if len(capturing) != 0 else movable
+
+    def replay(get_valid_pieces):
+        states = []
+        start = time.perf_counter()
+        for history in records:
+            game = Game()
+            for move in history:
+                for call in range(calls_per_turn):
+                    get_valid_pieces(game.state)
+                game.apply_move(move)
+            states.append(game.state)
+        return time.perf_counter() - start, states
+
+    cached_time, states = replay(GameState.get_valid_pieces)
+    scan_time = replay(scan_valid_pieces)[0]
+    results = {"turns": sum(len(history) for history in records),
+               "cached_seconds": cached_time,
+               "scan_seconds": scan_time,
+               "speedup": scan_time / cached_time}
+    for key in ("hits", "misses", "pieces_refreshed"):
+        results["cache_" + key] = sum(
+            state.get_cache_stats()[key] for state in states)
+    results["cache_hit_rate"] = results["cache_hits"] / (
+        results["cache_hits"] + results["cache_misses"])
+    return results
+
+
+def benchmark_evaluation(count=500, repeat=20, depth=6):
+    '''
+    Function -- benchmark_evaluation
+        Times evaluating positions from scratch with the material-only
+            function and with the default evaluator, then times searches
+            that keep the default evaluation up to date incrementally
+            against searches that score every leaf from scratch.
+    Parameters:
+        count -- the number of sample positions
+        repeat -- the number of passes over the positions
+        depth -- the depth of the searches
+    Returns:
+        A dict with evaluations per second and search nodes per second.
+    '''
+    samples = get_sample_positions(count)
+    evaluator = make_evaluator()
+
+    class ScratchEvaluator:
+        # Only has evaluate, so the search cannot update it incrementally.
+        def evaluate(self, board, color):
+            return evaluator.evaluate(board, color)
+
+    def material_pass():
+        for board, color in samples:
+            evaluate(board, color)
+
+    def evaluator_pass():
+        for board, color in samples:
+            evaluator.evaluate(board, color)
+
+    def search_nodes_per_second(search_evaluator):
+        player = SearchPlayer(depth, evaluator=search_evaluator)
+        nodes = 0
+        start = time.perf_counter()
+        for board, color in samples[:10]:
+            player.get_best_move(board, color)
+            nodes += player.nodes
+        return nodes / (time.perf_counter() - start)
+
+    evaluations = count * repeat
+    incremental = search_nodes_per_second(evaluator)
+    scratch = search_nodes_per_second(ScratchEvaluator())
+    return {"material_evals_per_second":
+            evaluations / time_call(material_pass, repeat),
+            "positional_evals_per_second":
+            evaluations / time_call(evaluator_pass, repeat),
+            "incremental_search_nodes_per_second": incremental,
+            "scratch_search_nodes_per_second": scratch,
+            "incremental_speedup": incremental / scratch}
+
+
+def benchmark_search(depth=8):
+    '''
+    Function -- benchmark_search
+        Times a fixed-depth search of the starting position, then searches
+            it again to show the effect of the transposition table.
+    Parameters:
+        depth -- the number of turns to search ahead
+    Returns:
+        A dict with the search time, node counts, nodes per second and
+            transposition table statistics.
+    '''
+    board = Bitboard.from_squares(GameState().squares)
+    player = SearchPlayer(depth)
+    start = time.perf_counter()
+    player.get_best_move(board, "BLACK")
+    elapsed = time.perf_counter() - start
+    results = {"depth": depth,
+               "nodes": player.nodes,
+               "seconds": elapsed,
+               "nodes_per_second": player.nodes / elapsed}
+    player.get_best_move(board, "BLACK")
+    results["repeat_nodes"] = player.nodes
+    for key, value in player.table.get_stats().items():
+        results["table_" + key] = value
+    return results
+
+
+def benchmark_time_budget(budget_ms=200, count=10):
+    '''
+    Function -- benchmark_time_budget
+        Runs time-limited searches on sample positions to show how deep
+            the search gets and how closely it keeps to the budget.
+    Parameters:
+        budget_ms -- the time budget per search in milliseconds
+        count -- the number of sample positions
+    Returns:
+        A dict with the average depth reached, the nodes per second and
+            the worst overshoot of the budget.
+    '''
+    player = SearchPlayer(depth=64, time_budget_ms=budget_ms)
+    depths = []
+    nodes = 0
+    elapsed = 0.0
+    worst = 0.0
+    for board, color in get_sample_positions(count):
+        player.get_best_move(board, color)
+        stats = player.get_search_stats()
+        depths.append(stats["depth"])
+        nodes += stats["nodes"]
+        elapsed += stats["seconds"]
+        worst = max(worst, stats["seconds"] * 1000 - budget_ms)
+    return {"budget_ms": budget_ms,
+            "mean_depth": sum(depths) / len(depths),
+            "min_depth": min(depths),
+            "nodes_per_second": nodes / elapsed,
+            "worst_overshoot_ms": worst}
+
+
+def benchmark_parallel(depth=8, count=6, worker_counts=(1, 2, 4, 8)):
+    '''
+    Function -- benchmark_parallel
+        Times fixed-depth searches of the same sample positions with the
+            single-process SearchPlayer and with ParallelSearchPlayer at
+            several worker counts.
+    Parameters:
+        depth -- the number of turns to search ahead
+        count -- the number of sample positions
+        worker_counts -- the worker counts to try
+    Returns:
+        A dict with the time taken by each player and the speedup of each
+            worker count over one worker.
+    '''
+    samples = get_sample_positions(count)
+    results = {"depth": depth, "positions": count}
+
+    def run(player):
+        start = time.perf_counter()
+        for board, color in samples:
+            player.get_best_move(board, color)
+        return time.perf_counter() - start
+
+    results["serial_seconds"] = run(SearchPlayer(depth))
+    for workers in worker_counts:
+        player = ParallelSearchPlayer(depth, workers)
+        # Start the worker processes before timing.
+        player.get_best_move(*samples[0])
+        results["workers_%d_seconds" % workers] = run(player)
+        player.close()
+    one_worker = results["workers_%d_seconds" % worker_counts[0]]
+    for workers in worker_counts:
+        results["workers_%d_speedup" % workers] = \
+            one_worker / results["workers_%d_seconds" % workers]
+    return results
+
+
+def benchmark_tablebase(max_pieces=3, count=20, depth=8):
+    '''
+    Function -- benchmark_tablebase
+        Builds a small tablebase, then times probing it and compares
+            searches of endgames one piece larger with and without it.
+    Parameters:
+        max_pieces -- the most pieces in the tablebase
+        count -- the number of endgame positions to search
+        depth -- the depth of the searches
+    Returns:
+        A dict with the build time, file size, probes per second and the
+            nodes and time of the searches.
+    '''
+    rng = random.Random(SAMPLE_SEED)
+    positions = []
+    for i in range(count):
+        squares = rng.sample(range(32), max_pieces + 1)
+        black = sum(1 << index for index in squares[:len(squares) // 2])
+        red = sum(1 << index for index in squares[len(squares) // 2:])
+        positions.append((Bitboard(black, red, black | red),
+                          rng.choice(("BLACK", "RED"))))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "endgame.tb")
+        start = time.perf_counter()
+        write_tablebase(path, generate(max_pieces), max_pieces)
+        results["build_seconds"] = time.perf_counter() - start
+        results["file_bytes"] = os.path.getsize(path)
+        tablebase = Tablebase(path)
+        probes = []
+        for board, color in positions:
+            other = "RED" if color == "BLACK" else "BLACK"
+            for square, landings, captured in board.get_sequences(color):
+                if captured:
+                    child = Bitboard(board.black, board.red, board.kings)
+                    child.move_piece(square, captured[0], landings[0])
+                    probes.append((child, other))
+        if probes:
+            repeat = 10000 // len(probes) + 1
+            results["probes_per_second"] = len(probes) * repeat / time_call(
+                lambda: [tablebase.probe(*probe) for probe in probes],
+                repeat)
+        for name, player_tablebase in (("plain", None),
+                                       ("tablebase", tablebase)):
+            player = SearchPlayer(depth, tablebase=player_tablebase)
+            nodes = 0
+            start = time.perf_counter()
+            for board, color in positions:
+                player.get_best_move(board, color)
+                nodes += player.nodes
+            results[name + "_nodes"] = nodes
+            results[name + "_seconds"] = time.perf_counter() - start
+        tablebase.close()
+    return results
+
+
+def benchmark_opening_book(depth=8, repeat=1000):
+    '''
+    Function -- benchmark_opening_book
+        Compares searching the starting position with looking its move up
+            in an opening book.
+    Parameters:
+        depth -- the depth of the search
+        repeat -- the number of book lookups to time
+    Returns:
+        A dict with the search time, the lookup time and the speedup.
+    '''
+    board = Bitboard.from_squares(GameState().squares)
+    player = SearchPlayer(depth)
+    start = time.perf_counter()
+    move = player.get_best_move(board, "BLACK")
+    search_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "opening.book")
+        write_book(path, {(hash_bitboard(board, "BLACK"),
+                           encode_move(move[0], move[1])): 1})
+        player.book = OpeningBook(path)
+        lookup_seconds = time_call(
+            lambda: player.get_best_move(board, "BLACK"), repeat) / repeat
+        player.book.close()
+    return {"search_seconds": search_seconds,
+            "book_seconds": lookup_seconds,
+            "speedup": search_seconds / lookup_seconds}
+
+
+def benchmark_game_records(games=200, max_turns=150):
+    '''
+    Function -- benchmark_game_records
+        Archives random games, then times reading them back and replaying
+            them through GameState.
+    Parameters:
+        games -- the number of games to archive
+        max_turns -- the most turns of each game
+    Returns:
+        A dict with the bytes per game and move, and the games read and
+            replayed per minute.
+    '''
+    records = []
+    for seed in range(games):
+        game = Game()
+        player = ComputerPlayer(seed)
+        while not game.is_over() and len(game.history) < max_turns:
+            game.apply_move(player.select_move(game.state))
+        records.append(GameRecord.from_game(game, "random", "random", seed))
+    moves = sum(len(record.moves) for record in records)
+
+    def replay_all():
+        for record in read_records(path):
+            for move, state in record.replay():
+                pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.rec")
+        with GameRecordWriter(path) as writer:
+            for record in records:
+                writer.write(record)
+        size = os.path.getsize(path)
+        read_seconds = time_call(lambda: list(read_records(path)), 1)
+        replay_seconds = time_call(replay_all, 1)
+    return {"bytes_per_game": size / games,
+            "bytes_per_move": size / moves,
+            "read_games_per_minute": games * 60 / read_seconds,
+            "replay_games_per_minute": games * 60 / replay_seconds}
+
+
+def benchmark_snapshots(count=2000, repeat=5):
+    '''
+    Function -- benchmark_snapshots
+        Times packing positions with GameState.to_bytes and unpacking
+            them with GameState.from_bytes and with unpack_position, then
+            saving them to a snapshot file and restoring them. Restoring
+            goes through unpack_position; from_bytes builds every
+            CheckerPiece and is only used once a session is played again.
+    Parameters:
+        count -- the number of positions
+        repeat -- the number of times each position is packed and unpacked
+    Returns:
+        A dict with the size of a snapshot and the rates in positions per
+            second.
+    '''
+    states = [GameState.from_bytes(GameState().to_bytes())]
+    for board, color in get_sample_positions(count - 1):
+        state = GameState(board.to_squares())
+        if color == "RED":
+            state.current_player = color
+        states.append(state)
+    packed = [state.to_bytes() for state in states]
+    to_seconds = time_call(lambda: [state.to_bytes() for state in states],
+                           repeat)
+    from_seconds = time_call(
+        lambda: [GameState.from_bytes(data) for data in packed], repeat)
+    unpack_seconds = time_call(
+        lambda: [unpack_position(data) for data in packed], repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.snap")
+        start = time.perf_counter()
+        with SnapshotStore(path) as store:
+            for key, state in enumerate(states):
+                store.save(key, state)
+        save_seconds = time.perf_counter() - start
+        restore_seconds = time_call(lambda: restore_sessions(path), 1)
+    return {"bytes_per_snapshot": len(packed[0]),
+            "to_bytes_per_second": count * repeat / to_seconds,
+            "from_bytes_per_second": count * repeat / from_seconds,
+            "unpack_position_per_second": count * repeat / unpack_seconds,
+            "saves_per_second": count / save_seconds,
+            "restores_per_second": count / restore_seconds}
+
+
+def benchmark_render(repeat=20):
+    '''
+    Function -- benchmark_render
+        Times redrawing the whole board in the starting position, first
+            tracing the squares and pieces with the pen, then stamping them
+            as registered shapes. Needs a display.
+    Parameters:
+        repeat -- the number of full redraws timed each way
+    Returns:
+        A dict with the time and draw calls of one redraw each way, the
+            items left on the canvas, and the speedup of stamping.
+    '''
+    results = {}
+    for name, use_shapes in (("traced", False), ("stamped", True)):
+        sketch = Sketch(use_shapes)
+        sketch.draw_checkerboard()
+        sketch.draw_checkerpieces()
+        sketch.render()
+        seconds = time_call(sketch.redraw_board, repeat)
+        results[name + "_redraw_ms"] = seconds * 1000 / repeat
+        results[name + "_draw_calls"] = sketch.frame_stats[-1]["draw_calls"]
+        results[name + "_canvas_items"] = len(
+            turtle.getcanvas().find_all())
+        sketch.pen.clear()
+        sketch.stamper.clearstamps()
+    results["speedup"] = (results["traced_redraw_ms"] /
+                          results["stamped_redraw_ms"])
+    return results
+
+
+def print_results(name, results):
+    '''
+    Function -- print_results
+        Prints the results of a benchmark, one value per line.
+    Parameters:
+        name -- the name of the benchmark
+        results -- a dict of result names to values
+    Returns:
+        Nothing.
+    '''
+    print(name)
+    for key, value in results.items():
+        if isinstance(value, float):
+            print("    %-36s %.4f" % (key, value))
+        else:
+            print("    %-36s %s" % (key, value))
+
+
+BENCHMARKS = {"movegen": benchmark_move_generation,
+              "batch": benchmark_batch_generation,
+              "undo": benchmark_make_unmake,
+              "validpieces": benchmark_valid_pieces,
+              "eval": benchmark_evaluation,
+              "search": benchmark_search,
+              "timed": benchmark_time_budget,
+              "parallel": benchmark_parallel,
+              "tablebase": benchmark_tablebase,
+              "book": benchmark_opening_book,
+              "records": benchmark_game_records,
+              "render": benchmark_render,
+              "snapshot": benchmark_snapshots}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkers benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS) + ["all"])
+    args = parser.parse_args()
+    names = sorted(BENCHMARKS) if args.name == "all" else [args.name]
+    for name in names:
+        print_results(name, BENCHMARKS[name]())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,613 @@
+from checkerpiece import CheckerPiece
+
+# The 32 playable squares are numbered row by row, four per row, so the
+# square at (row, column) has index row * 4 + column // 2.
+NUM_PLAYABLE = 32
+FULL_BOARD = 0xFFFFFFFF
+EVEN_ROWS = 0x0F0F0F0F  # rows 0, 2, 4 and 6 (pieces sit in odd columns)
+ODD_ROWS = 0xF0F0F0F0  # rows 1, 3, 5 and 7 (pieces sit in even columns)
+LEFT_EDGE = 0x10101010  # column 0, only reachable on odd rows
+RIGHT_EDGE = 0x08080808  # column 7, only reachable on even rows
+BLACK_KING_ROW = 0xF0000000  # row 7
+RED_KING_ROW = 0x0000000F  # row 0
+# The shifts below only use non-negative masks, so they work unchanged on
+# arrays of unsigned 32-bit masks as well as on Python ints.
+EVEN_ROWS_NOT_RIGHT = EVEN_ROWS & ~RIGHT_EDGE
+ODD_ROWS_NOT_LEFT = ODD_ROWS & ~LEFT_EDGE
+
+
+def square_to_index(row, column):
+    '''
+    Function -- square_to_index
+        Converts a row and column on the game board to the index of the
+            matching playable square.
+    Parameters:
+        row -- the row of the square
+        column -- the column of the square
+    Returns:
+        An int from 0 to 31, or -1 if the square is not playable.
+    '''
+    MAX_ROW_COL = 7
+    if not (0 <= row <= MAX_ROW_COL and 0 <= column <= MAX_ROW_COL):
+        return -1
+    if row % 2 == column % 2:
+        return -1
+    return row * 4 + column // 2
+
+
+def index_to_square(index):
+    '''
+    Function -- index_to_square
+        Converts the index of a playable square back to its row and column.
+    Parameters:
+        index -- an int from 0 to 31
+    Returns:
+        A tuple (row, column).
+    '''
+    row = index >> 2
+    column = ((index & 3) << 1) + (1 - (row & 1))
+    return row, column
+
+
+# The (row, column) of every playable square, by index.
+INDEX_ROW_COLUMNS = [index_to_square(index) for index in range(NUM_PLAYABLE)]
+
+
+def forward_left(mask):
+    '''
+    Function -- forward_left
+        Shifts every square in a mask one step towards row 7 and column 0.
+    '''
+    return (((mask & EVEN_ROWS) << 4) |
+            ((mask & ODD_ROWS_NOT_LEFT) << 3)) & FULL_BOARD
+
+
+def forward_right(mask):
+    '''
+    Function -- forward_right
+        Shifts every square in a mask one step towards row 7 and column 7.
+    '''
+    return (((mask & EVEN_ROWS_NOT_RIGHT) << 5) |
+            ((mask & ODD_ROWS) << 4)) & FULL_BOARD
+
+
+def back_left(mask):
+    '''
+    Function -- back_left
+        Shifts every square in a mask one step towards row 0 and column 0.
+    '''
+    return ((mask & EVEN_ROWS) >> 4) | ((mask & ODD_ROWS_NOT_LEFT) >> 5)
+
+
+def back_right(mask):
+    '''
+    Function -- back_right
+        Shifts every square in a mask one step towards row 0 and column 7.
+    '''
+    return (((mask & EVEN_ROWS_NOT_RIGHT) >> 3) |
+            ((mask & ODD_ROWS) >> 4))
+
+
+# Each direction is paired with the shift that undoes it, so the start
+# square of a move can be recovered from its landing square.
+FORWARD_SHIFTS = ((forward_left, back_right), (forward_right, back_left))
+BACKWARD_SHIFTS = ((back_left, forward_right), (back_right, forward_left))
+
+
+def get_jumped_index(start, end):
+    '''
+    Function -- get_jumped_index
+        Finds the playable square jumped over by a capture.
+    Parameters:
+        start -- the index the capturing piece starts on
+        end -- the index the capturing piece lands on
+    Returns:
+        The index of the square between start and end.
+    '''
+    # Rows alternate between odd and even columns, so the middle square
+    # sits one index further along when jumping from an even row.
+    return ((start + end) >> 1) + 1 - ((start >> 2) & 1)
+
+
+def iterate_bits(mask):
+    '''
+    Function -- iterate_bits
+        Yields the index of every set bit in a mask, lowest first.
+    '''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def get_move_tables(inverse):
+    '''
+    Function -- get_move_tables
+        Builds the moves landing on each square in one direction, so a
+            move can be looked up from its landing square.
+    Parameters:
+        inverse -- the shift undoing the direction
+    Returns:
+        A tuple of two lists indexed by landing square: the
+            (start, -1, end) step and the (start, jumped, end) capture.
+            Moves that would start off the board have a start of -1.
+    '''
+    steps = []
+    jumps = []
+    for end in range(NUM_PLAYABLE):
+        over = inverse(1 << end)
+        steps.append((over.bit_length() - 1, -1, end))
+        jumps.append((inverse(over).bit_length() - 1,
+                      over.bit_length() - 1, end))
+    return steps, jumps
+
+
+FORWARD_LEFT_STEPS, FORWARD_LEFT_JUMPS = get_move_tables(back_right)
+FORWARD_RIGHT_STEPS, FORWARD_RIGHT_JUMPS = get_move_tables(back_left)
+BACK_LEFT_STEPS, BACK_LEFT_JUMPS = get_move_tables(forward_right)
+BACK_RIGHT_STEPS, BACK_RIGHT_JUMPS = get_move_tables(forward_left)
+
+
+class Bitboard:
+    '''
+    Class -- Bitboard
+        Represents the game board as three 32-bit masks over the playable
+            squares, which is much cheaper to copy and scan than the
+            GameState list of lists.
+    Attributes:
+        black -- int, mask of squares holding black pieces
+        red -- int, mask of squares holding red pieces
+        kings -- int, mask of squares holding kings of either color
+    Methods:
+        from_squares -- builds a Bitboard from a list of lists of
+            CheckerPiece objects
+        to_squares -- builds the matching list of lists of CheckerPiece
+            objects
+        get_pieces -- Gets the mask of a player's pieces
+        get_empty -- Gets the mask of empty playable squares
+        get_jumpers -- Gets the mask of a player's pieces that can capture
+        get_steppers -- Gets the mask of a player's pieces that can make
+            a non-capturing move
+        get_movable -- Gets the mask of a player's pieces that can
+            legally be moved, honouring forced captures
+        get_jumps -- Gets every capturing move for a player
+        get_steps -- Gets every non-capturing move for a player
+        get_moves -- Gets every legal move for a player
+        move_piece -- Moves a piece, removing any captured piece and
+            crowning it if it reaches the last row
+        get_sequences -- Gets every legal turn for a player, with each
+            multiple jump as a single sequence
+        extend_sequence -- Helper method. Follows a capture sequence
+    '''
+
+    def __init__(self, black=0, red=0, kings=0):
+        '''
+        Constructor -- creates a new instance of Bitboard
+        Parameters:
+            self -- the current Bitboard object
+            black -- mask of squares holding black pieces
+            red -- mask of squares holding red pieces
+            kings -- mask of squares holding kings
+        '''
+        self.black = black
+        self.red = red
+        self.kings = kings
+
+    @classmethod
+    def from_squares(cls, squares):
+        '''
+        Method -- from_squares
+            Builds a Bitboard from the GameState representation.
+        Parameters:
+            cls -- the Bitboard class
+            squares -- list of lists representing the state of the game board
+        Returns:
+            A Bitboard object holding the same pieces.
+        '''
+        black = red = kings = 0
+        for index in range(NUM_PLAYABLE):
+            row, column = index_to_square(index)
+            piece = squares[row][column]
+            if piece is not None:
+                bit = 1 << index
+                if piece.color == "BLACK":
+                    black |= bit
+                else:
+                    red |= bit
+                if piece.is_king:
+                    kings |= bit
+        return cls(black, red, kings)
+
+    def to_squares(self):
+        '''
+        Method -- to_squares
+            Builds the GameState representation of the board.
+        Parameters:
+            self -- the current Bitboard object
+        Returns:
+            A list of lists holding a new CheckerPiece object on every
+                occupied square and None elsewhere.
+        '''
+        NUM_ROW_COL = 8
+        squares = [[None] * NUM_ROW_COL for i in range(NUM_ROW_COL)]
+        black = self.black
+        kings = self.kings
+        occupied = black | self.red
+        for index in range(NUM_PLAYABLE):
+            if occupied >> index & 1:
+                row, column = INDEX_ROW_COLUMNS[index]
+                piece = CheckerPiece("BLACK" if black >> index & 1 else "RED")
+                if kings >> index & 1:
+                    piece.is_king = True
+                    piece.can_move_forward = True
+                    piece.can_move_back = True
+                squares[row][column] = piece
+        return squares
+
+    def __eq__(self, other):
+        '''
+        Method -- __eq__
+            Checks if two Bitboard objects hold the same position
+        Parameters:
+            self -- The current Bitboard object
+            other -- An object to compare self to.
+        Returns:
+            True if the two objects are equal, False otherwise.
+        '''
+        if type(self) != type(other):
+            return False
+        return (self.black == other.black and self.red == other.red and
+                self.kings == other.kings)
+
+    def __repr__(self):
+        '''
+        Method -- __repr__
+            Returns a string representation of the bitboard.
+        Parameter:
+            self -- The current Bitboard object
+        Returns:
+            A string representation of the Bitboard.
+        '''
+        return "Bitboard(black=0x%08x, red=0x%08x, kings=0x%08x)" % (
+            self.black, self.red, self.kings)
+
+    def get_pieces(self, color):
+        '''
+        Method -- get_pieces
+            Gets the mask of a player's pieces.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            An int mask.
+        '''
+        return self.black if color == "BLACK" else self.red
+
+    def get_empty(self):
+        '''
+        Method -- get_empty
+            Gets the mask of empty playable squares.
+        Parameters:
+            self -- the current Bitboard object
+        Returns:
+            An int mask.
+        '''
+        return ~(self.black | self.red) & FULL_BOARD
+
+    def get_directions(self, color):
+        '''
+        Method -- get_directions
+            Pairs each direction a player can move in with the mask of
+                their pieces allowed to move that way.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            A list of (shift, inverse shift, mask) tuples.
+        '''
+        if color == "BLACK":
+            forward = self.black
+            backward = forward & self.kings
+        else:
+            backward = self.red
+            forward = backward & self.kings
+        directions = []
+        if forward:
+            for shift, inverse in FORWARD_SHIFTS:
+                directions.append((shift, inverse, forward))
+        if backward:
+            for shift, inverse in BACKWARD_SHIFTS:
+                directions.append((shift, inverse, backward))
+        return directions
+
+    def get_jumpers(self, color):
+        '''
+        Method -- get_jumpers
+            Gets the mask of pieces that can make a capturing move.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            An int mask of the capturing pieces' squares.
+        '''
+        opponent = self.red if color == "BLACK" else self.black
+        empty = self.get_empty()
+        jumpers = 0
+        for shift, inverse, movers in self.get_directions(color):
+            landings = shift(shift(movers) & opponent) & empty
+            if landings:
+                jumpers |= inverse(inverse(landings))
+        return jumpers
+
+    def get_steppers(self, color):
+        '''
+        Method -- get_steppers
+            Gets the mask of pieces that can make a non-capturing move.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            An int mask of the pieces' squares.
+        '''
+        empty = self.get_empty()
+        steppers = 0
+        for shift, inverse, movers in self.get_directions(color):
+            steppers |= inverse(shift(movers) & empty)
+        return steppers
+
+    def get_movable(self, color):
+        '''
+        Method -- get_movable
+            Gets the mask of pieces that can legally be moved. If any piece
+                can capture, only capturing pieces are movable.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            An int mask of the movable pieces' squares.
+        '''
+        jumpers = self.get_jumpers(color)
+        if jumpers:
+            return jumpers
+        return self.get_steppers(color)
+
+    def get_jumps(self, color, pieces=None):
+        '''
+        Method -- get_jumps
+            Gets every single capturing move for a player.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+            pieces -- optional mask restricting which pieces may jump
+        Returns:
+            A list of (start, jumped, end) index tuples, sorted by start.
+        '''
+        opponent = self.red if color == "BLACK" else self.black
+        empty = self.get_empty()
+        jumps = []
+        for shift, inverse, movers in self.get_directions(color):
+            if pieces is not None:
+                movers &= pieces
+            landings = shift(shift(movers) & opponent) & empty
+            while landings:
+                land = landings & -landings
+                landings ^= land
+                over = inverse(land)
+                jumps.append((inverse(over).bit_length() - 1,
+                              over.bit_length() - 1, land.bit_length() - 1))
+        jumps.sort()
+        return jumps
+
+    def get_steps(self, color):
+        '''
+        Method -- get_steps
+            Gets every non-capturing move for a player.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            A list of (start, end) index tuples, sorted by start.
+        '''
+        empty = self.get_empty()
+        steps = []
+        for shift, inverse, movers in self.get_directions(color):
+            landings = shift(movers) & empty
+            while landings:
+                land = landings & -landings
+                landings ^= land
+                steps.append((inverse(land).bit_length() - 1,
+                              land.bit_length() - 1))
+        steps.sort()
+        return steps
+
+    def get_moves(self, color):
+        '''
+        Method -- get_moves
+            Gets every legal single move for a player. Captures are forced,
+                so non-capturing moves are only returned when no capture
+                is possible.
+        Parameters:
+            self -- the current Bitboard object
+            color -- "BLACK" or "RED"
+        Returns:
+            A list of (start, jumped, end) tuples, sorted by start, where
+                jumped is -1 for non-capturing moves.
+        '''
+        # This is the innermost loop of the search, so the shifts are
+        # written out and each move is looked up from its landing square
+        # instead of being rebuilt with the inverse shifts.
+        black = self.black
+        red = self.red
+        empty = ~(black | red) & FULL_BOARD
+        if color == "BLACK":
+            forward = black
+            backward = black & self.kings
+            opponent = red
+        else:
+            forward = red & self.kings
+            backward = red
+            opponent = black
+        jumps = []
+        steps = []
+        if forward:
+            left = (((forward & EVEN_ROWS) << 4) |
+                    ((forward & ODD_ROWS_NOT_LEFT) << 3)) & FULL_BOARD
+            right = (((forward & EVEN_ROWS_NOT_RIGHT) << 5) |
+                     ((forward & ODD_ROWS) << 4)) & FULL_BOARD
+            over = left & opponent
+            if over:
+                landings = (((over & EVEN_ROWS) << 4) |
+                            ((over & ODD_ROWS_NOT_LEFT) << 3)) & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    jumps.append(FORWARD_LEFT_JUMPS[land.bit_length() - 1])
+            over = right & opponent
+            if over:
+                landings = (((over & EVEN_ROWS_NOT_RIGHT) << 5) |
+                            ((over & ODD_ROWS) << 4)) & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    jumps.append(FORWARD_RIGHT_JUMPS[land.bit_length() - 1])
+            if not jumps:
+                landings = left & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    steps.append(FORWARD_LEFT_STEPS[land.bit_length() - 1])
+                landings = right & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    steps.append(FORWARD_RIGHT_STEPS[land.bit_length() - 1])
+        if backward:
+            left = (((backward & EVEN_ROWS) >> 4) |
+                    ((backward & ODD_ROWS_NOT_LEFT) >> 5))
+            right = (((backward & EVEN_ROWS_NOT_RIGHT) >> 3) |
+                     ((backward & ODD_ROWS) >> 4))
+            over = left & opponent
+            if over:
+                landings = (((over & EVEN_ROWS) >> 4) |
+                            ((over & ODD_ROWS_NOT_LEFT) >> 5)) & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    jumps.append(BACK_LEFT_JUMPS[land.bit_length() - 1])
+            over = right & opponent
+            if over:
+                landings = (((over & EVEN_ROWS_NOT_RIGHT) >> 3) |
+                            ((over & ODD_ROWS) >> 4)) & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    jumps.append(BACK_RIGHT_JUMPS[land.bit_length() - 1])
+            if not jumps:
+                landings = left & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    steps.append(BACK_LEFT_STEPS[land.bit_length() - 1])
+                landings = right & empty
+                while landings:
+                    land = landings & -landings
+                    landings ^= land
+                    steps.append(BACK_RIGHT_STEPS[land.bit_length() - 1])
+        if jumps:
+            jumps.sort()
+            return jumps
+        steps.sort()
+        return steps
+
+    def move_piece(self, start, jumped, end):
+        '''
+        Method -- move_piece
+            Moves the piece on one square to another, removes the piece
+                it jumped over (if any) and crowns it on the last row.
+        Parameters:
+            self -- the current Bitboard object
+            start -- the index the piece moves from
+            jumped -- the index of the captured piece, or -1
+            end -- the index the piece moves to
+        Returns:
+            True if the piece was crowned by this move, False otherwise.
+        '''
+        bit = 1 << start
+        land = 1 << end
+        if jumped >= 0:
+            captured = ~(1 << jumped)
+            self.black &= captured
+            self.red &= captured
+            self.kings &= captured
+        crowned = False
+        if self.black & bit:
+            self.black ^= bit | land
+            crowned = not self.kings & bit and bool(land & BLACK_KING_ROW)
+        else:
+            self.red ^= bit | land
+            crowned = not self.kings & bit and bool(land & RED_KING_ROW)
+        if self.kings & bit:
+            self.kings ^= bit | land
+        elif crowned:
+            self.kings |= land
+        return crowned
+
+    def get_sequences(self, color, jumping=-1):
+        '''
+        Method -- get_sequences
+            Gets every legal turn for a player. A capture that can be
+                continued must be, so each multiple jump is followed to its
+                end by a depth-first search that makes and unmakes the hops
+                in place.
+        Parameters:
+            self -- the current Bitboard object, restored before returning
+            color -- "BLACK" or "RED"
+            jumping -- index of a piece that must continue a multiple
+                jump, or -1
+        Returns:
+            A list of (start, landings, captured) tuples, where landings and
+                captured are tuples of indices in the order they happen.
+        '''
+        if jumping >= 0:
+            jumps = self.get_jumps(color, 1 << jumping)
+        else:
+            jumps = self.get_jumps(color)
+            if len(jumps) == 0:
+                return [(start, (end,), ())
+                        for start, end in self.get_steps(color)]
+        sequences = []
+        for start, jumped, end in jumps:
+            self.extend_sequence(color, start, jumped, end, (), (),
+                                 sequences)
+        return sequences
+
+    def extend_sequence(self, color, start, jumped, end, landings, captured,
+                        sequences):
+        '''
+        Method -- extend_sequence
+            Helper method. Makes one hop of a capture sequence, follows
+                every continuation and unmakes the hop.
+        Parameters:
+            self -- the current Bitboard object
+            color -- the player making the capture
+            start -- the index the sequence started on
+            jumped -- the index of the piece captured by this hop
+            end -- the index this hop lands on
+            landings -- the landings of the earlier hops
+            captured -- the captures of the earlier hops
+            sequences -- the list finished sequences are added to
+        Returns:
+            Nothing.
+        '''
+        undo = (self.black, self.red, self.kings)
+        origin = landings[-1] if landings else start
+        self.move_piece(origin, jumped, end)
+        landings += (end,)
+        captured += (jumped,)
+        more = self.get_jumps(color, 1 << end)
+        if len(more) == 0:
+            sequences.append((start, landings, captured))
+        for hop_start, hop_jumped, hop_end in more:
+            self.extend_sequence(color, start, hop_jumped, hop_end,
+                                 landings, captured, sequences)
+        self.black, self.red, self.kings = undo
@@ -1,24 +1,45 @@
+NUM_ROW_COL = 8
+
+
 class BoardSquare:
     '''
     Class -- BoardSquare
-        Represents a square on the game board
+        Represents a square on the game board. Squares are immutable values:
+            the 64 squares of the board are created once and shared, so
+            BoardSquare(row, column) returns the same object every time.
+            Squares off the board are created as needed.
     Attributes:
         row -- the row the square is located in
         column -- the column the square is located in
+        key -- int, the hash of the square. Squares on the board have the
+            keys 0 to 63, row * 8 + column, so the key can index tables.
     Methods:
         __eq__ -- Checks if two BoardSquare objects are equal
+        __hash__ -- Gets the hash of the square, so squares can be kept
+            in sets and used as dict keys
+        __setattr__ -- prevents the square from being changed
+        __reduce__ -- tells copy and pickle to rebuild the square from its
+            row and column
         __str__ -- returns a string representation of BoardSquare
         __repr__ -- returns a string representation of BoardSquare
     '''
 
-    def __init__(self, row, column):
+    __slots__ = ("row", "column", "key")
+
+    def __new__(cls, row, column):
         '''
-        Constructor -- creates a new instance of BoardSquare
+        Constructor -- gets the BoardSquare for a row and column
         Parameters:
-            self -- the current BoardSquare object
+            cls -- the BoardSquare class
+            row -- the row of the square
+            column -- the column of the square
+        Returns:
+            The shared BoardSquare object for squares on the board, or a
+                new one for squares off the board.
         '''
-        self.row = row
-        self.column = column
+        if 0 <= row < NUM_ROW_COL and 0 <= column < NUM_ROW_COL:
+            return SQUARES[row * NUM_ROW_COL + column]
+        return create_square(cls, row, column)
 
     def __eq__(self, other):
         '''
@@ -30,10 +51,47 @@ class BoardSquare:
         Returns:
             True if the two objects are equal, False otherwise.
         '''
+        if self is other:
+            return True
         if type(self) != type(other):
             return False
         return self.row == other.row and self.column == other.column
 
+    def __hash__(self):
+        '''
+        Method -- __hash__
+            Gets the hash of the square.
+        Parameters:
+            self -- The current BoardSquare object
+        Returns:
+            An int, equal for equal squares.
+        '''
+        return self.key
+
+    def __setattr__(self, name, value):
+        '''
+        Method -- __setattr__
+            Prevents the square from being changed, since it is shared.
+        Parameters:
+            self -- The current BoardSquare object
+            name -- the name of the attribute
+            value -- the value it would be set to
+        Raises:
+            AttributeError always.
+        '''
+        raise AttributeError("BoardSquare objects cannot be changed")
+
+    def __reduce__(self):
+        '''
+        Method -- __reduce__
+            Tells copy and pickle how to rebuild the square.
+        Parameters:
+            self -- The current BoardSquare object
+        Returns:
+            A tuple of the BoardSquare class and its arguments.
+        '''
+        return BoardSquare, (self.row, self.column)
+
     def __str__(self):
         '''
         Method -- __str__
@@ -55,3 +113,28 @@ class BoardSquare:
             A string representation of the Board Square.
         '''
         return self.__str__()
+
+
+def create_square(cls, row, column):
+    '''
+    Function -- create_square
+        Creates a new BoardSquare object, bypassing the shared squares.
+    Parameters:
+        cls -- the BoardSquare class
+        row -- the row of the square
+        column -- the column of the square
+    Returns:
+        A new BoardSquare object.
+    '''
+    square = object.__new__(cls)
+    object.__setattr__(square, "row", row)
+    object.__setattr__(square, "column", column)
+    if 0 <= row < NUM_ROW_COL and 0 <= column < NUM_ROW_COL:
+        object.__setattr__(square, "key", row * NUM_ROW_COL + column)
+    else:
+        object.__setattr__(square, "key", hash((row, column)))
+    return square
+
+
+SQUARES = [create_square(BoardSquare, row, column)
+           for row in range(NUM_ROW_COL) for column in range(NUM_ROW_COL)]
@@ -1,5 +1,59 @@
 from boardsquare import BoardSquare
 
+NUM_ROW_COL = 8
+
+
+def build_move_tables():
+    '''
+    Function -- build_move_tables
+        Works out, once, the diagonal neighbours of every square and the
+            (jumped square, landing square) pairs of every capture from it.
+    Returns:
+        A tuple (step tables, jump tables, jumped squares). The step and
+            jump tables map (can move back, can move forward) to a list
+            indexed by BoardSquare.key, holding a tuple of the squares (or
+            square pairs) on the board in the back left, back right,
+            forward left, forward right order. The jumped squares map
+            (start key, landing key) to the square in between.
+    '''
+    DIRECTIONS = {(True, False): ((-1, -1), (-1, 1)),
+                  (False, True): ((1, -1), (1, 1)),
+                  (True, True): ((-1, -1), (-1, 1), (1, -1), (1, 1))}
+    step_tables = {}
+    jump_tables = {}
+    jumped_squares = {}
+    for allowed, directions in DIRECTIONS.items():
+        steps = []
+        jumps = []
+        for row in range(NUM_ROW_COL):
+            for column in range(NUM_ROW_COL):
+                square_steps = []
+                square_jumps = []
+                for row_step, column_step in directions:
+                    step_row = row + row_step
+                    step_column = column + column_step
+                    jump_row = step_row + row_step
+                    jump_column = step_column + column_step
+                    if 0 <= step_row < NUM_ROW_COL and \
+                            0 <= step_column < NUM_ROW_COL:
+                        square_steps.append(
+                            BoardSquare(step_row, step_column))
+                    if 0 <= jump_row < NUM_ROW_COL and \
+                            0 <= jump_column < NUM_ROW_COL:
+                        jumped = BoardSquare(step_row, step_column)
+                        landing = BoardSquare(jump_row, jump_column)
+                        square_jumps.append((jumped, landing))
+                        jumped_squares[
+                            BoardSquare(row, column).key, landing.key] = jumped
+                steps.append(tuple(square_steps))
+                jumps.append(tuple(square_jumps))
+        step_tables[allowed] = steps
+        jump_tables[allowed] = jumps
+    return step_tables, jump_tables, jumped_squares
+
+
+STEP_TABLES, JUMP_TABLES, JUMPED_SQUARES = build_move_tables()
+
 
 class CheckerPiece:
     '''
@@ -9,7 +63,9 @@ class CheckerPiece:
         color -- the color of the checker piece
         is_king -- boolean, indicating if the piece is a king or not
         can_move_forward -- boolean, indicating if the piece can move forward
-        can_move_backward -- boolean, indicating if the piece can move backward
+        can_move_back -- boolean, indicating if the piece can move backward
+        location -- the BoardSquare object the piece was last placed on by
+            a GameState, or None if it is not on a board
     Methods:
         get_location_in_squares -- Gets the corresponding BoardSquare
             object for where the CheckerPiece is located
@@ -21,19 +77,19 @@ class CheckerPiece:
             capturing moves
         get_non_capturing_moves -- Gets the BoardSquare objects of all
             valid non-capturing moves
-        get_legal_non_capturing_moves -- Helper method. Identifies legal
-            non-capturing moves from a list of non-capturing moves
-        get_legal_capturing_moves -- Helper method. Identifies legal
-            capturing moves from a list of capturing moves
         get_jumped_square -- Gets the BoardSquare object of a square
             that is jumped over to make a capture
         end_turn -- ends the CheckerPieces turn by updating
             CheckerPieces attributes
     '''
 
+    __slots__ = ("color", "is_king", "can_move_forward", "can_move_back",
+                 "location")
+
     def __init__(self, color):
         self.color = color
         self.is_king = False
+        self.location = None
         if self.color == "BLACK":
             self.can_move_forward = True
             self.can_move_back = False
@@ -53,6 +109,13 @@ class CheckerPiece:
             A BoardSquare object which contains the current CheckerPiece
                 object.
         '''
+        # The location kept up to date by GameState is trusted as long as
+        # the board agrees with it. Boards built or edited by hand fall
+        # back to scanning every square.
+        location = self.location
+        if location is not None and \
+                squares[location.row][location.column] is self:
+            return location
         current_square = None
         MAX_COL_ROW = 8
         for i in range(0, MAX_COL_ROW):
@@ -110,23 +173,15 @@ class CheckerPiece:
                 can move to make a capturing move.
         '''
         current_square = self.get_location_in_squares(squares)
-        potential_moves = []
-        if self.can_move_back:
-            back_left = BoardSquare(
-                current_square.row - 2, current_square.column - 2)
-            back_right = BoardSquare(
-                current_square.row - 2, current_square.column + 2)
-            potential_moves.append(back_left)
-            potential_moves.append(back_right)
-        if self.can_move_forward:
-            forward_left = BoardSquare(
-                current_square.row + 2, current_square.column - 2)
-            forward_right = BoardSquare(
-                current_square.row + 2, current_square.column + 2)
-            potential_moves.append(forward_left)
-            potential_moves.append(forward_right)
-        move_options = self.get_legal_capturing_moves(
-            current_square, potential_moves, squares)
+        jumps = JUMP_TABLES[self.can_move_back, self.can_move_forward]
+        move_options = []
+        for jumped, landing in jumps[current_square.key]:
+            if squares[landing.row][landing.column] is None:
+                jumped_piece = squares[jumped.row][jumped.column]
+                # Jumping over an empty square is not a capturing move
+                if jumped_piece is not None and \
+                        jumped_piece.color != self.color:
+                    move_options.append(landing)
         return move_options
 
     def get_non_capturing_moves(self, squares):
@@ -142,79 +197,13 @@ class CheckerPiece:
                 can move without making a capture.
         '''
         current_square = self.get_location_in_squares(squares)
-        potential_moves = []
-        if self.can_move_back:
-            back_left = BoardSquare(
-                current_square.row - 1, current_square.column - 1)
-            back_right = BoardSquare(
-                current_square.row - 1, current_square.column + 1)
-            potential_moves.append(back_left)
-            potential_moves.append(back_right)
-        if self.can_move_forward:
-            forward_left = BoardSquare(
-                current_square.row + 1, current_square.column - 1)
-            forward_right = BoardSquare(
-                current_square.row + 1, current_square.column + 1)
-            potential_moves.append(forward_left)
-            potential_moves.append(forward_right)
-        move_options = self.get_legal_non_capturing_moves(
-            potential_moves, squares)
+        steps = STEP_TABLES[self.can_move_back, self.can_move_forward]
+        move_options = []
+        for move in steps[current_square.key]:
+            if squares[move.row][move.column] is None:
+                move_options.append(move)
         return move_options
 
-    def get_legal_non_capturing_moves(self, end_positions, squares):
-        '''
-        Method -- get_legal_non_capturing_moves
-            Given a list of potential non-capturing moves, determines
-                whether they are legal.
-        Parameters:
-            self -- the current CheckerPiece object
-            end_positions -- a list of BoardSquare objects indicating the
-                CheckerPiece object destinations for potential
-                non-capturing moves
-            squares - list of lists representing the state of the game board
-        Returns:
-            A list of BoardSquare objects representing valid non-capturing
-                destinations for the current CheckerPiece object.
-        '''
-        MAX_COL = 7
-        MAX_ROW = 7
-        legal_moves = []
-        for move in end_positions:
-            if 0 <= move.row <= MAX_ROW and 0 <= move.column <= MAX_COL:
-                if squares[move.row][move.column] is None:
-                    legal_moves.append(move)
-        return legal_moves
-
-    def get_legal_capturing_moves(
-            self, current_square, end_positions, squares):
-        '''
-        Method -- get_legal_non_capturing_moves
-            Given a list of potential capturing moves, determines whether they
-                are legal.
-        Parameters:
-            self -- the current CheckerPiece object
-            end_positions -- a list of BoardSquare objects indicating the
-                CheckerPiece object destinations for potential capturing moves
-            squares - list of lists representing the state of the game board
-        Returns:
-            A list of BoardSquare objects representing valid capturing
-                destinations for the current CheckerPiece object.
-        '''
-        MAX_ROW = 7
-        MAX_COL = 7
-        legal_moves = []
-        for move in end_positions:
-            if 0 <= move.row <= MAX_ROW and 0 <= move.column <= MAX_COL:
-                target_is_empty = squares[move.row][move.column] is None
-                jumped_square = self.get_jumped_square(move, current_square)
-                jumped_piece = squares[jumped_square.row][jumped_square.column]
-                # If we jumped over an empty spot, that is not a capturing move
-                if jumped_piece is not None:
-                    has_jumped_enemy_piece = jumped_piece.color != self.color
-                    if target_is_empty and has_jumped_enemy_piece:
-                        legal_moves.append(move)
-        return legal_moves
-
     def get_jumped_square(self, end_position, start_position):
         '''
         Method -- get_jumped_square
@@ -229,10 +218,11 @@ class CheckerPiece:
         Returns:
             A BoardSquare object representing the square that was jumped to
                 make a capture.
+        Raises:
+            KeyError if the squares are not two diagonal steps apart on
+                the board.
         '''
-        row = int((end_position.row + start_position.row)/2)
-        col = int((end_position.column + start_position.column)/2)
-        return BoardSquare(row, col)
+        return JUMPED_SQUARES[start_position.key, end_position.key]
 
     def end_turn(self, squares):
         '''
@@ -243,11 +233,13 @@ class CheckerPiece:
             self -- the current CheckerPiece object
             squares -- list of lists representing the state of the game board
         Returns:
-            Nothing. Updates the object attributes at the end of the
-                CheckerPiece's turn.
+            True if the CheckerPiece was crowned a king by this call,
+                False otherwise. Updates the object attributes at the end
+                of the CheckerPiece's turn.
         '''
         LAST_ROW_BLACK = 7
         LAST_ROW_RED = 0
+        was_king = self.is_king
         if self.color == "BLACK" and\
                 self.get_location_in_squares(squares).row == LAST_ROW_BLACK:
             self.is_king = True
@@ -256,3 +248,4 @@ class CheckerPiece:
                 self.get_location_in_squares(squares).row == LAST_ROW_RED:
             self.is_king = True
             self.can_move_forward = True
+        return self.is_king and not was_king
@@ -1,4 +1,5 @@
-from random import randint
+import random
+from openingbook import encode_game_move
 
 
 class ComputerPlayer:
@@ -6,13 +7,51 @@ class ComputerPlayer:
     Class -- ComputerPlayer
         Represents the Computer player.
     Attributes:
-        None
+        rng -- the random number generator used to pick moves
+        book -- the OpeningBook object consulted before picking a random
+            move, or None
     Methods:
+        select_move -- selects a complete legal move
         select_piece -- selects a valid piece to move
         make_move -- indicates the BoardSquare object to move
             the selected piece to
     '''
 
+    def __init__(self, seed=None, book=None):
+        '''
+        Constructor -- creates a new instance of ComputerPlayer
+        Parameters:
+            self -- the current ComputerPlayer object
+            seed -- a seed for the player's random choices, or None for
+                unpredictable choices
+            book -- an OpeningBook object, or None
+        '''
+        self.rng = random.Random(seed)
+        self.book = book
+
+    def select_move(self, gamestate):
+        '''
+        Method -- select_move
+            This function returns a complete legal move, including every
+                hop of a multiple jump. Book moves are chosen in proportion
+                to their weight, and other moves at random.
+        Parameters:
+            self -- the current ComputerPlayer object
+            gamestate -- an object representing the current state of the game
+        Returns:
+            A Move object, or None if no move is possible.
+        '''
+        moves = gamestate.get_legal_moves()
+        if len(moves) == 0:
+            return None
+        if self.book is not None and gamestate.jumping_piece is None:
+            move = self.book.choose_move(
+                gamestate.zobrist_hash,
+                {encode_game_move(move): move for move in moves}, self.rng)
+            if move is not None:
+                return move
+        return moves[self.rng.randint(0, len(moves) - 1)]
+
     def select_piece(self, gamestate):
         '''
         Method -- select_piece
@@ -27,7 +66,7 @@ class ComputerPlayer:
         piece_selected = None
         valid_pieces = gamestate.get_valid_pieces()
         if len(valid_pieces) != 0:
-            index = randint(0, len(valid_pieces)-1)
+            index = self.rng.randint(0, len(valid_pieces)-1)
             piece_selected = valid_pieces[index]
         return piece_selected
 
@@ -50,6 +89,6 @@ class ComputerPlayer:
         move_choices = None
         move_choices = checkerpiece.get_possible_moves(squares)
         if move_choices != 0:
-            index = randint(0, len(move_choices)-1)
+            index = self.rng.randint(0, len(move_choices)-1)
             move_selected = move_choices[index]
         return move_selected
@@ -0,0 +1,169 @@
+'''
+Static evaluation of Bitboard positions for the search. An evaluator is
+any object with an evaluate(board, color) method returning a score from
+the point of view of the player to move. Evaluators that score a position
+as a sum of per-piece values can also set piece_values, which lets the
+search update the score as it makes and unmakes moves instead of scoring
+every leaf from scratch. Evaluators are registered by name so players can
+be configured with a string, e.g. SearchPlayer(evaluator="material").
+'''
+
+from bitboard import NUM_PLAYABLE, iterate_bits
+
+MAN_VALUE = 100
+KING_VALUE = 160
+DEFAULT_EVALUATOR = "positional"
+
+
+def build_piece_square_tables():
+    '''
+    Function -- build_piece_square_tables
+        Builds the positional bonuses of black men and kings on each
+            playable square. Men are rewarded for guarding their back row,
+            for advancing and for holding the centre; kings for staying
+            away from the edges.
+    Returns:
+        A tuple (man table, king table), each a list of 32 ints indexed by
+            playable square.
+    '''
+    BACK_ROW_BONUS = 6
+    ADVANCE_BONUS = 2
+    CENTER_BONUS = 4
+    KING_CENTER_BONUS = 6
+    CENTER_ROWS = (3, 4)
+    CENTER_COLUMNS = (2, 3, 4, 5)
+    EDGE_COLUMNS = (0, 7)
+    man_table = []
+    king_table = []
+    for index in range(NUM_PLAYABLE):
+        row = index >> 2
+        column = ((index & 3) << 1) + (1 - (row & 1))
+        central = row in CENTER_ROWS and column in CENTER_COLUMNS
+        man_bonus = BACK_ROW_BONUS if row == 0 else ADVANCE_BONUS * row
+        if central:
+            man_bonus += CENTER_BONUS
+        king_bonus = KING_CENTER_BONUS if central else 0
+        if column in EDGE_COLUMNS or row in (0, 7):
+            king_bonus -= KING_CENTER_BONUS // 2
+        man_table.append(man_bonus)
+        king_table.append(king_bonus)
+    return man_table, king_table
+
+
+class Evaluator:
+    '''
+    Class -- Evaluator
+        Represents an evaluation that scores every piece by its color, its
+            king status and the square it stands on. Scores are sums of
+            piece values, so the search can keep them up to date
+            incrementally.
+    Attributes:
+        piece_values -- a dict mapping "BLACK" and "RED" to a tuple
+            (men values, king values), each a list of 32 ints indexed by
+            playable square, from black's point of view
+    Methods:
+        evaluate -- scores a position from scratch
+    '''
+
+    def __init__(self, man_value=MAN_VALUE, king_value=KING_VALUE,
+                 man_table=None, king_table=None):
+        '''
+        Constructor -- creates a new instance of Evaluator
+        Parameters:
+            self -- the current Evaluator object
+            man_value -- the value of a man
+            king_value -- the value of a king
+            man_table -- the bonus of a black man on each playable square,
+                or None for no bonus. Red uses the same table turned
+                around.
+            king_table -- the bonus of a black king on each playable
+                square, or None for no bonus
+        '''
+        if man_table is None:
+            man_table = [0] * NUM_PLAYABLE
+        if king_table is None:
+            king_table = [0] * NUM_PLAYABLE
+        black_men = [man_value + bonus for bonus in man_table]
+        black_kings = [king_value + bonus for bonus in king_table]
+        # Turning the board around maps playable square i to 31 - i.
+        red_men = [-value for value in reversed(black_men)]
+        red_kings = [-value for value in reversed(black_kings)]
+        self.piece_values = {"BLACK": (black_men, black_kings),
+                             "RED": (red_men, red_kings)}
+
+    def evaluate(self, board, color):
+        '''
+        Method -- evaluate
+            Scores a position from scratch.
+        Parameters:
+            self -- the current Evaluator object
+            board -- a Bitboard object
+            color -- "BLACK" or "RED", the player to move
+        Returns:
+            An int, positive if the position favours the player to move.
+        '''
+        kings = board.kings
+        score = 0
+        for piece_color, pieces in (("BLACK", board.black),
+                                    ("RED", board.red)):
+            men_values, king_values = self.piece_values[piece_color]
+            for index in iterate_bits(pieces & ~kings):
+                score += men_values[index]
+            for index in iterate_bits(pieces & kings):
+                score += king_values[index]
+        return score if color == "BLACK" else -score
+
+
+def make_positional_evaluator():
+    '''
+    Function -- make_positional_evaluator
+        Creates the default evaluator: material plus piece-square bonuses.
+    Returns:
+        An Evaluator object.
+    '''
+    man_table, king_table = build_piece_square_tables()
+    return Evaluator(MAN_VALUE, KING_VALUE, man_table, king_table)
+
+
+def make_material_evaluator():
+    '''
+    Function -- make_material_evaluator
+        Creates an evaluator that only counts material.
+    Returns:
+        An Evaluator object.
+    '''
+    return Evaluator(MAN_VALUE, KING_VALUE)
+
+
+EVALUATORS = {"positional": make_positional_evaluator,
+              "material": make_material_evaluator}
+
+
+def register_evaluator(name, factory):
+    '''
+    Function -- register_evaluator
+        Makes an evaluator available by name.
+    Parameters:
+        name -- the name to register it under
+        factory -- a function taking no arguments that returns a new
+            evaluator
+    Returns:
+        Nothing.
+    '''
+    EVALUATORS[name] = factory
+
+
+def make_evaluator(name=DEFAULT_EVALUATOR):
+    '''
+    Function -- make_evaluator
+        Creates a registered evaluator.
+    Parameters:
+        name -- the name the evaluator was registered under
+    Returns:
+        A new evaluator object.
+    Raises:
+        ValueError if no evaluator has that name.
+    '''
+    if name not in EVALUATORS:
+        raise ValueError("unknown evaluator: " + str(name))
+    return EVALUATORS[name]()
@@ -0,0 +1,164 @@
+from gamestate import GameState
+from boardsquare import BoardSquare
+from bitboard import Bitboard, square_to_index, index_to_square, \
+    BLACK_KING_ROW, RED_KING_ROW
+from move import Move
+
+
+class Game:
+    '''
+    Class -- Game
+        Represents a game of checkers without any user interface, so it
+            can be played by programs, servers and worker processes. It
+            never imports turtle.
+    Attributes:
+        state -- the GameState object holding the board
+        history -- a list of the Move objects played so far
+        game_over -- boolean, indicating whether the game has ended
+    Methods:
+        get_legal_moves -- Gets every complete legal move for the player
+            to move
+        apply_move -- plays a complete move
+        apply_hop -- plays a single step or single jump
+        get_winner -- Gets the winner of the game, if any
+        is_over -- indicates whether the game has ended
+    '''
+
+    def __init__(self, state=None):
+        '''
+        Constructor -- creates a new instance of Game
+        Parameters:
+            self -- the current Game object
+            state -- a GameState object to continue from, or None to start
+                a new game
+        '''
+        self.state = state if state is not None else GameState()
+        self.history = []
+        self.game_over = len(self.state.get_valid_pieces()) == 0
+
+    def get_legal_moves(self):
+        '''
+        Method -- get_legal_moves
+            Gets every complete move the player to move can make. Multiple
+                jumps are returned as single moves, and when a multiple
+                jump is under way only its continuations are returned.
+        Parameters:
+            self -- the current Game object
+        Returns:
+            A list of Move objects.
+        '''
+        if self.game_over:
+            return []
+        state = self.state
+        board = Bitboard.from_squares(state.squares)
+        jumping = -1
+        if state.jumping_piece is not None:
+            location = state.positions[state.jumping_piece]
+            jumping = square_to_index(location.row, location.column)
+        king_row = BLACK_KING_ROW if state.current_player == "BLACK" \
+            else RED_KING_ROW
+        moves = []
+        for start, landings, captured in board.get_sequences(
+                state.current_player, jumping):
+            promotes = not board.kings >> start & 1 and \
+                any(king_row >> landing & 1 for landing in landings)
+            moves.append(Move(
+                BoardSquare(*index_to_square(start)),
+                [BoardSquare(*index_to_square(index)) for index in landings],
+                [BoardSquare(*index_to_square(index)) for index in captured],
+                promotes))
+        return moves
+
+    def apply_move(self, move):
+        '''
+        Method -- apply_move
+            Plays a complete move, one hop at a time.
+        Parameters:
+            self -- the current Game object
+            move -- a Move object
+        Returns:
+            True if the game is over after the move, False otherwise.
+        '''
+        current = move.start
+        for landing in move.landings:
+            self.apply_hop(current, landing)
+            current = landing
+        return self.game_over
+
+    def apply_hop(self, start, end):
+        '''
+        Method -- apply_hop
+            Plays a single non-capturing step or a single jump, which is how
+                a player clicking on the board moves. A jump that can be
+                continued leaves the same player to move.
+        Parameters:
+            self -- the current Game object
+            start -- the BoardSquare object of the piece to move
+            end -- the BoardSquare object to move it to
+        Returns:
+            True if the game is over after the hop, False otherwise.
+        Raises:
+            ValueError if the hop is not legal.
+        '''
+        state = self.state
+        piece = state.piece_selected(start.row, start.column)
+        capturing_moves = non_capturing_moves = ()
+        if not self.game_over and piece is not None and \
+                piece in state.get_valid_pieces():
+            capturing_moves, non_capturing_moves = \
+                state.get_piece_moves(piece)
+        if end not in (capturing_moves or non_capturing_moves):
+            raise ValueError("illegal move: " + str(start) + " to " +
+                             str(end))
+        # A game can start from a state in the middle of a multiple jump,
+        # and then the first hop starts a new move.
+        continuing = state.jumping_piece is piece and len(self.history) != 0
+        was_king = piece.is_king
+        if len(capturing_moves) != 0:
+            jumped = piece.get_jumped_square(end, start)
+            state.update_squares(end.row, end.column, piece)
+            self.game_over = state.end_capture_move(piece, jumped)
+            captured = [jumped]
+        else:
+            state.update_squares(end.row, end.column, piece)
+            self.game_over = state.end_move()
+            captured = []
+        promotes = piece.is_king and not was_king
+        if continuing:
+            last = self.history[-1]
+            last.landings.append(end)
+            last.captured.extend(captured)
+            last.promotes = last.promotes or promotes
+        else:
+            self.history.append(Move(start, [end], captured, promotes))
+        return self.game_over
+
+    def get_winner(self):
+        '''
+        Method -- get_winner
+            Gets the winner of the game. A player loses when they have no
+                pieces left or none of their pieces can move.
+        Parameters:
+            self -- the current Game object
+        Returns:
+            "BLACK" or "RED", or None if the game is not over.
+        '''
+        if not self.game_over:
+            return None
+        if self.state.get_red_count() == 0:
+            return "BLACK"
+        if self.state.get_black_count() == 0:
+            return "RED"
+        # The player to move is the one left without a legal move.
+        return "RED" if self.state.current_player == "BLACK" else "BLACK"
+
+    def is_over(self):
+        '''
+        Method -- is_over
+            Indicates whether the game has ended.
+        Parameters:
+            self -- the current Game object
+        Returns:
+            True if the game is over, False otherwise.
+        '''
+        return self.game_over
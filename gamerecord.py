@@ -0,0 +1,360 @@
+'''
+A compact binary format for archiving games. A file starts with the magic
+b"CKGR" and a version byte, followed by one record per game:
+    header: result (uint8: 0 unfinished, 1 black won, 2 red won, 3 draw),
+        length of the black player's name (uint8), length of the red
+        player's name (uint8), number of moves (uint16), seed (uint64),
+        length of the moves (uint32), all little-endian
+    the two player names, UTF-8
+    the moves: one byte for the start square, then one byte per landing
+        with bit 7 set while more landings follow
+Squares are playable square indices, 0 to 31. Captured pieces are not
+stored since every landing two rows away jumps the square in between, so
+a plain move takes two bytes. Files are written and read one record at a
+time, so archives of any size can be streamed. Version 1 files stored both
+draws and unfinished games as 0, which is read as unfinished.
+'''
+
+import struct
+from boardsquare import BoardSquare
+from bitboard import NUM_PLAYABLE, square_to_index, index_to_square, \
+    get_jumped_index
+from gamestate import GameState
+from move import Move
+
+MAGIC = b"CKGR"
+VERSION = 2
+READABLE_VERSIONS = (1, 2)
+FILE_HEADER = struct.Struct("<4sB")
+RECORD_HEADER = struct.Struct("<BBBHQI")
+MORE_LANDINGS = 0x80
+# The code of each (winner, finished) result.
+RESULTS = {(None, False): 0, ("BLACK", True): 1, ("RED", True): 2,
+           (None, True): 3}
+OUTCOMES = {code: result for result, code in RESULTS.items()}
+# The BoardSquare of each playable square index.
+INDEX_SQUARES = [BoardSquare(*index_to_square(index))
+                 for index in range(NUM_PLAYABLE)]
+
+
+def pack_moves(moves):
+    '''
+    Function -- pack_moves
+        Packs moves into bytes.
+    Parameters:
+        moves -- a list of (start, landings) tuples of square indices
+    Returns:
+        A bytes object.
+    '''
+    data = bytearray()
+    for start, landings in moves:
+        data.append(start)
+        last = len(landings) - 1
+        for number, landing in enumerate(landings):
+            data.append(landing | MORE_LANDINGS if number < last
+                        else landing)
+    return bytes(data)
+
+
+def unpack_moves(data):
+    '''
+    Function -- unpack_moves
+        Unpacks moves packed by pack_moves.
+    Parameters:
+        data -- a bytes-like object
+    Returns:
+        A list of (start, landings) tuples of square indices.
+    Raises:
+        ValueError if the data ends in the middle of a move.
+    '''
+    moves = []
+    position = 0
+    end = len(data)
+    while position < end:
+        start = data[position]
+        landings = []
+        position += 1
+        while position < end and data[position] & MORE_LANDINGS:
+            landings.append(data[position] ^ MORE_LANDINGS)
+            position += 1
+        if position == end:
+            raise ValueError("truncated move")
+        landings.append(data[position])
+        position += 1
+        moves.append((start, tuple(landings)))
+    return moves
+
+
+class GameRecord:
+    '''
+    Class -- GameRecord
+        Represents one archived game.
+    Attributes:
+        moves -- a list of (start, landings) tuples of square indices, one
+            per turn
+        winner -- "BLACK", "RED", or None for a draw or unfinished game
+        finished -- boolean, whether the game was won or drawn
+        black -- the name of the black player
+        red -- the name of the red player
+        seed -- int, the seed the game was played with
+    Methods:
+        from_game -- builds a record of a Game object
+        to_bytes -- packs the record
+        get_move -- Gets one turn as a Move object
+        replay -- plays the moves on a GameState one by one
+        __eq__ -- Checks if two GameRecord objects are equal
+    '''
+
+    def __init__(self, moves, winner=None, black="", red="", seed=0,
+                 finished=False):
+        '''
+        Constructor -- creates a new instance of GameRecord
+        Parameters:
+            self -- the current GameRecord object
+            moves -- a list of (start, landings) tuples of square indices
+            winner -- "BLACK", "RED" or None
+            black -- the name of the black player
+            red -- the name of the red player
+            seed -- the seed the game was played with, from 0 to 2 ** 64 - 1
+            finished -- whether a game without a winner was drawn rather
+                than left unfinished. A game with a winner is finished.
+        '''
+        self.moves = moves
+        self.winner = winner
+        self.finished = finished or winner is not None
+        self.black = black
+        self.red = red
+        self.seed = seed
+
+    @classmethod
+    def from_game(cls, game, black="", red="", seed=0):
+        '''
+        Method -- from_game
+            Builds a record of a game.
+        Parameters:
+            cls -- the GameRecord class
+            game -- a Game object
+            black -- the name of the black player
+            red -- the name of the red player
+            seed -- the seed the game was played with
+        Returns:
+            A GameRecord object.
+        '''
+        moves = [(square_to_index(move.start.row, move.start.column),
+                  tuple(square_to_index(square.row, square.column)
+                        for square in move.landings))
+                 for move in game.history]
+        return cls(moves, game.get_winner(), black, red, seed,
+                   game.is_over())
+
+    def to_bytes(self):
+        '''
+        Method -- to_bytes
+            Packs the record as it is stored in a file.
+        Parameters:
+            self -- the current GameRecord object
+        Returns:
+            A bytes object.
+        '''
+        black = self.black.encode("utf-8")
+        red = self.red.encode("utf-8")
+        moves = pack_moves(self.moves)
+        result = RESULTS[(self.winner, self.finished)]
+        return RECORD_HEADER.pack(result, len(black),
+                                  len(red), len(self.moves), self.seed,
+                                  len(moves)) + black + red + moves
+
+    def get_move(self, number, state):
+        '''
+        Method -- get_move
+            Gets one turn of the game as a Move object.
+        Parameters:
+            self -- the current GameRecord object
+            number -- the number of the turn, from 0
+            state -- the GameState object of the position before the turn
+        Returns:
+            A Move object.
+        '''
+        start, landings = self.moves[number]
+        captured = []
+        current = start
+        for landing in landings:
+            if abs((landing >> 2) - (current >> 2)) == 2:
+                captured.append(
+                    INDEX_SQUARES[get_jumped_index(current, landing)])
+            current = landing
+        square = INDEX_SQUARES[start]
+        piece = state.squares[square.row][square.column]
+        last_row = 7 if piece.color == "BLACK" else 0
+        promotes = not piece.is_king and any(
+            landing >> 2 == last_row for landing in landings)
+        return Move(square, [INDEX_SQUARES[landing] for landing in landings],
+                    captured, promotes)
+
+    def replay(self, state=None, validate=False):
+        '''
+        Method -- replay
+            Plays the game through a GameState, one turn at a time.
+        Parameters:
+            self -- the current GameRecord object
+            state -- the GameState object to play on, or None to start a
+                new game
+            validate -- whether to check each move against the legal moves
+                first, which is much slower
+        Returns:
+            A generator of (Move, GameState) tuples, the state being the
+                same object each time, after the move.
+        Raises:
+            ValueError if validate is True and a move is not legal.
+        '''
+        if state is None:
+            state = GameState()
+        for number in range(len(self.moves)):
+            move = self.get_move(number, state)
+            if validate and move not in state.get_legal_moves():
+                raise ValueError("illegal move in record: " + str(move))
+            state.make_move(move)
+            yield move, state
+
+    def __eq__(self, other):
+        '''
+        Method -- __eq__
+            Checks if two objects are equal
+        Parameters:
+            self -- The current GameRecord object
+            other -- An object to compare self to.
+        Returns:
+            True if the two objects are equal, False otherwise.
+        '''
+        if type(self) != type(other):
+            return False
+        return (self.moves == other.moves and self.winner == other.winner and
+                self.finished == other.finished and
+                self.black == other.black and self.red == other.red and
+                self.seed == other.seed)
+
+
+class GameRecordWriter:
+    '''
+    Class -- GameRecordWriter
+        Represents a file that game records are appended to, one at a
+            time. Can be used as a context manager.
+    Attributes:
+        output -- the open file
+        count -- int, the number of records written
+    Methods:
+        write -- appends a record
+        close -- closes the file
+        __enter__ -- starts a with block
+        __exit__ -- closes the file at the end of a with block
+    '''
+
+    def __init__(self, path, append=False):
+        '''
+        Constructor -- creates a new instance of GameRecordWriter
+        Parameters:
+            self -- the current GameRecordWriter object
+            path -- the path of the file
+            append -- whether to add to an existing file instead of
+                starting a new one
+        Raises:
+            ValueError if the file to add to is not a game record file of
+                the current version.
+        '''
+        self.output = open(path, "ab" if append else "wb")
+        if self.output.tell() == 0:
+            self.output.write(FILE_HEADER.pack(MAGIC, VERSION))
+        else:
+            with open(path, "rb") as records:
+                header = records.read(FILE_HEADER.size)
+            if len(header) != FILE_HEADER.size or \
+                    FILE_HEADER.unpack(header) != (MAGIC, VERSION):
+                self.output.close()
+                raise ValueError("cannot add to game record file: " +
+                                 str(path))
+        self.count = 0
+
+    def write(self, record):
+        '''
+        Method -- write
+            Appends a record to the file.
+        Parameters:
+            self -- the current GameRecordWriter object
+            record -- a GameRecord object
+        Returns:
+            Nothing.
+        '''
+        self.output.write(record.to_bytes())
+        self.count += 1
+
+    def close(self):
+        '''
+        Method -- close
+            Closes the file.
+        Parameters:
+            self -- the current GameRecordWriter object
+        Returns:
+            Nothing.
+        '''
+        self.output.close()
+
+    def __enter__(self):
+        '''
+        Method -- __enter__
+            Starts a with block.
+        Parameters:
+            self -- the current GameRecordWriter object
+        Returns:
+            The GameRecordWriter object.
+        '''
+        return self
+
+    def __exit__(self, *exception):
+        '''
+        Method -- __exit__
+            Closes the file at the end of a with block.
+        Parameters:
+            self -- the current GameRecordWriter object
+            exception -- the exception raised in the block, if any
+        Returns:
+            Nothing.
+        '''
+        self.close()
+
+
+def read_records(path):
+    '''
+    Function -- read_records
+        Reads the records of a file one at a time.
+    Parameters:
+        path -- the path of a file written by GameRecordWriter
+    Returns:
+        A generator of GameRecord objects.
+    Raises:
+        ValueError if the file is not a game record file or ends in the
+            middle of a record.
+    '''
+    with open(path, "rb") as records:
+        magic, version = FILE_HEADER.unpack(records.read(FILE_HEADER.size))
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            raise ValueError("not a game record file: " + str(path))
+        while True:
+            header = records.read(RECORD_HEADER.size)
+            if len(header) == 0:
+                return
+            if len(header) != RECORD_HEADER.size:
+                raise ValueError("truncated game record in " + str(path))
+            result, black_length, red_length, count, seed, length = \
+                RECORD_HEADER.unpack(header)
+            body = records.read(black_length + red_length + length)
+            if len(body) != black_length + red_length + length:
+                raise ValueError("truncated game record in " + str(path))
+            moves = unpack_moves(body[black_length + red_length:])
+            if len(moves) != count or result not in OUTCOMES:
+                raise ValueError("corrupt game record in " + str(path))
+            winner, finished = OUTCOMES[result]
+            yield GameRecord(moves, winner,
+                             body[:black_length].decode("utf-8"),
+                             body[black_length:black_length +
+                                  red_length].decode("utf-8"), seed,
+                             finished)
@@ -1,4 +1,55 @@
-from checkerpiece import CheckerPiece
+import struct
+from checkerpiece import CheckerPiece, STEP_TABLES, JUMP_TABLES
+from boardsquare import BoardSquare, SQUARES
+from bitboard import Bitboard, square_to_index, index_to_square
+from move import Move
+from zobrist import get_piece_key, get_side_key, PIECE_KEYS, SIDE_KEY
+
+# A piece's moves only depend on the squares up to two diagonal steps away,
+# so a change to a square can only change the moves of the pieces on these
+# squares, listed for every square by its BoardSquare key.
+AFFECTED_SQUARES = [
+    (square,) + STEP_TABLES[True, True][square.key] +
+    tuple(landing for jumped, landing in JUMP_TABLES[True, True][square.key])
+    for square in SQUARES]
+
+# The packed form written by GameState.to_bytes: the black, red and kings
+# masks of the playable squares, the black and red piece counts, and a
+# flags byte holding the player to move and, plus one, the index of the
+# square of a piece that must continue a multiple jump (0 for none).
+STATE_FORMAT = struct.Struct("<IIIBBB")
+RED_TO_MOVE = 0x80
+JUMPING_MASK = 0x3F
+
+
+def unpack_position(data):
+    '''
+    Function -- unpack_position
+        Unpacks bytes packed by GameState.to_bytes into the Bitboard form
+            the search works on, without building a GameState.
+    Parameters:
+        data -- a bytes-like object
+    Returns:
+        A tuple (Bitboard, player to move, index of the piece that must
+            continue a multiple jump or -1).
+    Raises:
+        ValueError if the data is not a packed position.
+    '''
+    if len(data) != STATE_FORMAT.size:
+        raise ValueError("a packed GameState is %d bytes, not %d" %
+                         (STATE_FORMAT.size, len(data)))
+    black, red, kings, black_count, red_count, flags = \
+        STATE_FORMAT.unpack(data)
+    jumping = (flags & JUMPING_MASK) - 1
+    if black & red or kings & ~(black | red) or \
+            bin(black).count("1") != black_count or \
+            bin(red).count("1") != red_count or \
+            flags & ~(RED_TO_MOVE | JUMPING_MASK) or \
+            (jumping >= 0 and not (red if flags & RED_TO_MOVE
+                                   else black) >> jumping & 1):
+        raise ValueError("corrupt packed GameState: " + data.hex())
+    return (Bitboard(black, red, kings),
+            "RED" if flags & RED_TO_MOVE else "BLACK", jumping)
 
 
 class GameState:
@@ -10,6 +61,24 @@ class GameState:
         current_player -- the player whose turn it is
         red_count -- the number of red checkerpiece objects on the board
         black_count -- the number of black checkerpiece objects on the board
+        positions -- a dict mapping every CheckerPiece object on the board
+            to the BoardSquare object it is located on
+        jumping_piece -- the CheckerPiece object that must continue a
+            multiple jump, or None
+        zobrist_hash -- a 64-bit int identifying the pieces on the board
+            and the player to move, updated incrementally after each move
+        piece_moves -- a dict caching, for CheckerPiece objects on the
+            board, a tuple (capturing moves, non-capturing moves)
+        stale_pieces -- a set of the CheckerPiece objects whose cached
+            moves may be out of date
+        valid_pieces -- a dict caching the result of get_valid_pieces for
+            each player, emptied whenever the board changes
+        cache_hits -- int, the calls to get_valid_pieces answered from the
+            cache
+        cache_misses -- int, the calls to get_valid_pieces that had to
+            rebuild the list
+        pieces_refreshed -- int, the number of times a piece's moves were
+            worked out again
     Methods:
         piece_selected -- Gets the CheckerPiece object at a given
             column and row
@@ -26,34 +95,71 @@ class GameState:
         end_capture_move -- resets the current_player and indicates
             whether the game should continue after a capturing move
         update_squares -- updates the list of lists after a move has been made
+        load_squares -- replaces the list of lists and rebuilds positions,
+            counts and the hash
+        crown_piece -- ends a piece's turn and crowns it if needed
+        place_piece -- records where a CheckerPiece object is located
+        remove_piece -- removes a CheckerPiece object from the board
+        get_pieces_in_order -- Gets the current player's CheckerPiece
+            objects in the order they appear on the board
+        get_legal_moves -- Gets every complete legal move for the current
+            player, with each multiple jump as a single Move
+        extend_sequence -- Helper method. Follows a capture sequence
+        make_hop -- moves a piece one step or one jump, returning what is
+            needed to undo it
+        unmake_hop -- undoes a hop made by make_hop
+        make_move -- plays a complete move, returning what is needed to
+            undo it
+        unmake_move -- undoes a move made by make_move
+        get_piece_moves -- Gets the cached moves of a CheckerPiece object
+        invalidate_square -- marks the moves of the pieces near a square
+            as out of date
+        refresh_moves -- works out the moves of the pieces marked out of
+            date
+        clear_move_cache -- forgets every cached move
+        get_cache_stats -- reports how well the valid pieces cache works
+        to_bytes -- packs the position into STATE_FORMAT.size bytes
+        from_bytes -- builds a GameState from bytes packed by to_bytes
     '''
 
-    def __init__(self):
+    def __init__(self, squares=None):
         '''
         Constructor -- creates a new instance of GameState
         Parameters:
             self -- the current GameState object
+            squares -- list of lists representing the board to start from,
+                with black to move, or None for the starting position
         '''
-        self.squares = [[None, CheckerPiece("BLACK"), None,
-                        CheckerPiece("BLACK"), None, CheckerPiece("BLACK"),
-                        None, CheckerPiece("BLACK")],
-                        [CheckerPiece("BLACK"), None,
-                        CheckerPiece("BLACK"), None, CheckerPiece("BLACK"),
-                        None, CheckerPiece("BLACK"), None],
-                        [None, CheckerPiece("BLACK"), None,
-                        CheckerPiece("BLACK"), None, CheckerPiece("BLACK"),
-                        None, CheckerPiece("BLACK")],
-                        [None, None, None, None, None, None, None, None],
-                        [None, None, None, None, None, None, None, None],
-                        [CheckerPiece("RED"), None, CheckerPiece("RED"), None,
-                        CheckerPiece("RED"), None, CheckerPiece("RED"), None],
-                        [None, CheckerPiece("RED"), None, CheckerPiece("RED"),
-                        None, CheckerPiece("RED"), None, CheckerPiece("RED")],
-                        [CheckerPiece("RED"), None, CheckerPiece("RED"), None,
-                        CheckerPiece("RED"), None, CheckerPiece("RED"), None]]
+        if squares is None:
+            squares = [
+                [None, CheckerPiece("BLACK"), None, CheckerPiece("BLACK"),
+                 None, CheckerPiece("BLACK"), None, CheckerPiece("BLACK")],
+                [CheckerPiece("BLACK"), None, CheckerPiece("BLACK"), None,
+                 CheckerPiece("BLACK"), None, CheckerPiece("BLACK"), None],
+                [None, CheckerPiece("BLACK"), None, CheckerPiece("BLACK"),
+                 None, CheckerPiece("BLACK"), None, CheckerPiece("BLACK")],
+                [None, None, None, None, None, None, None, None],
+                [None, None, None, None, None, None, None, None],
+                [CheckerPiece("RED"), None, CheckerPiece("RED"), None,
+                 CheckerPiece("RED"), None, CheckerPiece("RED"), None],
+                [None, CheckerPiece("RED"), None, CheckerPiece("RED"),
+                 None, CheckerPiece("RED"), None, CheckerPiece("RED")],
+                [CheckerPiece("RED"), None, CheckerPiece("RED"), None,
+                 CheckerPiece("RED"), None, CheckerPiece("RED"), None]]
+        self.squares = squares
         self.current_player = "BLACK"
         self.red_count = 12
         self.black_count = 12
+        self.positions = {}
+        self.jumping_piece = None
+        self.zobrist_hash = 0
+        self.piece_moves = {}
+        self.stale_pieces = set()
+        self.valid_pieces = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pieces_refreshed = 0
+        self.load_squares(self.squares)
 
     def piece_selected(self, row, column):
         '''
@@ -73,60 +179,51 @@ class GameState:
     def get_valid_pieces(self):
         '''
         Method -- get_valid_pieces
-            Scans the game board and returns a list of all CheckerPiece objects
-                that can legally be moved for the current player.
+            Returns a list of all CheckerPiece objects that can legally be
+                moved for the current player. The list is cached until the
+                board changes, and only the pieces near the squares that
+                changed have their moves worked out again.
         Parameters:
             self -- the current GameState object
         Returns:
             A list of CheckerPiece objects belonging to the current
                 player which can legally be moved on the game board.
         '''
-        NUM_ROW_COL = 8
+        # Only the piece that just captured may continue a multiple jump.
+        if self.jumping_piece is not None:
+            return [self.jumping_piece]
+        valid_pieces = self.valid_pieces.get(self.current_player)
+        if valid_pieces is not None:
+            self.cache_hits += 1
+            return list(valid_pieces)
+        self.cache_misses += 1
+        self.refresh_moves()
         valid_pieces = []
         capturing_pieces = []
-        for i in range(0, NUM_ROW_COL):
-            for j in range(0, NUM_ROW_COL):
-                piece = self.squares[i][j]
-                if piece is not None and piece.color == self.current_player:
-                    if piece.can_capture(self.squares):
-                        capturing_pieces.append(piece)
-                    else:
-                        moves = piece.get_possible_moves(self.squares)
-                        if len(moves) != 0:
-                            valid_pieces.append(piece)
+        for piece in self.get_pieces_in_order():
+            capturing_moves, non_capturing_moves = self.piece_moves[piece]
+            if len(capturing_moves) != 0:
+                capturing_pieces.append(piece)
+            elif len(non_capturing_moves) != 0:
+                valid_pieces.append(piece)
         if len(capturing_pieces) != 0:
             valid_pieces = capturing_pieces
-        return valid_pieces
+        self.valid_pieces[self.current_player] = valid_pieces
+        return list(valid_pieces)
 
     def get_valid_squares(self):
         '''
         Method -- get_valid_squares
-            Scans the game board and returns a list of all the BoardSquare
-                objects from which CheckerPiece Objects can be legally
-                moved for the current player.
+            Returns a list of all the BoardSquare objects from which
+                CheckerPiece Objects can be legally moved for the current
+                player.
         Parameters:
             self -- the current GameState object
         Returns:
             A list of BoardSquare objects which can legally be selected
                 by the current player.
         '''
-        NUM_ROW_COL = 8
-        valid_squares = []
-        capturing_squares = []
-        for i in range(0, NUM_ROW_COL):
-            for j in range(0, NUM_ROW_COL):
-                piece = self.squares[i][j]
-                if piece is not None and piece.color == self.current_player:
-                    square = piece.get_location_in_squares(self.squares)
-                    if piece.can_capture(self.squares):
-                        capturing_squares.append(square)
-                    else:
-                        moves = piece.get_possible_moves(self.squares)
-                        if len(moves) != 0:
-                            valid_squares.append(square)
-        if len(capturing_squares) != 0:
-            valid_squares = capturing_squares
-        return valid_squares
+        return [self.positions[piece] for piece in self.get_valid_pieces()]
 
     def get_black_count(self):
         '''
@@ -164,6 +261,8 @@ class GameState:
         Returns:
             A boolean indicating whether the game has ended.
         '''
+        self.jumping_piece = None
+        self.zobrist_hash ^= SIDE_KEY
         if self.current_player == "BLACK":
             self.current_player = "RED"
         else:
@@ -188,13 +287,15 @@ class GameState:
             A boolean indicating whether the game has ended.
         '''
         no_options_left = False
-        prior_checker_selected.end_turn(self.squares)
+        self.crown_piece(prior_checker_selected)
         if prior_checker_selected.color == "BLACK":
             self.red_count -= 1
         else:
             self.black_count -= 1
-        self.squares[jumped_square.row][jumped_square.column] = None
-        if not prior_checker_selected.can_capture(self.squares):
+        self.remove_piece(jumped_square.row, jumped_square.column)
+        if prior_checker_selected.can_capture(self.squares):
+            self.jumping_piece = prior_checker_selected
+        else:
             no_options_left = self.end_move()
         if self.red_count == 0 or self.black_count == 0 or no_options_left:
             return True
@@ -204,7 +305,8 @@ class GameState:
         '''
         Method -- update_squares
             Updates the self.squares list of lists after a turn has
-                ended with the new positions of each CheckerPiece object
+                ended with the new positions of each CheckerPiece object,
+                crowning the moved piece if it reached the last row
         Parameters:
             self -- the current GameState object
             row -- the row to which the player moved in the current turn
@@ -218,4 +320,450 @@ class GameState:
             prior_checker_selected.get_location_in_squares(self.squares)
         self.squares[prior_checker_selected_position.row][
             prior_checker_selected_position.column] = None
+        self.invalidate_square(prior_checker_selected_position)
+        self.zobrist_hash ^= get_piece_key(
+            prior_checker_selected.color, prior_checker_selected.is_king,
+            square_to_index(prior_checker_selected_position.row,
+                            prior_checker_selected_position.column))
         self.squares[row][column] = prior_checker_selected
+        self.place_piece(prior_checker_selected, row, column)
+        self.invalidate_square(BoardSquare(row, column))
+        self.zobrist_hash ^= get_piece_key(
+            prior_checker_selected.color, prior_checker_selected.is_king,
+            square_to_index(row, column))
+        self.crown_piece(prior_checker_selected)
+
+    def crown_piece(self, piece):
+        '''
+        Method -- crown_piece
+            Ends a CheckerPiece object's turn, crowning it if it has
+                reached the last row, and keeps the hash up to date.
+        Parameters:
+            self -- the current GameState object
+            piece -- the CheckerPiece object that was moved
+        Returns:
+            Nothing. Updates the piece and the hash of the GameState.
+        '''
+        if piece.end_turn(self.squares):
+            location = self.positions[piece]
+            self.invalidate_square(location)
+            index = square_to_index(location.row, location.column)
+            self.zobrist_hash ^= get_piece_key(piece.color, False, index)
+            self.zobrist_hash ^= get_piece_key(piece.color, True, index)
+
+    def load_squares(self, squares):
+        '''
+        Method -- load_squares
+            Replaces the list of lists representing the game board and
+                rebuilds the position of every CheckerPiece object and the
+                piece counts. Use this instead of assigning self.squares
+                directly.
+        Parameters:
+            self -- the current GameState object
+            squares -- list of lists representing the state of the game board
+        Returns:
+            Nothing. Updates the squares, positions and counts of the
+                GameState.
+        '''
+        NUM_ROW_COL = 8
+        self.squares = squares
+        self.positions = positions = {}
+        self.piece_moves = {}
+        self.valid_pieces = {}
+        # The hash, counts and positions are all built in one pass over
+        # the board, since this runs for every GameState created. Half a
+        # square's key, row * 8 + column, is its playable square index.
+        zobrist_hash = get_side_key(self.current_player)
+        black_count = red_count = 0
+        for row in range(NUM_ROW_COL):
+            for column, piece in enumerate(squares[row]):
+                if piece is not None:
+                    square = SQUARES[row * NUM_ROW_COL + column]
+                    positions[piece] = square
+                    piece.location = square
+                    zobrist_hash ^= PIECE_KEYS[piece.color][piece.is_king][
+                        square.key >> 1]
+                    if piece.color == "BLACK":
+                        black_count += 1
+                    else:
+                        red_count += 1
+        self.zobrist_hash = zobrist_hash
+        self.black_count = black_count
+        self.red_count = red_count
+        self.stale_pieces = set(positions)
+
+    def place_piece(self, piece, row, column):
+        '''
+        Method -- place_piece
+            Records the BoardSquare object a CheckerPiece object is located
+                on, both in the positions map and on the piece itself.
+        Parameters:
+            self -- the current GameState object
+            piece -- the CheckerPiece object that was placed
+            row -- the row the piece is located in
+            column -- the column the piece is located in
+        Returns:
+            Nothing. Updates the positions of the GameState.
+        '''
+        square = BoardSquare(row, column)
+        self.positions[piece] = square
+        piece.location = square
+
+    def remove_piece(self, row, column):
+        '''
+        Method -- remove_piece
+            Removes the CheckerPiece object on a given square from the
+                game board.
+        Parameters:
+            self -- the current GameState object
+            row -- the row of the square to clear
+            column -- the column of the square to clear
+        Returns:
+            Nothing. Updates the squares and positions of the GameState.
+        '''
+        piece = self.squares[row][column]
+        if piece is not None:
+            self.invalidate_square(BoardSquare(row, column))
+            self.positions.pop(piece, None)
+            self.piece_moves.pop(piece, None)
+            piece.location = None
+            self.zobrist_hash ^= get_piece_key(
+                piece.color, piece.is_king, square_to_index(row, column))
+        self.squares[row][column] = None
+
+    def get_pieces_in_order(self):
+        '''
+        Method -- get_pieces_in_order
+            Gets the current player's CheckerPiece objects from the
+                positions map, sorted by row and then column so they come
+                out in the same order as a scan of the board.
+        Parameters:
+            self -- the current GameState object
+        Returns:
+            A list of CheckerPiece objects belonging to the current player.
+        '''
+        NUM_ROW_COL = 8
+        pieces = [(square.row * NUM_ROW_COL + square.column, piece)
+                  for piece, square in self.positions.items()
+                  if piece.color == self.current_player]
+        pieces.sort(key=lambda item: item[0])
+        return [piece for order, piece in pieces]
+
+    def get_legal_moves(self):
+        '''
+        Method -- get_legal_moves
+            Gets every complete move the current player can make. A capture
+                that can be continued must be, so each multiple jump is
+                followed to its end by a depth-first search that makes and
+                unmakes the hops in place.
+        Parameters:
+            self -- the current GameState object, restored before returning
+        Returns:
+            A list of Move objects. When a multiple jump is under way only
+                its continuations are returned.
+        '''
+        LAST_ROW_BLACK = 7
+        LAST_ROW_RED = 0
+        last_row = LAST_ROW_BLACK if self.current_player == "BLACK" \
+            else LAST_ROW_RED
+        moves = []
+        for piece in self.get_valid_pieces():
+            start = self.positions[piece]
+            capturing_moves, non_capturing_moves = \
+                self.get_piece_moves(piece)
+            if len(capturing_moves) != 0:
+                self.extend_sequence(piece, start, [], [], piece.is_king,
+                                     moves)
+            else:
+                for landing in non_capturing_moves:
+                    moves.append(Move(start, [landing], [], not piece.is_king
+                                      and landing.row == last_row))
+        return moves
+
+    def extend_sequence(self, piece, start, landings, captured, was_king,
+                        moves):
+        '''
+        Method -- extend_sequence
+            Helper method. Makes each capture the piece can make next,
+                follows every continuation and unmakes the capture.
+        Parameters:
+            self -- the current GameState object
+            piece -- the CheckerPiece object making the captures
+            start -- the BoardSquare object the sequence started on
+            landings -- the BoardSquare objects of the earlier landings
+            captured -- the BoardSquare objects of the earlier captures
+            was_king -- whether the piece was a king before the sequence
+            moves -- the list finished Move objects are added to
+        Returns:
+            Nothing.
+        '''
+        for landing in piece.get_capturing_moves(self.squares):
+            undo = self.make_hop(piece, landing)
+            hop_landings = landings + [landing]
+            hop_captured = captured + [undo[3]]
+            if len(piece.get_capturing_moves(self.squares)) != 0:
+                self.extend_sequence(piece, start, hop_landings,
+                                     hop_captured, was_king, moves)
+            else:
+                moves.append(Move(start, hop_landings, hop_captured,
+                                  piece.is_king and not was_king))
+            self.unmake_hop(undo)
+
+    def make_hop(self, piece, end):
+        '''
+        Method -- make_hop
+            Moves a piece one step or one jump, removing the piece jumped
+                over and crowning the moving piece if it reaches the last
+                row. The player to move does not change.
+        Parameters:
+            self -- the current GameState object
+            piece -- the CheckerPiece object to move
+            end -- the BoardSquare object to move it to
+        Returns:
+            A tuple to pass to unmake_hop: (piece, start square, end square,
+                jumped square or None, captured piece or None, is_king,
+                can_move_forward, can_move_back, hash, red count,
+                black count) as they were before the hop.
+        '''
+        start = self.positions[piece]
+        jumped = None
+        captured = None
+        if abs(end.row - start.row) == 2:
+            jumped = piece.get_jumped_square(end, start)
+            captured = self.squares[jumped.row][jumped.column]
+        undo = (piece, start, end, jumped, captured, piece.is_king,
+                piece.can_move_forward, piece.can_move_back,
+                self.zobrist_hash, self.red_count, self.black_count)
+        self.update_squares(end.row, end.column, piece)
+        if captured is not None:
+            if captured.color == "BLACK":
+                self.black_count -= 1
+            else:
+                self.red_count -= 1
+            self.remove_piece(jumped.row, jumped.column)
+        return undo
+
+    def unmake_hop(self, undo):
+        '''
+        Method -- unmake_hop
+            Undoes a hop made by make_hop. Hops must be undone in the
+                reverse of the order they were made.
+        Parameters:
+            self -- the current GameState object
+            undo -- the tuple returned by make_hop
+        Returns:
+            Nothing. Restores the board, the pieces, the counts and the
+                hash.
+        '''
+        (piece, start, end, jumped, captured, is_king, can_move_forward,
+         can_move_back, zobrist_hash, red_count, black_count) = undo
+        self.squares[end.row][end.column] = None
+        self.squares[start.row][start.column] = piece
+        self.place_piece(piece, start.row, start.column)
+        piece.is_king = is_king
+        piece.can_move_forward = can_move_forward
+        piece.can_move_back = can_move_back
+        self.invalidate_square(end)
+        self.invalidate_square(start)
+        if captured is not None:
+            self.squares[jumped.row][jumped.column] = captured
+            self.place_piece(captured, jumped.row, jumped.column)
+            self.invalidate_square(jumped)
+        self.zobrist_hash = zobrist_hash
+        self.red_count = red_count
+        self.black_count = black_count
+
+    def make_move(self, move):
+        '''
+        Method -- make_move
+            Plays a complete move in place, every hop of a multiple jump
+                included, and passes the turn to the other player. Together
+                with unmake_move this lets a search look ahead without
+                copying the GameState.
+        Parameters:
+            self -- the current GameState object
+            move -- a legal Move object, e.g. from get_legal_moves
+        Returns:
+            An undo token to pass to unmake_move.
+        '''
+        piece = self.squares[move.start.row][move.start.column]
+        hops = []
+        for landing in move.landings:
+            hops.append(self.make_hop(piece, landing))
+        undo = (self.current_player, self.jumping_piece, hops)
+        self.jumping_piece = None
+        self.zobrist_hash ^= SIDE_KEY
+        if self.current_player == "BLACK":
+            self.current_player = "RED"
+        else:
+            self.current_player = "BLACK"
+        return undo
+
+    def unmake_move(self, undo):
+        '''
+        Method -- unmake_move
+            Undoes a move made by make_move. Moves must be undone in the
+                reverse of the order they were made.
+        Parameters:
+            self -- the current GameState object
+            undo -- the token returned by make_move
+        Returns:
+            Nothing. Restores the board, the pieces and their king status,
+                the counts, the player to move and the hash.
+        '''
+        current_player, jumping_piece, hops = undo
+        for hop in reversed(hops):
+            self.unmake_hop(hop)
+        self.current_player = current_player
+        self.jumping_piece = jumping_piece
+
+    def get_piece_moves(self, piece):
+        '''
+        Method -- get_piece_moves
+            Gets the moves of a piece on the board from the cache, working
+                them out again first if they may be out of date.
+        Parameters:
+            self -- the current GameState object
+            piece -- a CheckerPiece object on the board
+        Returns:
+            A tuple (capturing moves, non-capturing moves), each a tuple of
+                BoardSquare objects. The capturing moves are the legal
+                moves of the piece whenever there are any.
+        '''
+        if piece in self.stale_pieces:
+            self.refresh_moves()
+        return self.piece_moves[piece]
+
+    def invalidate_square(self, square):
+        '''
+        Method -- invalidate_square
+            Marks the cached moves of every piece whose moves could depend
+                on a square as out of date. Called whenever a square is
+                emptied or filled, or the piece on it is crowned.
+        Parameters:
+            self -- the current GameState object
+            square -- the BoardSquare object that changed
+        Returns:
+            Nothing.
+        '''
+        squares = self.squares
+        stale_pieces = self.stale_pieces
+        for nearby in AFFECTED_SQUARES[square.key]:
+            piece = squares[nearby.row][nearby.column]
+            if piece is not None:
+                stale_pieces.add(piece)
+        self.valid_pieces = {}
+
+    def refresh_moves(self):
+        '''
+        Method -- refresh_moves
+            Works out the moves of every piece marked out of date.
+        Parameters:
+            self -- the current GameState object
+        Returns:
+            Nothing. Updates self.piece_moves.
+        '''
+        for piece in self.stale_pieces:
+            if piece in self.positions:
+                self.piece_moves[piece] = (
+                    tuple(piece.get_capturing_moves(self.squares)),
+                    tuple(piece.get_non_capturing_moves(self.squares)))
+                self.pieces_refreshed += 1
+        self.stale_pieces.clear()
+
+    def clear_move_cache(self):
+        '''
+        Method -- clear_move_cache
+            Forgets every cached move, so the next get_valid_pieces works
+                out the moves of every piece again.
+        Parameters:
+            self -- the current GameState object
+        Returns:
+            Nothing.
+        '''
+        self.piece_moves = {}
+        self.stale_pieces = set(self.positions)
+        self.valid_pieces = {}
+
+    def get_cache_stats(self):
+        '''
+        Method -- get_cache_stats
+            Reports how often get_valid_pieces was answered from the cache.
+        Parameters:
+            self -- the current GameState object
+        Returns:
+            A dict with the hits, misses, hit rate and the number of times
+                a piece's moves were worked out again.
+        '''
+        calls = self.cache_hits + self.cache_misses
+        return {"hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / calls if calls else 0.0,
+                "pieces_refreshed": self.pieces_refreshed}
+
+    def to_bytes(self):
+        '''
+        Method -- to_bytes
+            Packs the position into a few bytes, for snapshots and for
+                sending to other processes. The caches and counters are
+                not kept.
+        Parameters:
+            self -- the current GameState object
+        Returns:
+            A bytes object of STATE_FORMAT.size bytes.
+        '''
+        black = red = kings = 0
+        for piece, square in self.positions.items():
+            bit = 1 << (square.key >> 1)
+            if piece.color == "BLACK":
+                black |= bit
+            else:
+                red |= bit
+            if piece.is_king:
+                kings |= bit
+        flags = RED_TO_MOVE if self.current_player == "RED" else 0
+        if self.jumping_piece is not None:
+            square = self.positions[self.jumping_piece]
+            flags |= square_to_index(square.row, square.column) + 1
+        return STATE_FORMAT.pack(black, red, kings, self.black_count,
+                                 self.red_count, flags)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''
+        Method -- from_bytes
+            Builds a GameState from bytes packed by to_bytes. This makes a
+                CheckerPiece object for every piece, so it is many times
+                slower than unpack_position.
+        Parameters:
+            cls -- the GameState class
+            data -- a bytes-like object
+        Returns:
+            A new GameState object.
+        Raises:
+            ValueError if the data is not a packed position.
+        '''
+        return cls.from_position(*unpack_position(data))
+
+    @classmethod
+    def from_position(cls, board, color, jumping=-1):
+        '''
+        Method -- from_position
+            Builds a GameState from a position unpacked by unpack_position.
+        Parameters:
+            cls -- the GameState class
+            board -- a Bitboard object
+            color -- "BLACK" or "RED", the player to move
+            jumping -- the index of the piece that must continue a
+                multiple jump, or -1
+        Returns:
+            A new GameState object.
+        '''
+        state = cls(board.to_squares())
+        if color == "RED":
+            state.current_player = "RED"
+            state.zobrist_hash ^= SIDE_KEY
+        if jumping >= 0:
+            row, column = index_to_square(jumping)
+            state.jumping_piece = state.squares[row][column]
+        return state
@@ -6,12 +6,12 @@ with the computer.
 '''
 
 # import classes
-import turtle
-from gamestate import GameState
-from checkerpiece import CheckerPiece
+import argparse
+from game import Game
 from boardsquare import BoardSquare
-from computerplayer import ComputerPlayer
+from searchplayer import SearchPlayer
 from sketch import Sketch
+from profiler import Profiler, RULES_TARGETS, DRAWING_METHODS
 
 # set constants
 NUM_SQUARES = 8  # The number of squares on each row.
@@ -19,6 +19,9 @@ SQUARE = 50  # The size of each square in the checkerboard.
 BOARD_SIZE = NUM_SQUARES * SQUARE
 TOP_CORNER = BOARD_SIZE/2
 BOTTOM_CORNER = -BOARD_SIZE/2
+AI_TIME_BUDGET_MS = 500  # The time the computer may think about a move.
+AI_MAX_DEPTH = 32  # The deepest the computer will search.
+SHOW_FRAME_STATS = False  # Prints the draw calls and time of each frame.
 
 # set global variables
 sketch = None
@@ -29,6 +32,8 @@ game_over = False
 move_options = None
 last_checker_selected = None
 last_square = None
+profiler = None
+profile_output = None
 
 
 def click_handler(x, y):
@@ -50,12 +55,13 @@ def click_handler(x, y):
         # get row, column, checkerpiece of mouse click
         column = coordinate_to_index(x)
         row = coordinate_to_index(y)
-        current_piece = game.piece_selected(row, column)
-        valid_pieces = game.get_valid_pieces()
+        state = game.state
+        current_piece = state.piece_selected(row, column)
+        valid_pieces = state.get_valid_pieces()
 
         # if mouse click is on current player's checkerpiece, update board
         if current_piece is not None and current_piece.color == \
-                game.current_player and current_piece in valid_pieces:
+                state.current_player and current_piece in valid_pieces:
             update_board_for_selected_piece(row, column, current_piece)
 
         # if mouse click is on valid empty square, move selected
@@ -63,26 +69,32 @@ def click_handler(x, y):
         else:
             if last_checker_selected is not None:
                 update_board_for_player_move(row, column, current_piece)
+        render_frame()
 
         # after user has moved piece, AI selects piece and makes move
-        while game.current_player == "RED" and game.get_red_count() != 0:
-            ai_selected_piece = AI.select_piece(game)
-            ai_selected_piece_position = \
-                ai_selected_piece.get_location_in_squares(game.squares)
-            update_board_for_selected_piece(
-                ai_selected_piece_position.row,
-                ai_selected_piece_position.column, ai_selected_piece)
-            target_location = AI.make_move(ai_selected_piece, game.squares)
-            update_board_for_player_move(
-                target_location.row, target_location.column, ai_selected_piece)
+        while state.current_player == "RED" and state.get_red_count() != 0 \
+                and not game_over:
+            # the AI chooses a whole move and plays it one hop at a time
+            ai_move = AI.select_move(state)
+            ai_square = ai_move.start
+            for target_location in ai_move.landings:
+                ai_selected_piece = state.piece_selected(
+                    ai_square.row, ai_square.column)
+                update_board_for_selected_piece(
+                    ai_square.row, ai_square.column, ai_selected_piece)
+                update_board_for_player_move(
+                    target_location.row, target_location.column,
+                    ai_selected_piece)
+                ai_square = target_location
+            render_frame()
 
     # updates board if game is over
     if game_over:
-        black_count = game.get_black_count()
-        if black_count == 0:
+        if game.get_winner() == "RED":
             sketch.draw_game_over("You Lose", "Red")
         else:
             sketch.draw_game_over("You Win!", "Green")
+        report_profile()
 
 
 def update_board_for_selected_piece(row, column, selected_piece):
@@ -107,7 +119,7 @@ def update_board_for_selected_piece(row, column, selected_piece):
 
     sketch.unhighlight_squares(valid_squares)
     sketch.unhighlight_squares(move_options)
-    move_options = selected_piece.get_possible_moves(game.squares)
+    move_options = set(selected_piece.get_possible_moves(game.state.squares))
     sketch.highlight_squares("blue", move_options)
     last_checker_selected = selected_piece
     last_square = BoardSquare(row, column)
@@ -142,28 +154,65 @@ def update_board_for_player_move(row, column, selected_piece):
         sketch.unhighlight_squares(move_options)
 
         # update board for capture move
-        if last_checker_selected.can_capture(game.squares):
+        if last_checker_selected.can_capture(game.state.squares):
             jumped_square = last_checker_selected.get_jumped_square(
                 current_square, last_square)
-            sketch.update_board_for_capture(row, column,
-                                            last_checker_selected,
-                                            jumped_square, game)
-            game_over = game.end_capture_move(last_checker_selected,
-                                              jumped_square)
+            game_over = game.apply_hop(last_square, current_square)
+            sketch.update_board_for_capture(row, column, last_square,
+                                            jumped_square,
+                                            last_checker_selected)
 
         # update board for normal move
         else:
-            sketch.update_board_for_move(row, column,
-                                         last_checker_selected, game)
-            game_over = game.end_move()
+            game_over = game.apply_hop(last_square, current_square)
+            sketch.update_board_for_move(row, column, last_square,
+                                         last_checker_selected)
 
         # setup board for next move by highlighting valid squares
-        valid_squares = game.get_valid_squares()
+        valid_squares = game.state.get_valid_squares()
         sketch.highlight_squares("red", valid_squares)
         move_options.clear()
     return
 
 
+def render_frame():
+    '''
+    Function -- render_frame
+        Draws every square changed since the last frame, once, and
+            reports the frame if SHOW_FRAME_STATS is set.
+    Parameters:
+        None
+    Returns:
+        Nothing.
+    '''
+    sketch.render()
+    if SHOW_FRAME_STATS:
+        print(sketch.get_frame_report())
+
+
+def report_profile():
+    '''
+    Function -- report_profile
+        Prints the profile of the game and writes its stacks to the
+            profile output file, if profiling is on. Profiling is then
+            turned off, so the profile is reported once.
+    Parameters:
+        None
+    Returns:
+        Nothing.
+    '''
+    global profiler
+
+    if profiler is None:
+        return
+    profiler.uninstall()
+    print(profiler.get_report())
+    if profile_output is not None:
+        profiler.write_folded(profile_output)
+        print("stacks written to " + profile_output)
+    profiler = None
+
+
 def coordinate_to_index(coordinate):
     '''
         Function -- coordinate_to_index
@@ -185,6 +234,19 @@ def main():
     global AI
     # global last_checker_selected
     global valid_squares
+    global profiler
+    global profile_output
+
+    parser = argparse.ArgumentParser(description="Checkers")
+    parser.add_argument("--profile", action="store_true",
+                        help="count and time the rules and drawing calls")
+    parser.add_argument("--profile-output", default=None,
+                        help="file for the stacks in the folded format")
+    args = parser.parse_args()
+    if args.profile or args.profile_output is not None:
+        profiler = Profiler()
+        profiler.install(RULES_TARGETS + [(Sketch, DRAWING_METHODS)])
+        profile_output = args.profile_output
 
     # draw board
     sketch = Sketch()
@@ -192,16 +254,19 @@ def main():
     sketch.draw_checkerpieces()
 
     # set up game and computer player
-    game = GameState()
-    AI = ComputerPlayer()
+    game = Game()
+    AI = SearchPlayer(depth=AI_MAX_DEPTH, time_budget_ms=AI_TIME_BUDGET_MS)
     # last_checker_selected = None
 
     # highlight valid pieces for initial move
-    valid_squares = game.get_valid_squares()
+    valid_squares = game.state.get_valid_squares()
     sketch.highlight_squares("red", valid_squares)
+    render_frame()
 
     # Start Click handling
     sketch.setup_click_handling(click_handler)
+    # reports a game left unfinished when the window is closed
+    report_profile()
 
 
 if __name__ == "__main__":
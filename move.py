@@ -0,0 +1,101 @@
+class Move:
+    '''
+    Class -- Move
+        Represents one complete turn: a piece moving from its starting
+            square through one or more landing squares, capturing the
+            pieces it jumps over.
+    Attributes:
+        start -- the BoardSquare object the piece starts on
+        landings -- a list of BoardSquare objects the piece lands on, in
+            order. Non-capturing moves have exactly one landing.
+        captured -- a list of BoardSquare objects of the pieces captured,
+            in order. Empty for a non-capturing move.
+        promotes -- boolean, indicating if the piece is crowned a king
+            during the move
+    Methods:
+        is_capture -- Indicates whether the move captures any pieces
+        get_end -- Gets the BoardSquare object the piece finishes on
+        __eq__ -- Checks if two Move objects are equal
+        __str__ -- returns a string representation of Move
+        __repr__ -- returns a string representation of Move
+    '''
+
+    def __init__(self, start, landings, captured=None, promotes=False):
+        '''
+        Constructor -- creates a new instance of Move
+        Parameters:
+            self -- the current Move object
+            start -- the BoardSquare object the piece starts on
+            landings -- a list of BoardSquare objects the piece lands on
+            captured -- a list of BoardSquare objects of captured pieces
+            promotes -- boolean, whether the piece is crowned on the way
+        '''
+        self.start = start
+        self.landings = list(landings)
+        self.captured = list(captured) if captured is not None else []
+        self.promotes = promotes
+
+    def is_capture(self):
+        '''
+        Method -- is_capture
+            Indicates whether the move captures any pieces.
+        Parameters:
+            self -- the current Move object
+        Returns:
+            True if the move captures, False otherwise.
+        '''
+        return len(self.captured) != 0
+
+    def get_end(self):
+        '''
+        Method -- get_end
+            Gets the square the piece finishes the move on.
+        Parameters:
+            self -- the current Move object
+        Returns:
+            The last BoardSquare object in self.landings.
+        '''
+        return self.landings[-1]
+
+    def __eq__(self, other):
+        '''
+        Method -- __eq__
+            Checks if two objects are equal
+        Parameters:
+            self -- The current Move object
+            other -- An object to compare self to.
+        Returns:
+            True if the two objects are equal, False otherwise.
+        '''
+        if type(self) != type(other):
+            return False
+        return (self.start == other.start and
+                self.landings == other.landings and
+                self.captured == other.captured and
+                self.promotes == other.promotes)
+
+    def __str__(self):
+        '''
+        Method -- __str__
+            Returns a string representation of the move.
+        Parameter:
+            self -- The current Move object
+        Returns:
+            A string listing the squares the piece visits.
+        '''
+        squares = [self.start] + self.landings
+        separator = " x " if self.is_capture() else " - "
+        return separator.join(
+            "(" + str(square.row) + ", " + str(square.column) + ")"
+            for square in squares)
+
+    def __repr__(self):
+        '''
+        Method -- __repr__
+            Returns a string representation of the move.
+        Parameter:
+            self -- The current Move object
+        Returns:
+            A string representation of the Move.
+        '''
+        return "Move(" + self.__str__() + ")"
@@ -0,0 +1,358 @@
+'''
+Opening books. A book maps positions, by their Zobrist hash, to the moves
+played from them and a weight for each move. Books are built from
+self-play and can be merged, e.g.
+    python openingbook.py build --games 400 --player search:4 --output a.book
+    python openingbook.py merge a.book b.book --output book.book
+The file is a sorted array searched in place through mmap, so players in
+different processes share one copy of it and opening a book reads
+nothing but its header.
+
+File layout, all little-endian:
+    header: magic b"CKOB", version (uint16), number of entries (uint32)
+    the entries, sorted by key and then move: Zobrist hash of the
+        position (uint64), move (uint32, see encode_move), weight (uint32)
+'''
+
+import argparse
+import heapq
+import mmap
+import os
+import struct
+from bitboard import square_to_index
+
+MAGIC = b"CKOB"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+ENTRY = struct.Struct("<QII")
+MAX_LANDINGS = 4  # Longer multiple jumps are left out of books.
+DEFAULT_PLIES = 8  # Turns of each self-play game recorded in a book.
+DEFAULT_EXPLORE = 0.2  # The chance of a random move while building.
+
+
+def encode_move(start, landings):
+    '''
+    Function -- encode_move
+        Packs a complete move into an int: the start square in bits 0-4,
+            the number of landings in bits 5-7 and 5 bits per landing
+            after that.
+    Parameters:
+        start -- the index of the playable square the piece starts on
+        landings -- a sequence of the indices the piece lands on
+    Returns:
+        An int below 2 ** 32, or None if the move has too many landings.
+    '''
+    if len(landings) > MAX_LANDINGS:
+        return None
+    code = start | len(landings) << 5
+    for number, landing in enumerate(landings):
+        code |= landing << (8 + 5 * number)
+    return code
+
+
+def decode_move(code):
+    '''
+    Function -- decode_move
+        Unpacks a move packed by encode_move.
+    Parameters:
+        code -- an int from encode_move
+    Returns:
+        A tuple (start, landings) where landings is a tuple of indices.
+    '''
+    count = code >> 5 & 7
+    return code & 31, tuple(code >> (8 + 5 * number) & 31
+                            for number in range(count))
+
+
+def encode_game_move(move):
+    '''
+    Function -- encode_game_move
+        Packs a Move object as encode_move does.
+    Parameters:
+        move -- a Move object
+    Returns:
+        An int, or None if the move has too many landings.
+    '''
+    return encode_move(square_to_index(move.start.row, move.start.column),
+                       [square_to_index(square.row, square.column)
+                        for square in move.landings])
+
+
+def write_entries(path, entries):
+    '''
+    Function -- write_entries
+        Writes a book file.
+    Parameters:
+        path -- the path of the file to write
+        entries -- an iterable of (key, move, weight) tuples sorted by key
+            and move, without repeats
+    Returns:
+        The number of entries written.
+    '''
+    count = 0
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, 0))
+        for entry in entries:
+            output.write(ENTRY.pack(*entry))
+            count += 1
+        output.seek(0)
+        output.write(HEADER.pack(MAGIC, VERSION, count))
+    return count
+
+
+def write_book(path, weights):
+    '''
+    Function -- write_book
+        Writes a book from a dict of weights. Moves of weight 0 are left
+            out.
+    Parameters:
+        path -- the path of the file to write
+        weights -- a dict mapping (key, move) tuples to weights
+    Returns:
+        The number of entries written.
+    '''
+    return write_entries(path, ((key, move, weight) for (key, move), weight
+                                in sorted(weights.items()) if weight > 0))
+
+
+def merge_books(paths, output):
+    '''
+    Function -- merge_books
+        Merges books into one, adding up the weights of moves found in
+            more than one. The books are streamed, not loaded, into a
+            temporary file that replaces the output in a single rename
+            once they are closed, so the output can be one of the books.
+    Parameters:
+        paths -- the paths of the books to merge
+        output -- the path of the merged book
+    Returns:
+        The number of entries written.
+    '''
+    books = [OpeningBook(path) for path in paths]
+
+    def merged():
+        last = None
+        total = 0
+        for key, move, weight in heapq.merge(*books):
+            if last != (key, move):
+                if last is not None:
+                    yield last + (total,)
+                last = (key, move)
+                total = 0
+            total += weight
+        if last is not None:
+            yield last + (total,)
+
+    temporary = output + ".merge"
+    try:
+        count = write_entries(temporary, merged())
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    finally:
+        for book in books:
+            book.close()
+    os.replace(temporary, output)
+    return count
+
+
+class OpeningBook:
+    '''
+    Class -- OpeningBook
+        Represents a book file opened for lookups. The file is mapped into
+            memory and searched in place.
+    Attributes:
+        path -- the path of the file
+        count -- int, the number of entries
+        lookups -- int, the number of positions looked up
+        hits -- int, the number of lookups that found a move
+    Methods:
+        __len__ -- Gets the number of entries
+        __iter__ -- yields every entry in order
+        get_entry -- Gets one entry
+        find -- finds the first entry of a position
+        get_moves -- Gets the moves of a position and their weights
+        choose_move -- picks a move of a position by weight
+        close -- closes the file
+        __reduce__ -- lets the book be sent to another process, which maps
+            the same file
+    '''
+
+    def __init__(self, path):
+        '''
+        Constructor -- creates a new instance of OpeningBook
+        Parameters:
+            self -- the current OpeningBook object
+            path -- the path of a file written by write_book
+        Raises:
+            ValueError if the file is not a book.
+        '''
+        self.path = path
+        with open(path, "rb") as book_file:
+            self.data = mmap.mmap(book_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("not an opening book: " + str(path))
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self):
+        '''
+        Method -- __len__
+            Gets the number of entries.
+        Parameters:
+            self -- the current OpeningBook object
+        Returns:
+            The number of entries.
+        '''
+        return self.count
+
+    def __iter__(self):
+        '''
+        Method -- __iter__
+            Yields every entry, sorted by key and move.
+        Parameters:
+            self -- the current OpeningBook object
+        Returns:
+            A generator of (key, move, weight) tuples.
+        '''
+        for index in range(self.count):
+            yield self.get_entry(index)
+
+    def get_entry(self, index):
+        '''
+        Method -- get_entry
+            Gets one entry.
+        Parameters:
+            self -- the current OpeningBook object
+            index -- the position of the entry in the file
+        Returns:
+            A tuple (key, move, weight).
+        '''
+        return ENTRY.unpack_from(self.data, HEADER.size + ENTRY.size * index)
+
+    def find(self, key):
+        '''
+        Method -- find
+            Binary searches for the first entry of a position.
+        Parameters:
+            self -- the current OpeningBook object
+            key -- the Zobrist hash of the position
+        Returns:
+            The index of the first entry whose key is not below key.
+        '''
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_moves(self, key):
+        '''
+        Method -- get_moves
+            Gets the moves the book knows for a position.
+        Parameters:
+            self -- the current OpeningBook object
+            key -- the Zobrist hash of the position
+        Returns:
+            A list of (move, weight) tuples, empty if the position is not
+                in the book.
+        '''
+        self.lookups += 1
+        moves = []
+        index = self.find(key)
+        while index < self.count:
+            entry_key, move, weight = self.get_entry(index)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+            index += 1
+        if moves:
+            self.hits += 1
+        return moves
+
+    def choose_move(self, key, legal_moves, rng=None):
+        '''
+        Method -- choose_move
+            Picks a book move of a position. Moves that are not legal,
+                which can only come from a hash collision, are ignored.
+        Parameters:
+            self -- the current OpeningBook object
+            key -- the Zobrist hash of the position
+            legal_moves -- a dict mapping the encode_move value of every
+                legal move to the move
+            rng -- a random.Random object to pick a move with probability
+                proportional to its weight, or None for the heaviest move
+        Returns:
+            The chosen value from legal_moves, or None if the book has no
+                move for the position.
+        '''
+        moves = [(move, weight) for move, weight in self.get_moves(key)
+                 if move in legal_moves]
+        if len(moves) == 0:
+            return None
+        if rng is None:
+            return legal_moves[max(moves, key=lambda item: item[1])[0]]
+        pick = rng.randint(1, sum(weight for move, weight in moves))
+        for move, weight in moves:
+            pick -= weight
+            if pick <= 0:
+                return legal_moves[move]
+
+    def close(self):
+        '''
+        Method -- close
+            Closes the file.
+        Parameters:
+            self -- the current OpeningBook object
+        Returns:
+            Nothing.
+        '''
+        self.data.close()
+
+    def __reduce__(self):
+        '''
+        Method -- __reduce__
+            Tells pickle to open the same file again rather than copy it.
+        Parameters:
+            self -- the current OpeningBook object
+        Returns:
+            A tuple of the OpeningBook class and its arguments.
+        '''
+        return OpeningBook, (self.path,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build opening books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build")
+    build.add_argument("--games", type=int, default=200)
+    build.add_argument("--player", default="search:4")
+    build.add_argument("--plies", type=int, default=DEFAULT_PLIES)
+    build.add_argument("--explore", type=float, default=DEFAULT_EXPLORE)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--seed", type=int, default=1)
+    build.add_argument("--output", default="opening.book")
+    merge = commands.add_parser("merge")
+    merge.add_argument("books", nargs="+")
+    merge.add_argument("--output", default="opening.book")
+    args = parser.parse_args()
+    if args.command == "build":
+        # selfplay imports the players, which import this module.
+        from selfplay import build_book
+        count = build_book(args.games, args.player, args.output, args.plies,
+                           args.explore, args.workers, args.seed)
+    else:
+        count = merge_books(args.books, args.output)
+    print("wrote %d entries to %s" % (count, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Bitboard
+from searchplayer import SearchPlayer, WIN_SCORE, WIN_THRESHOLD
+from tablebase import Tablebase
+from evaluator import DEFAULT_EVALUATOR
+from zobrist import hash_bitboard
+
+# Each worker process keeps one SearchPlayer, so its transposition table
+# carries over from one root move and one turn to the next.
+worker_player = None
+
+
+def search_root_move(position, color, move, depth, alpha, time_budget_ms,
+                     evaluator=None, tablebase_path=None):
+    '''
+    Function -- search_root_move
+        Runs in a worker process. Searches a single root move.
+    Parameters:
+        position -- a tuple (black, red, kings) of Bitboard masks
+        color -- "BLACK" or "RED", the player to move at the root
+        move -- the root move to search, a tuple (start, landings,
+            captured)
+        depth -- the number of turns to search ahead
+        alpha -- the score the move has to beat to be interesting
+        time_budget_ms -- the time left for the search in milliseconds,
+            or None
+        evaluator -- the evaluator to use, or None for the default
+        tablebase_path -- the path of the tablebase file to probe, or None.
+            The worker maps the file once and keeps it.
+    Returns:
+        A tuple (score, nodes, stopped).
+    '''
+    global worker_player
+    if worker_player is None:
+        worker_player = SearchPlayer(depth)
+    player = worker_player
+    if evaluator is not None:
+        player.evaluator = evaluator
+    if tablebase_path is None:
+        player.tablebase = None
+    elif player.tablebase is None or player.tablebase.path != tablebase_path:
+        player.tablebase = Tablebase(tablebase_path)
+    board = Bitboard(*position)
+    player.nodes = 0
+    player.stopped = False
+    player.deadline = None
+    if time_budget_ms is not None:
+        player.deadline = time.perf_counter() + time_budget_ms / 1000
+    player.start_evaluation(board)
+    score = player.search_move(board, color, move, depth, alpha,
+                               WIN_SCORE + 1, 0, hash_bitboard(board, color))
+    return score, player.nodes, player.stopped
+
+
+class ParallelSearchPlayer(SearchPlayer):
+    '''
+    Class -- ParallelSearchPlayer
+        Represents a computer player that spreads the root moves of its
+            search over a pool of worker processes. The first root move is
+            searched on its own to get a bound, then the others are
+            searched side by side against that bound.
+    Attributes:
+        workers -- int, the number of worker processes
+        pool -- the ProcessPoolExecutor, created on first use
+        The other attributes are inherited from SearchPlayer.
+    Methods:
+        search_root -- searches the root moves in the worker processes
+        run_root_move -- searches one root move and waits for the result
+        get_tablebase_path -- Gets the path of the tablebase file, if any
+        get_time_left -- Gets the time left before the search deadline
+        close -- shuts the worker processes down
+    '''
+
+    def __init__(self, depth=8, workers=2, time_budget_ms=None,
+                 evaluator=DEFAULT_EVALUATOR, tablebase=None, book=None):
+        '''
+        Constructor -- creates a new instance of ParallelSearchPlayer
+        Parameters:
+            self -- the current ParallelSearchPlayer object
+            depth -- the number of turns to search ahead
+            workers -- the number of worker processes
+            time_budget_ms -- the time allowed per search in milliseconds,
+                or None for a fixed-depth search
+            evaluator -- the name of a registered evaluator, or an
+                evaluator object that can be pickled
+            tablebase -- the path of a tablebase file, a Tablebase object,
+                or None. Every worker maps the same file.
+            book -- an OpeningBook object, or None to always search
+        '''
+        # The workers keep their own tables, so this process needs none.
+        super().__init__(depth, 0, time_budget_ms, evaluator, tablebase,
+                         book)
+        self.workers = workers
+        self.pool = None
+
+    def search_root(self, board, color, moves, depth, key):
+        '''
+        Method -- search_root
+            Searches every move from the root position to a given depth in
+                the worker processes.
+        Parameters:
+            self -- the current ParallelSearchPlayer object
+            board -- a Bitboard object
+            color -- "BLACK" or "RED", the player to move
+            moves -- the legal moves, in the order to search them
+            depth -- the number of turns to search ahead
+            key -- the Zobrist hash of the root position, unused here as
+                each worker hashes the position itself
+        Returns:
+            A tuple (best move, score). Only meaningful if self.stopped is
+                still False afterwards.
+        '''
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        position = (board.black, board.red, board.kings)
+        best_move = moves[0]
+        alpha = self.run_root_move(
+            position, color, moves[0], depth, -WIN_SCORE - 1)
+        if self.stopped or alpha > WIN_THRESHOLD:
+            return best_move, alpha
+        futures = []
+        for move in moves[1:]:
+            futures.append((move, self.pool.submit(
+                search_root_move, position, color, move, depth, alpha,
+                self.get_time_left(), self.evaluator,
+                self.get_tablebase_path())))
+        best_score = alpha
+        for move, future in futures:
+            score, nodes, stopped = future.result()
+            self.nodes += nodes
+            self.stopped = self.stopped or stopped
+            if score > best_score:
+                best_score = score
+                best_move = move
+        return best_move, best_score
+
+    def run_root_move(self, position, color, move, depth, alpha):
+        '''
+        Method -- run_root_move
+            Searches one root move in a worker process and waits for it.
+        Parameters:
+            self -- the current ParallelSearchPlayer object
+            position -- a tuple (black, red, kings) of Bitboard masks
+            color -- "BLACK" or "RED", the player to move
+            move -- the root move to search
+            depth -- the number of turns to search ahead
+            alpha -- the score the move has to beat
+        Returns:
+            The score of the move.
+        '''
+        score, nodes, stopped = self.pool.submit(
+            search_root_move, position, color, move, depth, alpha,
+            self.get_time_left(), self.evaluator,
+            self.get_tablebase_path()).result()
+        self.nodes += nodes
+        self.stopped = self.stopped or stopped
+        return score
+
+    def get_tablebase_path(self):
+        '''
+        Method -- get_tablebase_path
+            Gets the path of the tablebase file, which is sent to the
+                workers instead of the mapped file itself.
+        Parameters:
+            self -- the current ParallelSearchPlayer object
+        Returns:
+            The path, or None without a tablebase.
+        '''
+        if self.tablebase is None:
+            return None
+        return self.tablebase.path
+
+    def get_time_left(self):
+        '''
+        Method -- get_time_left
+            Gets the time left before the deadline of the current search.
+        Parameters:
+            self -- the current ParallelSearchPlayer object
+        Returns:
+            The time left in milliseconds, or None without a time budget.
+        '''
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.perf_counter()) * 1000)
+
+    def close(self):
+        '''
+        Method -- close
+            Shuts the worker processes down. The player can still be used
+                afterwards; a new pool is started when needed.
+        Parameters:
+            self -- the current ParallelSearchPlayer object
+        Returns:
+            Nothing.
+        '''
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,428 @@
+'''
+Portable Draughts Notation. Squares are numbered 1 to 32 in the standard
+way: black starts on 1 to 12 and moves first, red (white in PDN) starts on
+21 to 32. Square n is playable square index n - 1 of Bitboard, so row 0,
+column 1 is square 1 and row 7, column 6 is square 32. Moves are written
+"9-13" and captures with every landing, "9x18x27". Positions use the FEN
+tag format, e.g. "B:W21,22,K30:B1,2,K9", where B or W first names the
+player to move. Results are "1-0" when black wins, "0-1" when red wins,
+"1/2-1/2" for a draw and "*" for an unfinished game.
+
+Whole files convert to and from the binary format of gamerecord.py with
+    python pdn.py to-records games.pdn games.rec --workers 4
+    python pdn.py to-pdn games.rec games.pdn
+Games are streamed and handed to worker processes in batches.
+'''
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Bitboard, square_to_index, index_to_square
+from gamestate import GameState
+from gamerecord import GameRecord, GameRecordWriter, read_records
+
+RESULT_TOKENS = {("BLACK", True): "1-0", ("RED", True): "0-1",
+                 (None, True): "1/2-1/2", (None, False): "*"}
+WINNER_TOKENS = {"1-0": "BLACK", "2-0": "BLACK", "0-1": "RED",
+                 "0-2": "RED"}
+DRAW_TOKENS = ("1/2-1/2", "1-1")
+END_TOKENS = ("1-0", "0-1", "2-0", "0-2", "1/2-1/2", "1-1", "*")
+START_FEN = "B:W21,22,23,24,25,26,27,28,29,30,31,32:B1,2,3,4,5,6,7,8,9,10," \
+    "11,12"
+LINE_LENGTH = 79
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+MOVE = re.compile(r"^(\d+)(?:([-x])(\d+))+")
+DEFAULT_BATCH_SIZE = 256
+
+
+def square_to_number(row, column):
+    '''
+    Function -- square_to_number
+        Converts a playable square to its standard number.
+    Parameters:
+        row -- the row of the square
+        column -- the column of the square
+    Returns:
+        An int from 1 to 32.
+    '''
+    return square_to_index(row, column) + 1
+
+
+def number_to_square(number):
+    '''
+    Function -- number_to_square
+        Converts a standard square number to a row and column.
+    Parameters:
+        number -- an int from 1 to 32
+    Returns:
+        A tuple (row, column).
+    Raises:
+        ValueError if the number is not a square.
+    '''
+    if not 1 <= number <= 32:
+        raise ValueError("no square numbered " + str(number))
+    return index_to_square(number - 1)
+
+
+def to_fen(state):
+    '''
+    Function -- to_fen
+        Describes a position in FEN.
+    Parameters:
+        state -- a GameState object
+    Returns:
+        A string such as "B:W21,22:B1,K2".
+    '''
+    board = Bitboard.from_squares(state.squares)
+    fields = ["B" if state.current_player == "BLACK" else "W"]
+    for prefix, pieces in (("W", board.red), ("B", board.black)):
+        fields.append(prefix + ",".join(
+            ("K" if board.kings >> index & 1 else "") + str(index + 1)
+            for index in range(32) if pieces >> index & 1))
+    return ":".join(fields)
+
+
+def from_fen(text):
+    '''
+    Function -- from_fen
+        Sets up a position described in FEN. Ranges such as "1-12" are
+            accepted in the lists of squares.
+    Parameters:
+        text -- a FEN string, with or without its surrounding quotes
+    Returns:
+        A GameState object.
+    Raises:
+        ValueError if the text is not a valid FEN position.
+    '''
+    fields = text.strip().strip('"').rstrip(".").split(":")
+    if fields[0].upper() not in ("B", "W"):
+        raise ValueError("bad FEN: " + text)
+    board = Bitboard()
+    for field in fields[1:]:
+        field = field.strip()
+        if field == "":
+            continue
+        color = field[0].upper()
+        if color not in ("B", "W"):
+            raise ValueError("bad FEN: " + text)
+        for item in field[1:].split(","):
+            item = item.strip()
+            if item == "":
+                continue
+            king = item[0].upper() == "K"
+            if king:
+                item = item[1:]
+            first, separator, last = item.partition("-")
+            if not first.isdigit() or (separator and not last.isdigit()):
+                raise ValueError("bad FEN: " + text)
+            for number in range(int(first), int(last or first) + 1):
+                number_to_square(number)
+                bit = 1 << (number - 1)
+                if color == "B":
+                    board.black |= bit
+                else:
+                    board.red |= bit
+                if king:
+                    board.kings |= bit
+    if board.black & board.red:
+        raise ValueError("bad FEN: " + text)
+    state = GameState()
+    state.current_player = "BLACK" if fields[0].upper() == "B" else "RED"
+    state.load_squares(board.to_squares())
+    return state
+
+
+def format_move(start, landings):
+    '''
+    Function -- format_move
+        Writes a move in standard notation.
+    Parameters:
+        start -- the index of the playable square the piece starts on
+        landings -- a sequence of the indices it lands on
+    Returns:
+        A string such as "9-13" or "9x18x27".
+    '''
+    separator = "x" if abs((landings[0] >> 2) - (start >> 2)) == 2 else "-"
+    return separator.join(str(index + 1) for index in (start,) + landings)
+
+
+def parse_move(text, moves):
+    '''
+    Function -- parse_move
+        Finds the legal move a move in standard notation stands for.
+            Captures may give every landing or only the first and last
+            squares.
+    Parameters:
+        text -- a move such as "9-13", "9x27" or "9x18x27"
+        moves -- a list of the legal Move objects
+    Returns:
+        The matching Move object.
+    Raises:
+        ValueError if no legal move, or more than one, matches.
+    '''
+    numbers = [int(number) for number in re.split("[-x]", text)]
+    capture = "x" in text
+    matches = []
+    for move in moves:
+        squares = [square_to_number(square.row, square.column)
+                   for square in [move.start] + move.landings]
+        if move.is_capture() != capture or squares[0] != numbers[0] or \
+                squares[-1] != numbers[-1]:
+            continue
+        if len(numbers) > 2 and squares != numbers:
+            continue
+        matches.append(move)
+    if len(matches) != 1:
+        raise ValueError(("ambiguous" if matches else "illegal") +
+                         " move: " + text)
+    return matches[0]
+
+
+def format_game(record):
+    '''
+    Function -- format_game
+        Writes a game record in PDN.
+    Parameters:
+        record -- a GameRecord object
+    Returns:
+        The PDN text of the game, ending with a blank line.
+    '''
+    result = RESULT_TOKENS[(record.winner, record.finished)]
+    lines = ['[Black "%s"]' % record.black.replace('"', '\\"'),
+             '[White "%s"]' % record.red.replace('"', '\\"'),
+             '[Result "%s"]' % result,
+             '[Seed "%d"]' % record.seed,
+             ""]
+    tokens = []
+    for number, (start, landings) in enumerate(record.moves):
+        if number % 2 == 0:
+            tokens.append("%d." % (number // 2 + 1))
+        tokens.append(format_move(start, landings))
+    tokens.append(result)
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = line + " " + token if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n\n"
+
+
+def parse_game(text):
+    '''
+    Function -- parse_game
+        Reads one game in PDN and replays it to check every move.
+            Comments, variations, move numbers and annotations such as "!"
+            are skipped.
+    Parameters:
+        text -- the PDN text of one game
+    Returns:
+        A GameRecord object.
+    Raises:
+        ValueError if a move is illegal or the game does not start from
+            the standard position.
+    '''
+    tags = {name: value.replace('\\"', '"')
+            for name, value in TAG.findall(text)}
+    fen = tags.get("FEN")
+    if fen is not None and to_fen(from_fen(fen)) != START_FEN:
+        raise ValueError("games from set-up positions are not supported")
+    movetext = TAG.sub(" ", text)
+    movetext = re.sub(r"\{[^}]*\}", " ", movetext)
+    movetext = re.sub(r";[^\n]*", " ", movetext)
+    while "(" in movetext:
+        stripped = re.sub(r"\([^()]*\)", " ", movetext)
+        if stripped == movetext:
+            raise ValueError("unbalanced variation")
+        movetext = stripped
+    state = GameState()
+    moves = []
+    result = tags.get("Result")
+    for token in movetext.split():
+        if token in END_TOKENS:
+            result = token
+            break
+        match = MOVE.match(token.split(".")[-1])
+        if match is None:
+            continue
+        move = parse_move(match.group(0), state.get_legal_moves())
+        moves.append((square_to_index(move.start.row, move.start.column),
+                      tuple(square_to_index(square.row, square.column)
+                            for square in move.landings)))
+        state.make_move(move)
+    seed = tags.get("Seed", "0")
+    return GameRecord(moves, WINNER_TOKENS.get(result),
+                      tags.get("Black", ""), tags.get("White", ""),
+                      int(seed) if seed.isdigit() else 0,
+                      result in DRAW_TOKENS)
+
+
+def iterate_games(lines):
+    '''
+    Function -- iterate_games
+        Splits PDN text into games. A game ends where the tags of the next
+            one start.
+    Parameters:
+        lines -- an iterable of lines, such as an open file
+    Returns:
+        A generator of the PDN text of each game.
+    '''
+    game = []
+    in_movetext = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("[") and in_movetext:
+            yield "".join(game)
+            game = []
+            in_movetext = False
+        elif stripped and not stripped.startswith("["):
+            in_movetext = True
+        game.append(line)
+    if in_movetext or any(line.strip() for line in game):
+        yield "".join(game)
+
+
+def parse_games(texts):
+    '''
+    Function -- parse_games
+        Parses a batch of games. Runs in a worker process.
+    Parameters:
+        texts -- a list of the PDN text of each game
+    Returns:
+        A list holding a GameRecord object for each game, or the error
+            message for games that could not be read.
+    '''
+    records = []
+    for text in texts:
+        try:
+            records.append(parse_game(text))
+        except ValueError as error:
+            records.append(str(error))
+    return records
+
+
+def format_games(records):
+    '''
+    Function -- format_games
+        Writes a batch of games in PDN. Runs in a worker process.
+    Parameters:
+        records -- a list of GameRecord objects
+    Returns:
+        A list of the PDN text of each game.
+    '''
+    return [format_game(record) for record in records]
+
+
+def map_batches(function, items, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Function -- map_batches
+        Applies a function to batches of items in a process pool, keeping
+            only a few batches in flight so that the items are streamed.
+    Parameters:
+        function -- a function taking a list of items and returning a list
+            of results
+        items -- an iterable of items
+        workers -- the number of worker processes, None for one per CPU or
+            1 to work in this process
+        batch_size -- the number of items per batch
+    Returns:
+        A generator of the results, in the order of the items.
+    '''
+    def batches():
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    if workers == 1:
+        for batch in batches():
+            yield from function(batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = []
+        limit = 2 * (workers or os.cpu_count() or 1)
+        for batch in batches():
+            in_flight.append(pool.submit(function, batch))
+            if len(in_flight) >= limit:
+                yield from in_flight.pop(0).result()
+        for future in in_flight:
+            yield from future.result()
+
+
+def convert_to_records(pdn_path, records_path, workers=None,
+                       batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Function -- convert_to_records
+        Converts a PDN file to a game record file.
+    Parameters:
+        pdn_path -- the path of the PDN file
+        records_path -- the path of the game record file to write
+        workers -- the number of worker processes, see map_batches
+        batch_size -- the number of games per batch
+    Returns:
+        A tuple (games converted, list of error messages of the games
+            skipped).
+    '''
+    errors = []
+    with open(pdn_path) as pdn_file, \
+            GameRecordWriter(records_path) as writer:
+        for record in map_batches(parse_games, iterate_games(pdn_file),
+                                  workers, batch_size):
+            if isinstance(record, str):
+                errors.append(record)
+            else:
+                writer.write(record)
+    return writer.count, errors
+
+
+def convert_to_pdn(records_path, pdn_path, workers=None,
+                   batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Function -- convert_to_pdn
+        Converts a game record file to a PDN file.
+    Parameters:
+        records_path -- the path of the game record file
+        pdn_path -- the path of the PDN file to write
+        workers -- the number of worker processes, see map_batches
+        batch_size -- the number of games per batch
+    Returns:
+        The number of games converted.
+    '''
+    count = 0
+    with open(pdn_path, "w") as pdn_file:
+        for text in map_batches(format_games, read_records(records_path),
+                                workers, batch_size):
+            pdn_file.write(text)
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert between PDN and game record files")
+    parser.add_argument("direction", choices=["to-records", "to-pdn"])
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    if args.direction == "to-records":
+        count, errors = convert_to_records(args.source, args.destination,
+                                           args.workers, args.batch_size)
+        for error in errors:
+            print("skipped: " + error)
+    else:
+        count = convert_to_pdn(args.source, args.destination, args.workers,
+                               args.batch_size)
+    print("converted %d games" % count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+'''
+Perft ("performance test") counts the positions reachable in a given
+number of turns. The counts check the move generators against each
+other and against known values, and the time taken measures their speed.
+    python perft.py --depth 7
+    python perft.py --depth 4 --position promotion --objects
+'''
+
+import argparse
+import copy
+import random
+import time
+from gamestate import GameState
+from bitboard import Bitboard, square_to_index
+
+# Tricky positions, as (black pieces, red pieces, kings, player to move)
+# where pieces are (row, column) tuples.
+POSITIONS = {
+    "start": None,
+    # The piece on (0, 1) must take three pieces, turning left or right
+    # after the first jump.
+    "multijump": ([(0, 1), (0, 5), (1, 6)],
+                  [(1, 2), (3, 2), (3, 4), (5, 4), (5, 2), (6, 7)],
+                  [], "BLACK"),
+    # The red man can jump onto the king row twice. One way it is crowned
+    # on (0, 5) and keeps jumping backwards as a king.
+    "promotion": ([(1, 2), (1, 4), (1, 6), (3, 4), (4, 7)],
+                  [(2, 3), (6, 1), (7, 6)],
+                  [], "RED"),
+    # Three pieces can capture, so every other move is ruled out, and the
+    # king on (4, 3) can capture forwards or backwards.
+    "forced": ([(0, 7), (2, 5), (4, 3), (5, 6)],
+               [(3, 2), (3, 6), (5, 2), (6, 5), (6, 7)],
+               [(4, 3), (6, 5)], "BLACK"),
+}
+
+# Leaf counts for depths 1, 2, 3, ... worked out with the CheckerPiece
+# rules. The start position matches the published counts for checkers.
+KNOWN_COUNTS = {
+    "start": [7, 49, 302, 1469, 7361, 36768, 179740, 845931],
+    "multijump": [2, 10, 46, 199, 923, 4095],
+    "promotion": [2, 12, 72, 390, 2014, 9859],
+    "forced": [4, 10, 22, 82, 455, 2523],
+}
+
+SAMPLE_SEED = 5001  # The seed of the default sample positions.
+
+
+def get_position(name):
+    '''
+    Function -- get_position
+        Builds one of the named positions.
+    Parameters:
+        name -- a key of POSITIONS
+    Returns:
+        A tuple (Bitboard, player to move).
+    '''
+    if POSITIONS[name] is None:
+        return Bitboard.from_squares(GameState().squares), "BLACK"
+    black, red, kings, color = POSITIONS[name]
+    board = Bitboard()
+    for row, column in black:
+        board.black |= 1 << square_to_index(row, column)
+    for row, column in red:
+        board.red |= 1 << square_to_index(row, column)
+    for row, column in kings:
+        board.kings |= 1 << square_to_index(row, column)
+    return board, color
+
+
+def get_gamestate(board, color):
+    '''
+    Function -- get_gamestate
+        Builds a GameState holding the same position as a Bitboard.
+    Parameters:
+        board -- a Bitboard object
+        color -- the player to move
+    Returns:
+        A GameState object.
+    '''
+    game = GameState()
+    game.current_player = color
+    game.load_squares(board.to_squares())
+    return game
+
+
+def get_sample_positions(count, seed=SAMPLE_SEED):
+    '''
+    Function -- get_sample_positions
+        Plays random single moves from the starting position to build a
+            reproducible set of positions to test and benchmark on.
+    Parameters:
+        count -- the number of positions to return
+        seed -- the seed for the random move choices
+    Returns:
+        A list of (Bitboard, color) tuples.
+    '''
+    MAX_PLIES = 60
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Bitboard.from_squares(GameState().squares)
+        color = "BLACK"
+        for ply in range(rng.randint(0, MAX_PLIES)):
+            moves = board.get_moves(color)
+            if len(moves) == 0:
+                break
+            board.move_piece(*moves[rng.randint(0, len(moves) - 1)])
+            color = "RED" if color == "BLACK" else "BLACK"
+        positions.append((board, color))
+    return positions
+
+
+def perft(board, color, depth, jumping=-1):
+    '''
+    Function -- perft
+        Counts the positions reachable in depth turns using the Bitboard
+            move generator, making and unmaking moves in place. Every hop
+            of a multiple jump belongs to the same turn, so each distinct
+            jump sequence is one move.
+    Parameters:
+        board -- a Bitboard object, restored before returning
+        color -- "BLACK" or "RED", the player to move
+        depth -- the number of turns to play
+        jumping -- index of a piece that must continue a multiple jump,
+            or -1
+    Returns:
+        The number of leaf positions.
+    '''
+    if depth == 0:
+        return 1
+    if jumping >= 0:
+        moves = board.get_jumps(color, 1 << jumping)
+    else:
+        moves = board.get_moves(color)
+    opponent = "RED" if color == "BLACK" else "BLACK"
+    nodes = 0
+    for start, jumped, end in moves:
+        undo = (board.black, board.red, board.kings)
+        board.move_piece(start, jumped, end)
+        if jumped >= 0 and board.get_jumps(color, 1 << end):
+            nodes += perft(board, color, depth, end)
+        else:
+            nodes += perft(board, opponent, depth - 1)
+        board.black, board.red, board.kings = undo
+    return nodes
+
+
+def perft_gamestate(game, depth):
+    '''
+    Function -- perft_gamestate
+        Counts the positions reachable in depth turns using GameState and
+            CheckerPiece objects, copying the game for every move. This is
+            the reference the faster generators are checked against.
+    Parameters:
+        game -- a GameState object, left unchanged
+        depth -- the number of turns to play
+    Returns:
+        The number of leaf positions.
+    '''
+    if depth == 0:
+        return 1
+    nodes = 0
+    for piece in game.get_valid_pieces():
+        start = game.positions[piece]
+        for move in piece.get_possible_moves(game.squares):
+            child = copy.deepcopy(game)
+            child_piece = child.squares[start.row][start.column]
+            capture = piece.can_capture(game.squares)
+            child.update_squares(move.row, move.column, child_piece)
+            if capture:
+                child.end_capture_move(
+                    child_piece, piece.get_jumped_square(move, start))
+            else:
+                child.end_move()
+            if child.jumping_piece is not None:
+                nodes += perft_gamestate(child, depth)
+            else:
+                nodes += perft_gamestate(child, depth - 1)
+    return nodes
+
+
+def run_perft(name, depth, use_objects=False):
+    '''
+    Function -- run_perft
+        Runs perft on a named position at every depth up to a limit and
+            reports the counts and speed.
+    Parameters:
+        name -- a key of POSITIONS
+        depth -- the deepest depth to count
+        use_objects -- True to use the GameState generator instead of
+            the Bitboard one
+    Returns:
+        A list of (depth, nodes, seconds, nodes per second) tuples.
+    '''
+    board, color = get_position(name)
+    results = []
+    for current in range(1, depth + 1):
+        start = time.perf_counter()
+        if use_objects:
+            nodes = perft_gamestate(get_gamestate(board, color), current)
+        else:
+            nodes = perft(board, color, current)
+        elapsed = time.perf_counter() - start
+        results.append((current, nodes, elapsed,
+                        nodes / elapsed if elapsed > 0 else 0.0))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkers perft")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--position", choices=sorted(POSITIONS),
+                        default="start")
+    parser.add_argument("--objects", action="store_true",
+                        help="use the GameState generator")
+    args = parser.parse_args()
+    known = KNOWN_COUNTS.get(args.position, [])
+    for depth, nodes, seconds, rate in run_perft(
+            args.position, args.depth, args.objects):
+        check = ""
+        if depth <= len(known):
+            check = "ok" if known[depth - 1] == nodes else \
+                "expected %d" % known[depth - 1]
+        print("depth %2d  nodes %10d  %8.3f s  %10.0f nodes/s  %s" %
+              (depth, nodes, seconds, rate, check))
+
+
+if __name__ == "__main__":
+    main()
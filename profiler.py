@@ -0,0 +1,228 @@
+'''
+Opt-in call counters and timers for the rules engine and the drawing code,
+e.g. for a game in the graphics window
+    python main.py --profile --profile-output game.folded
+Nothing is measured until Profiler.install wraps the chosen methods, and
+Profiler.uninstall puts the original methods back, so while profiling is off
+the methods run exactly as written. The report lists the calls, total time
+and self time of every method, and the stacks are written in the folded
+format ("outer;inner microseconds" per line) read by flamegraph.pl and
+speedscope.
+'''
+
+import functools
+import time
+from gamestate import GameState
+from checkerpiece import CheckerPiece
+
+RULES_TARGETS = [
+    (GameState, ["get_valid_pieces", "get_valid_squares", "get_legal_moves",
+                 "piece_selected", "end_move", "end_capture_move"]),
+    (CheckerPiece, ["can_capture", "get_possible_moves",
+                    "get_location_in_squares", "get_capturing_moves",
+                    "get_non_capturing_moves"])]
+DRAWING_METHODS = ["highlight_squares", "unhighlight_squares",
+                   "update_board_for_move", "update_board_for_capture",
+                   "render", "redraw_board", "draw_square_contents",
+                   "draw_outline", "draw_game_over"]
+MICROSECONDS = 1000000
+
+
+class Profiler:
+    '''
+    Class -- Profiler
+        Represents a set of counters and timers for methods. Each call is
+            timed in full (total time) and without the timed methods it
+            calls (self time), and the self time is also kept for each
+            stack of timed methods.
+    Attributes:
+        installed -- a list of (class, name, original) for every method
+            wrapped
+        stats -- a dict mapping "Class.method" to a list of the calls, the
+            total seconds and the self seconds
+        stacks -- a dict mapping tuples of "Class.method" names, outermost
+            first, to the self seconds spent in that stack
+        stack -- a list of the names of the timed methods running
+        child_seconds -- a list with the seconds spent in timed methods
+            called by each running timed method
+    Methods:
+        install -- wraps methods so their calls are timed
+        uninstall -- puts the original methods back
+        wrap -- helper method, returns a timed version of a method
+        reset -- clears the counters and timers
+        get_stats -- returns the calls and times of every method
+        get_report -- returns a table of the calls and times
+        get_folded -- returns the stacks in the folded format
+        write_folded -- writes the stacks to a file
+    '''
+
+    def __init__(self):
+        '''
+        Constructor -- creates a new instance of Profiler
+        Parameters:
+            self -- the current Profiler object
+        '''
+        self.installed = []
+        self.stats = {}
+        self.stacks = {}
+        self.stack = []
+        self.child_seconds = []
+
+    def install(self, targets=RULES_TARGETS):
+        '''
+        Method -- install
+            Replaces methods with versions that count and time their calls.
+        Parameters:
+            self -- the current Profiler object
+            targets -- a list of (class, list of method names)
+        Returns:
+            Nothing.
+        Raises:
+            AttributeError if a class has no method with a given name.
+        '''
+        for cls, names in targets:
+            for name in names:
+                original = cls.__dict__.get(name)
+                method = getattr(cls, name)
+                label = cls.__name__ + "." + name
+                setattr(cls, name, self.wrap(label, method))
+                self.installed.append((cls, name, original))
+
+    def uninstall(self):
+        '''
+        Method -- uninstall
+            Puts back the methods replaced by install. The counters and
+                timers are kept.
+        Parameters:
+            self -- the current Profiler object
+        Returns:
+            Nothing.
+        '''
+        for cls, name, original in reversed(self.installed):
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        self.installed = []
+
+    def wrap(self, label, method):
+        '''
+        Method -- wrap
+            Helper method. Returns a version of a method that counts and
+                times its calls.
+        Parameters:
+            self -- the current Profiler object
+            label -- the name the calls are counted under
+            method -- the function to time
+        Returns:
+            The timed function.
+        '''
+        stats = self.stats.setdefault(label, [0, 0.0, 0.0])
+        stacks = self.stacks
+        stack = self.stack
+        child_seconds = self.child_seconds
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            # A recursive call's time is already in the outer call's total.
+            outermost = label not in stack
+            stack.append(label)
+            child_seconds.append(0.0)
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = clock() - start
+                own_seconds = seconds - child_seconds.pop()
+                path = tuple(stack)
+                stack.pop()
+                if len(child_seconds) != 0:
+                    child_seconds[-1] += seconds
+                stats[0] += 1
+                if outermost:
+                    stats[1] += seconds
+                stats[2] += own_seconds
+                stacks[path] = stacks.get(path, 0.0) + own_seconds
+        return timed
+
+    def reset(self):
+        '''
+        Method -- reset
+            Clears the counters and timers.
+        Parameters:
+            self -- the current Profiler object
+        Returns:
+            Nothing.
+        '''
+        for stats in self.stats.values():
+            stats[:] = [0, 0.0, 0.0]
+        self.stacks.clear()
+
+    def get_stats(self):
+        '''
+        Method -- get_stats
+            Reports the calls and times of every method called at least
+                once.
+        Parameters:
+            self -- the current Profiler object
+        Returns:
+            A dict mapping "Class.method" to a dict with the calls, the
+                total seconds and the self seconds.
+        '''
+        return {label: {"calls": calls, "seconds": seconds,
+                        "self_seconds": self_seconds}
+                for label, (calls, seconds, self_seconds)
+                in self.stats.items() if calls != 0}
+
+    def get_report(self):
+        '''
+        Method -- get_report
+            Describes the calls and times of every method called, the
+                slowest in total first.
+        Parameters:
+            self -- the current Profiler object
+        Returns:
+            A string with a line for each method.
+        '''
+        stats = self.get_stats()
+        width = max([len(label) for label in stats] + [len("method")])
+        lines = ["%-*s %9s %11s %11s %9s" % (
+            width, "method", "calls", "total ms", "self ms", "us/call")]
+        for label in sorted(stats, key=lambda label:
+                            -stats[label]["seconds"]):
+            calls = stats[label]["calls"]
+            seconds = stats[label]["seconds"]
+            lines.append("%-*s %9d %11.2f %11.2f %9.2f" % (
+                width, label, calls, seconds * 1000,
+                stats[label]["self_seconds"] * 1000,
+                seconds * MICROSECONDS / calls))
+        return "\n".join(lines)
+
+    def get_folded(self):
+        '''
+        Method -- get_folded
+            Lists the self time of every stack of timed methods, as read by
+                flamegraph.pl and speedscope.
+        Parameters:
+            self -- the current Profiler object
+        Returns:
+            A list of "outer;inner microseconds" strings, sorted.
+        '''
+        return sorted("%s %d" % (";".join(path),
+                                 round(seconds * MICROSECONDS))
+                      for path, seconds in self.stacks.items())
+
+    def write_folded(self, path):
+        '''
+        Method -- write_folded
+            Writes the stacks of timed methods to a file, one per line.
+        Parameters:
+            self -- the current Profiler object
+            path -- the path of the file
+        Returns:
+            Nothing.
+        '''
+        with open(path, "w") as output:
+            for line in self.get_folded():
+                output.write(line + "\n")
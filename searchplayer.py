@@ -0,0 +1,529 @@
+import time
+from bitboard import Bitboard, square_to_index, index_to_square, \
+    BLACK_KING_ROW, RED_KING_ROW
+from boardsquare import BoardSquare
+from move import Move
+from zobrist import PIECE_KEYS, SIDE_KEY, hash_bitboard
+from transpositiontable import TranspositionTable, EXACT, LOWER_BOUND, \
+    UPPER_BOUND
+from evaluator import make_evaluator, MAN_VALUE, KING_VALUE, \
+    DEFAULT_EVALUATOR
+from tablebase import Tablebase, WIN, LOSS
+from openingbook import encode_move
+
+WIN_SCORE = 100000
+# Scores this close to WIN_SCORE are wins or losses a number of turns away.
+WIN_THRESHOLD = WIN_SCORE - 1000
+
+
+def count_bits(mask):
+    '''
+    Function -- count_bits
+        Counts the set bits in a mask.
+    Parameters:
+        mask -- a non-negative int
+    Returns:
+        The number of set bits.
+    '''
+    return bin(mask).count("1")
+
+
+def evaluate(board, color):
+    '''
+    Function -- evaluate
+        Scores a position by material, from the point of view of the
+            player about to move.
+    Parameters:
+        board -- a Bitboard object
+        color -- "BLACK" or "RED", the player to move
+    Returns:
+        An int, positive if the position favours the player to move.
+    '''
+    kings = board.kings
+    score = (MAN_VALUE * (count_bits(board.black & ~kings) -
+                          count_bits(board.red & ~kings)) +
+             KING_VALUE * (count_bits(board.black & kings) -
+                           count_bits(board.red & kings)))
+    return score if color == "BLACK" else -score
+
+
+def score_to_table(score, ply):
+    '''
+    Function -- score_to_table
+        Converts a win or loss score from "turns from the root" to "turns
+            from this position" so it can be reused at any ply.
+    Parameters:
+        score -- the score found by the search
+        ply -- the number of turns played since the root
+    Returns:
+        The score to store in the transposition table.
+    '''
+    if score > WIN_THRESHOLD:
+        return score + ply
+    if score < -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    '''
+    Function -- score_from_table
+        Undoes score_to_table for a position found at a given ply.
+    Parameters:
+        score -- the score stored in the transposition table
+        ply -- the number of turns played since the root
+    Returns:
+        The score relative to the root.
+    '''
+    if score > WIN_THRESHOLD:
+        return score - ply
+    if score < -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class SearchPlayer:
+    '''
+    Class -- SearchPlayer
+        Represents a computer player that picks its moves with a negamax
+            search with alpha-beta pruning over a Bitboard copy of the game.
+    Attributes:
+        depth -- int, the number of turns to search ahead, or the deepest
+            iteration to try when searching against a time budget
+        time_budget_ms -- int, the wall-clock time allowed per search in
+            milliseconds, or None to always search to self.depth
+        table -- the TranspositionTable object shared by every search, or
+            None to search without one
+        nodes -- int, the number of positions visited by the last search
+        completed_depth -- int, the deepest iteration the last search
+            finished, 0 if the move was forced
+        elapsed -- float, the duration of the last search in seconds
+        stopped -- boolean, whether the last search ran out of time
+        planned_move -- tuple (start, landings, captured) of the move chosen
+            by the last search, or None
+        evaluator -- the evaluator scoring the positions at the end of the
+            search, see evaluator.py
+        evaluation -- int, the score of the position being searched from
+            black's point of view, kept up to date move by move when the
+            evaluator has piece values
+        piece_values -- the piece values of the evaluator of the current
+            search, or None if it must score every position from scratch
+        tablebase -- the Tablebase object giving the exact result of
+            positions with few pieces, or None
+        book -- the OpeningBook object consulted before searching, or None
+    Methods:
+        select_move -- searches the position and selects a complete move
+        select_piece -- searches the position and selects the piece to move
+        make_move -- indicates the BoardSquare object to move the
+            selected piece to
+        get_best_move -- searches a Bitboard position for the best move
+            by iterative deepening
+        search_root -- searches every root move to a given depth
+        get_search_stats -- reports the depth, nodes and speed of the
+            last search
+        start_evaluation -- scores the root position for the incremental
+            evaluation
+        search_move -- makes a move, searches it and unmakes it
+        search -- the recursive negamax search
+        order_moves -- sorts moves so the most promising are searched first
+    '''
+
+    def __init__(self, depth=8, table_size=1 << 16, time_budget_ms=None,
+                 evaluator=DEFAULT_EVALUATOR, tablebase=None, book=None):
+        '''
+        Constructor -- creates a new instance of SearchPlayer
+        Parameters:
+            self -- the current SearchPlayer object
+            depth -- the number of turns to search ahead
+            table_size -- the number of transposition table buckets, or 0
+                to search without a transposition table
+            time_budget_ms -- the time allowed per search in milliseconds,
+                or None for a fixed-depth search
+            evaluator -- the name of a registered evaluator, or an
+                evaluator object
+            tablebase -- the path of a tablebase file, a Tablebase object,
+                or None to search endgames like any other position
+            book -- an OpeningBook object, or None to always search
+        '''
+        self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.table = TranspositionTable(table_size) if table_size else None
+        self.nodes = 0
+        self.completed_depth = 0
+        self.elapsed = 0.0
+        self.stopped = False
+        self.deadline = None
+        self.planned_move = None
+        if isinstance(evaluator, str):
+            evaluator = make_evaluator(evaluator)
+        self.evaluator = evaluator
+        self.evaluation = 0
+        self.piece_values = None
+        if isinstance(tablebase, str):
+            tablebase = Tablebase(tablebase)
+        self.tablebase = tablebase
+        self.book = book
+
+    def select_move(self, gamestate):
+        '''
+        Method -- select_move
+            Searches the current position and returns the complete move,
+                including every hop of a multiple jump, that the
+                SearchPlayer will make.
+        Parameters:
+            self -- the current SearchPlayer object
+            gamestate -- an object representing the current state of the game
+        Returns:
+            A Move object, or None if no move is possible.
+        '''
+        board = Bitboard.from_squares(gamestate.squares)
+        color = gamestate.current_player
+        jumping = -1
+        if gamestate.jumping_piece is not None:
+            location = gamestate.positions[gamestate.jumping_piece]
+            jumping = square_to_index(location.row, location.column)
+        self.planned_move = self.get_best_move(board, color, jumping)
+        if self.planned_move is None:
+            return None
+        start, landings, captured = self.planned_move
+        king_row = BLACK_KING_ROW if color == "BLACK" else RED_KING_ROW
+        promotes = not board.kings >> start & 1 and \
+            any(king_row >> landing & 1 for landing in landings)
+        return Move(BoardSquare(*index_to_square(start)),
+                    [BoardSquare(*index_to_square(index))
+                     for index in landings],
+                    [BoardSquare(*index_to_square(index))
+                     for index in captured],
+                    promotes)
+
+    def select_piece(self, gamestate):
+        '''
+        Method -- select_piece
+            This function searches the current position and returns the
+                checkerpiece object that the SearchPlayer will move.
+        Parameters:
+            self -- the current SearchPlayer object
+            gamestate -- an object representing the current state of the game
+        Returns:
+            A checkerpiece object selected by the SearchPlayer to move, or
+                None if no move is possible.
+        '''
+        move = self.select_move(gamestate)
+        if move is None:
+            return None
+        return gamestate.piece_selected(move.start.row, move.start.column)
+
+    def make_move(self, checkerpiece, squares):
+        '''
+        Method -- make_move
+            Returns the BoardSquare object the selected CheckerPiece object
+                should move to, as chosen by the last search.
+        Parameters:
+            self -- the current SearchPlayer object
+            checkerpiece -- A CheckerPiece object that has been selected
+                by the SearchPlayer.
+            squares -- A list of lists representing the state of the game
+                board and where each object is place on the board
+        Returns:
+            A BoardSquare object indicating the location to where
+                the selected CheckerPiece object should move. For a
+                multiple jump this is the first landing.
+        '''
+        location = checkerpiece.get_location_in_squares(squares)
+        start = square_to_index(location.row, location.column)
+        if self.planned_move is not None and self.planned_move[0] == start:
+            row, column = index_to_square(self.planned_move[1][0])
+            return BoardSquare(row, column)
+        # The piece was not chosen by a search, so take its first move.
+        return checkerpiece.get_possible_moves(squares)[0]
+
+    def get_best_move(self, board, color, jumping=-1):
+        '''
+        Method -- get_best_move
+            Searches a position one turn deeper at a time, up to self.depth
+                turns or until the time budget runs out, and returns the
+                best move of the deepest iteration that finished. Each
+                iteration searches the previous best move first. Positions
+                in the opening book are not searched; the heaviest book
+                move is played instead.
+        Parameters:
+            self -- the current SearchPlayer object
+            board -- a Bitboard object, left unchanged by the search
+            color -- "BLACK" or "RED", the player to move
+            jumping -- index of a piece that must continue a multiple
+                jump, or -1
+        Returns:
+            A tuple (start, landings, captured) as returned by
+                Bitboard.get_sequences, or None if there are no moves.
+        '''
+        start_time = time.perf_counter()
+        self.nodes = 0
+        self.completed_depth = 0
+        self.stopped = False
+        self.deadline = None
+        if self.time_budget_ms is not None:
+            self.deadline = start_time + self.time_budget_ms / 1000
+        moves = board.get_sequences(color, jumping)
+        best_move = None
+        if len(moves) == 1:
+            best_move = moves[0]
+        elif len(moves) > 1 and self.book is not None and jumping < 0:
+            best_move = self.book.choose_move(
+                hash_bitboard(board, color),
+                {encode_move(move[0], move[1]): move for move in moves})
+        if best_move is None and len(moves) > 1:
+            key = hash_bitboard(board, color)
+            self.start_evaluation(board)
+            moves = self.order_moves(board, color, moves)
+            best_move = moves[0]
+            for depth in range(1, self.depth + 1):
+                move, score = self.search_root(board, color, moves, depth, key)
+                if self.stopped:
+                    break
+                best_move = move
+                self.completed_depth = depth
+                moves.remove(move)
+                moves.insert(0, move)
+                # There is nothing left to gain once a win or loss is found.
+                if abs(score) > WIN_THRESHOLD:
+                    break
+        self.elapsed = time.perf_counter() - start_time
+        return best_move
+
+    def search_root(self, board, color, moves, depth, key):
+        '''
+        Method -- search_root
+            Searches every move from the root position to a given depth.
+        Parameters:
+            self -- the current SearchPlayer object
+            board -- a Bitboard object
+            color -- "BLACK" or "RED", the player to move
+            moves -- the legal moves, in the order to search them
+            depth -- the number of turns to search ahead
+            key -- the Zobrist hash of the root position
+        Returns:
+            A tuple (best move, score). Only meaningful if self.stopped is
+                still False afterwards.
+        '''
+        best_move = moves[0]
+        alpha = -WIN_SCORE - 1
+        beta = WIN_SCORE + 1
+        for move in moves:
+            score = self.search_move(
+                board, color, move, depth, alpha, beta, 0, key)
+            if self.stopped:
+                break
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return best_move, alpha
+
+    def get_search_stats(self):
+        '''
+        Method -- get_search_stats
+            Reports how the last search went.
+        Parameters:
+            self -- the current SearchPlayer object
+        Returns:
+            A dict with the completed depth, nodes searched, time taken in
+                seconds and nodes per second.
+        '''
+        nodes_per_second = 0.0
+        if self.elapsed > 0:
+            nodes_per_second = self.nodes / self.elapsed
+        return {"depth": self.completed_depth,
+                "nodes": self.nodes,
+                "seconds": self.elapsed,
+                "nodes_per_second": nodes_per_second}
+
+    def start_evaluation(self, board):
+        '''
+        Method -- start_evaluation
+            Scores the root position of a search, which search_move then
+                updates as it makes and unmakes moves.
+        Parameters:
+            self -- the current SearchPlayer object
+            board -- a Bitboard object
+        Returns:
+            Nothing. Sets self.evaluation and self.piece_values.
+        '''
+        self.evaluation = 0
+        self.piece_values = getattr(self.evaluator, "piece_values", None)
+        if self.piece_values is not None:
+            self.evaluation = self.evaluator.evaluate(board, "BLACK")
+
+    def search_move(self, board, color, move, depth, alpha, beta, ply, key):
+        '''
+        Method -- search_move
+            Makes a complete move in place, updating the hash and the
+                evaluation incrementally, scores the resulting position
+                and then unmakes the move.
+        Parameters:
+            self -- the current SearchPlayer object
+            board -- a Bitboard object
+            color -- the player making the move
+            move -- a tuple (start, landings, captured)
+            depth -- the remaining search depth in turns
+            alpha -- the lower bound of the search window
+            beta -- the upper bound of the search window
+            ply -- the number of turns played since the root
+            key -- the Zobrist hash of the position before the move
+        Returns:
+            The score of the move from the point of view of color.
+        '''
+        start, landings, captured = move
+        opponent = "RED" if color == "BLACK" else "BLACK"
+        undo = (board.black, board.red, board.kings)
+        evaluation = self.evaluation
+        men, kings = PIECE_KEYS[color]
+        was_king = undo[2] >> start & 1
+        key ^= (kings if was_king else men)[start]
+        if captured:
+            captured_men, captured_kings = PIECE_KEYS[opponent]
+            for jumped in captured:
+                key ^= (captured_kings if undo[2] >> jumped & 1
+                        else captured_men)[jumped]
+            origin = start
+            for jumped, end in zip(captured, landings):
+                board.move_piece(origin, jumped, end)
+                origin = end
+        else:
+            end = landings[0]
+            board.move_piece(start, -1, end)
+        is_king = board.kings >> end & 1
+        key ^= (kings if is_king else men)[end]
+        values = self.piece_values
+        if values is not None:
+            value_men, value_kings = values[color]
+            change = (value_kings if is_king else value_men)[end] - \
+                (value_kings if was_king else value_men)[start]
+            if captured:
+                opponent_men, opponent_kings = values[opponent]
+                for jumped in captured:
+                    change -= (opponent_kings if undo[2] >> jumped & 1
+                               else opponent_men)[jumped]
+            self.evaluation = evaluation + change
+        score = -self.search(board, opponent, depth - 1, -beta, -alpha,
+                             ply + 1, key ^ SIDE_KEY)
+        board.black, board.red, board.kings = undo
+        self.evaluation = evaluation
+        return score
+
+    def search(self, board, color, depth, alpha, beta, ply, key):
+        '''
+        Method -- search
+            Negamax search with alpha-beta pruning and a transposition table.
+        Parameters:
+            self -- the current SearchPlayer object
+            board -- a Bitboard object, restored before returning
+            color -- "BLACK" or "RED", the player to move
+            depth -- the remaining search depth in turns
+            alpha -- the lower bound of the search window
+            beta -- the upper bound of the search window
+            ply -- the number of turns played since the root
+            key -- the Zobrist hash of the position
+        Returns:
+            The score of the position from the point of view of color.
+        '''
+        self.nodes += 1
+        # Checking the clock on every node would slow the search down.
+        if self.deadline is not None and not self.nodes & 255 and \
+                time.perf_counter() >= self.deadline:
+            self.stopped = True
+        if self.stopped:
+            return 0
+        tablebase = self.tablebase
+        if tablebase is not None and \
+                count_bits(board.black | board.red) <= tablebase.max_pieces:
+            found = tablebase.probe(board, color)
+            if found is not None:
+                result, distance = found
+                if result == WIN:
+                    return WIN_SCORE - ply - distance
+                if result == LOSS:
+                    return -WIN_SCORE + ply + distance
+                return 0
+        moves = board.get_sequences(color)
+        if len(moves) == 0:
+            # A player who cannot move has lost. Losing later is better.
+            return -WIN_SCORE + ply
+        # Captures are forced, so searching on while one is pending keeps
+        # the evaluation from being taken in the middle of an exchange.
+        if depth <= 0 and not moves[0][2]:
+            if self.piece_values is not None:
+                return self.evaluation if color == "BLACK" \
+                    else -self.evaluation
+            return self.evaluator.evaluate(board, color)
+        table = self.table
+        table_move = None
+        if table is not None:
+            entry = table.probe(key)
+            if entry is not None:
+                entry_depth, score, flag, table_move = entry
+                if entry_depth >= depth:
+                    score = score_from_table(score, ply)
+                    if flag == EXACT or \
+                            (flag == LOWER_BOUND and score >= beta) or \
+                            (flag == UPPER_BOUND and score <= alpha):
+                        return score
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        best_move = None
+        for move in self.order_moves(board, color, moves, table_move):
+            score = self.search_move(
+                board, color, move, depth, alpha, beta, ply, key)
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if table is not None:
+            if best_score >= beta:
+                flag = LOWER_BOUND
+            elif best_score <= original_alpha:
+                flag = UPPER_BOUND
+            else:
+                flag = EXACT
+            table.store(key, max(depth, 0), score_to_table(best_score, ply),
+                        flag, best_move)
+        return best_score
+
+    def order_moves(self, board, color, moves, first_move=None):
+        '''
+        Method -- order_moves
+            Sorts moves so that the move suggested by the transposition
+                table, then the captures taking the most material and then
+                promotions are searched before quieter moves.
+        Parameters:
+            self -- the current SearchPlayer object
+            board -- a Bitboard object
+            color -- the player making the moves
+            moves -- a list of (start, landings, captured) tuples
+            first_move -- a move to search first, or None
+        Returns:
+            A new list holding the same moves, best candidates first.
+        '''
+        if len(moves) < 2:
+            return moves
+        kings = board.kings
+        king_row = BLACK_KING_ROW if color == "BLACK" else RED_KING_ROW
+        scored = []
+        for move in moves:
+            start, landings, captured = move
+            order = 0
+            if not kings >> start & 1:
+                for end in landings:
+                    if king_row >> end & 1:
+                        order += 1
+                        break
+            for jumped in captured:
+                order += 2 if kings >> jumped & 1 else 1
+            if move == first_move:
+                order += 100
+            scored.append((-order, move))
+        scored.sort()
+        return [move for order, move in scored]
@@ -0,0 +1,302 @@
+'''
+Plays many games between two computer players to compare them, e.g.
+    python selfplay.py --games 200 --player-a search:6 --player-b search:4
+Results are written to a JSON lines file as each game finishes, and the
+games themselves can be archived with --records, see gamerecord.py. Self-play
+games also build opening books, see build_book and openingbook.py.
+'''
+
+import argparse
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game import Game
+from computerplayer import ComputerPlayer
+from searchplayer import SearchPlayer
+from gamerecord import GameRecord, GameRecordWriter
+from openingbook import encode_game_move, write_book, DEFAULT_PLIES, \
+    DEFAULT_EXPLORE
+
+DEFAULT_MAX_TURNS = 150  # Games still going after this many turns are draws.
+DEFAULT_OPENING_TURNS = 4  # Random turns played to vary the openings.
+
+
+def make_player(spec, seed=None):
+    '''
+    Function -- make_player
+        Builds a computer player from a short description.
+    Parameters:
+        spec -- "random", "search:<depth>" or "timed:<milliseconds>"
+        seed -- a seed for any random choices the player makes
+    Returns:
+        An object with a select_move method.
+    Raises:
+        ValueError if the description is not recognised.
+    '''
+    kind, separator, value = spec.partition(":")
+    if kind == "random":
+        return ComputerPlayer(seed)
+    if kind == "search":
+        return SearchPlayer(depth=int(value) if value else 8)
+    if kind == "timed":
+        return SearchPlayer(depth=64, time_budget_ms=int(value))
+    raise ValueError("unknown player: " + spec)
+
+
+def play_opening(game, turns, rng):
+    '''
+    Function -- play_opening
+        Plays random complete moves at the start of a game, so that games
+            between players that always choose the same move still differ.
+    Parameters:
+        game -- a Game object
+        turns -- the number of random turns to play
+        rng -- a random.Random object
+    Returns:
+        Nothing.
+    '''
+    for turn in range(turns):
+        moves = game.get_legal_moves()
+        if game.is_over() or len(moves) == 0:
+            return
+        game.apply_move(moves[rng.randint(0, len(moves) - 1)])
+
+
+def play_game(index, config):
+    '''
+    Function -- play_game
+        Plays one game. Runs in a worker process.
+    Parameters:
+        index -- the number of the game. Player A has black in even
+            games and red in odd games, and each pair of games starts
+            from the same opening.
+        config -- a dict with the keys "player_a", "player_b", "seed",
+            "max_turns" and "opening_turns"
+    Returns:
+        A dict describing the game: its index, the players of each color,
+            the winner ("BLACK", "RED" or None for a draw), the score for
+            player A, the number of turns, the seed and the moves as
+            (start, landings) tuples of square indices.
+    '''
+    seed = config["seed"] * 1000003 + index // 2
+    rng = random.Random(seed)
+    a_is_black = index % 2 == 0
+    a = make_player(config["player_a"], rng.getrandbits(32))
+    b = make_player(config["player_b"], rng.getrandbits(32))
+    players = {"BLACK": a if a_is_black else b,
+               "RED": b if a_is_black else a}
+    game = Game()
+    play_opening(game, config["opening_turns"], rng)
+    state = game.state
+    turns = len(game.history)
+    while not game.is_over() and turns < config["max_turns"]:
+        player = players[state.current_player]
+        game.apply_move(player.select_move(state))
+        turns = len(game.history)
+    winner = game.get_winner()
+    if winner is None:
+        score = 0.5
+    else:
+        score = 1.0 if (winner == "BLACK") == a_is_black else 0.0
+    return {"game": index,
+            "black": config["player_a"] if a_is_black else config["player_b"],
+            "red": config["player_b"] if a_is_black else config["player_a"],
+            "winner": winner,
+            "score_a": score,
+            "turns": turns,
+            "seed": seed,
+            "moves": GameRecord.from_game(game).moves}
+
+
+def elo_difference(wins, losses, draws):
+    '''
+    Function -- elo_difference
+        Estimates how much stronger player A is than player B in Elo
+            points, with a 95% confidence interval.
+    Parameters:
+        wins -- the number of games won by player A
+        losses -- the number of games lost by player A
+        draws -- the number of drawn games
+    Returns:
+        A tuple (elo, low, high). Values are infinite when one player
+            scored every point.
+    '''
+    CONFIDENCE_Z = 1.96
+    games = wins + losses + draws
+    if games == 0:
+        return 0.0, -math.inf, math.inf
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + losses * score ** 2 +
+                draws * (0.5 - score) ** 2) / games
+    margin = CONFIDENCE_Z * math.sqrt(variance / games)
+    return (score_to_elo(score), score_to_elo(score - margin),
+            score_to_elo(score + margin))
+
+
+def score_to_elo(score):
+    '''
+    Function -- score_to_elo
+        Converts an expected score to an Elo difference.
+    Parameters:
+        score -- the fraction of points scored, from 0 to 1
+    Returns:
+        The Elo difference, infinite at 0 or 1.
+    '''
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def run_match(games, player_a, player_b, output, workers=None, seed=1,
+              max_turns=DEFAULT_MAX_TURNS,
+              opening_turns=DEFAULT_OPENING_TURNS, records=None):
+    '''
+    Function -- run_match
+        Plays a match in a process pool and appends every game to a JSON
+            lines file as soon as it finishes.
+    Parameters:
+        games -- the number of games to play
+        player_a -- the description of player A, see make_player
+        player_b -- the description of player B
+        output -- the path of the results file
+        workers -- the number of worker processes, or None for one per CPU
+        seed -- the seed of the match; the same seed replays the same games
+        max_turns -- games reaching this many turns are drawn
+        opening_turns -- random turns played at the start of each game
+        records -- the path of a game record file to append every game
+            to, or None
+    Returns:
+        A dict summarising the match: games played, wins, losses and draws
+            for player A, games per second and the Elo estimate with its
+            confidence interval.
+    '''
+    config = {"player_a": player_a, "player_b": player_b, "seed": seed,
+              "max_turns": max_turns, "opening_turns": opening_turns}
+    wins = losses = draws = 0
+    start = time.perf_counter()
+    archive = GameRecordWriter(records, append=True) if records else None
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(output, "a") as results:
+        futures = [pool.submit(play_game, index, config)
+                   for index in range(games)]
+        for future in as_completed(futures):
+            result = future.result()
+            moves = result.pop("moves")
+            if archive is not None:
+                # Games still going after max_turns are draws.
+                archive.write(GameRecord(moves, result["winner"],
+                                         result["black"], result["red"],
+                                         result["seed"], finished=True))
+            results.write(json.dumps(result) + "\n")
+            results.flush()
+            if result["score_a"] == 1.0:
+                wins += 1
+            elif result["score_a"] == 0.0:
+                losses += 1
+            else:
+                draws += 1
+    if archive is not None:
+        archive.close()
+    elapsed = time.perf_counter() - start
+    elo, low, high = elo_difference(wins, losses, draws)
+    return {"games": games, "wins": wins, "losses": losses, "draws": draws,
+            "games_per_second": games / elapsed if elapsed > 0 else 0.0,
+            "elo": elo, "elo_low": low, "elo_high": high}
+
+
+def play_book_game(index, config):
+    '''
+    Function -- play_book_game
+        Plays one self-play game and scores its opening moves. Runs in a
+            worker process.
+    Parameters:
+        index -- the number of the game
+        config -- a dict with the keys "player", "seed", "plies",
+            "explore" and "max_turns"
+    Returns:
+        A list of (key, move, points) tuples for the first moves of the
+            game: 2 points for moves of the winner, 1 for a draw and 0 for
+            moves of the loser.
+    '''
+    rng = random.Random(config["seed"] * 1000003 + index)
+    player = make_player(config["player"], rng.getrandbits(32))
+    game = Game()
+    state = game.state
+    played = []
+    while not game.is_over() and len(game.history) < config["max_turns"]:
+        if len(game.history) < config["plies"] and \
+                rng.random() < config["explore"]:
+            moves = game.get_legal_moves()
+            move = moves[rng.randint(0, len(moves) - 1)]
+        else:
+            move = player.select_move(state)
+        if len(game.history) < config["plies"]:
+            played.append((state.zobrist_hash, encode_game_move(move),
+                           state.current_player))
+        game.apply_move(move)
+    winner = game.get_winner()
+    return [(key, move, 1 if winner is None else 2 if color == winner else 0)
+            for key, move, color in played if move is not None]
+
+
+def build_book(games, player, output, plies=DEFAULT_PLIES,
+               explore=DEFAULT_EXPLORE, workers=None, seed=1,
+               max_turns=DEFAULT_MAX_TURNS):
+    '''
+    Function -- build_book
+        Builds a book from self-play games in a process pool. Both sides
+            are played by the same player, with some random moves in the
+            opening so that the games differ; every move of the opening is
+            weighted by how its side did.
+    Parameters:
+        games -- the number of games to play
+        player -- the description of the player, see make_player
+        output -- the path of the book to write
+        plies -- the number of turns of each game to record
+        explore -- the chance of a random move in the recorded turns
+        workers -- the number of worker processes, or None for one per CPU
+        seed -- the seed of the games
+        max_turns -- games reaching this many turns are drawn
+    Returns:
+        The number of entries written.
+    '''
+    config = {"player": player, "seed": seed, "plies": plies,
+              "explore": explore, "max_turns": max_turns}
+    weights = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for played in pool.map(play_book_game, range(games),
+                               [config] * games):
+            for key, move, points in played:
+                weights[key, move] = weights.get((key, move), 0) + points
+    return write_book(output, weights)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkers self-play")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--player-a", default="search:4")
+    parser.add_argument("--player-b", default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument("--opening-turns", type=int,
+                        default=DEFAULT_OPENING_TURNS)
+    parser.add_argument("--output", default="selfplay_results.jsonl")
+    parser.add_argument("--records", default=None)
+    args = parser.parse_args()
+    summary = run_match(args.games, args.player_a, args.player_b,
+                        args.output, args.workers, args.seed,
+                        args.max_turns, args.opening_turns, args.records)
+    print("%s vs %s: +%d -%d =%d, %.2f games/s" % (
+        args.player_a, args.player_b, summary["wins"], summary["losses"],
+        summary["draws"], summary["games_per_second"]))
+    print("Elo difference %.0f (95%% interval %.0f to %.0f)" % (
+        summary["elo"], summary["elo_low"], summary["elo_high"]))
+
+
+if __name__ == "__main__":
+    main()
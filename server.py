@@ -0,0 +1,675 @@
+'''
+A game server for many concurrent games between people and the computer,
+e.g.
+    python server.py serve --port 8765 --player search:6 --workers 4
+Every connection is a session with its own headless Game. Messages are JSON
+objects, one per line. After every turn the server sends the position:
+    {"type": "state", "session": 1, "token": "5f0c...",
+     "position": "B:W21,...:B1,...", "moves": ["9-13", "9-14", ...],
+     "reply": "22-18", "winner": null, "over": false}
+where position is in FEN, moves are the legal moves in standard notation
+and reply is the computer's last move (see pdn.py). The client answers
+with the move it chooses,
+    {"type": "move", "move": "9-13"}
+The client plays black, which moves first, and the computer plays red.
+The computer's moves are chosen in a pool of worker processes, so the
+event loop never waits on a search. A message that cannot be played gets
+    {"type": "error", "message": "..."}
+and the session carries on.
+
+With --snapshots FILE the position of every unfinished game is saved to
+an append-only snapshot file (see snapshotstore.py) after each turn. After
+a restart a client gets its game back by sending, before its first move,
+the session number and the secret token of its game,
+    {"type": "resume", "session": 7, "token": "5f0c..."}
+
+    python server.py loadtest --sessions 100 1000 10000
+starts a local server and plays that many simulated clients at once,
+reporting the 50th and 99th percentile time from sending a move to
+receiving the position after the computer's reply.
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import secrets
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import square_to_index
+from game import Game
+from gamestate import GameState, unpack_position
+from pdn import to_fen, format_move, parse_move
+from selfplay import make_player
+from snapshotstore import SnapshotStore, restore_sessions, \
+    compact_snapshots, DEFAULT_MAX_DELAY, TOKEN_SIZE
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_PLAYER = "search:4"
+DEFAULT_LOAD_TEST_PLAYER = "search:2"
+DEFAULT_LOAD_TEST_MOVES = 5
+BACKLOG = 4096  # Connections waiting to be accepted, for bursts of clients.
+
+# Each worker process keeps one player per description, so a search
+# player's transposition table carries over from one request to the next.
+worker_players = {}
+
+
+def select_reply(position, spec):
+    '''
+    Function -- select_reply
+        Runs in a worker process. Chooses the computer's move.
+    Parameters:
+        position -- the position packed by GameState.to_bytes, with the
+            computer to move
+        spec -- the description of the computer player, see
+            selfplay.make_player
+    Returns:
+        A tuple (start, landings) of playable square indices, or None if
+            there is no move.
+    '''
+    if spec not in worker_players:
+        worker_players[spec] = make_player(spec)
+    player = worker_players[spec]
+    # Searching players work on a Bitboard, so the position is only
+    # unpacked into a GameState for players that need one.
+    if hasattr(player, "get_best_move"):
+        move = player.get_best_move(*unpack_position(position))
+        return None if move is None else move[:2]
+    move = player.select_move(GameState.from_bytes(position))
+    if move is None:
+        return None
+    return (square_to_index(move.start.row, move.start.column),
+            tuple(square_to_index(square.row, square.column)
+                  for square in move.landings))
+
+
+def get_move_text(move):
+    '''
+    Function -- get_move_text
+        Writes a Move object in standard notation.
+    Parameters:
+        move -- a Move object
+    Returns:
+        A string such as "9-13" or "9x18x27".
+    '''
+    return format_move(square_to_index(move.start.row, move.start.column),
+                       tuple(square_to_index(square.row, square.column)
+                             for square in move.landings))
+
+
+def percentile(values, fraction):
+    '''
+    Function -- percentile
+        Finds a percentile of some values by the nearest rank.
+    Parameters:
+        values -- a list of numbers, not empty
+        fraction -- the percentile as a fraction, e.g. 0.99
+    Returns:
+        The smallest value that at least that fraction of the values are
+            less than or equal to.
+    '''
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Session:
+    '''
+    Class -- Session
+        Represents one client's game against the computer.
+    Attributes:
+        number -- int, the number of the session
+        game -- the headless Game object
+        reply -- the computer's last move in standard notation, or None
+        saved -- boolean, whether a snapshot of the game has been stored
+        token -- bytes, the random secret needed to resume the game
+    Methods:
+        get_message -- describes the position for the client
+        play -- plays the client's move
+        play_reply -- plays the computer's move
+    '''
+
+    def __init__(self, number, state=None):
+        '''
+        Constructor -- creates a new instance of Session
+        Parameters:
+            self -- the current Session object
+            number -- the number of the session
+            state -- a GameState object to continue from, or None to start
+                a new game
+        '''
+        self.number = number
+        self.game = Game(state)
+        self.reply = None
+        self.saved = False
+        self.token = secrets.token_bytes(TOKEN_SIZE)
+
+    def get_message(self):
+        '''
+        Method -- get_message
+            Describes the position for the client.
+        Parameters:
+            self -- the current Session object
+        Returns:
+            A "state" message, a dict.
+        '''
+        return {"type": "state", "session": self.number,
+                "token": self.token.hex(),
+                "position": to_fen(self.game.state),
+                "moves": [get_move_text(move)
+                          for move in self.game.get_legal_moves()],
+                "reply": self.reply, "winner": self.game.get_winner(),
+                "over": self.game.is_over()}
+
+    def play(self, text):
+        '''
+        Method -- play
+            Plays the client's move.
+        Parameters:
+            self -- the current Session object
+            text -- the move in standard notation
+        Returns:
+            True if the game is over after the move, False otherwise.
+        Raises:
+            ValueError if the move is not legal.
+        '''
+        if not isinstance(text, str):
+            raise ValueError("the move must be a string")
+        if self.game.state.current_player != "BLACK":
+            raise ValueError("it is not your turn")
+        return self.game.apply_move(
+            parse_move(text, self.game.get_legal_moves()))
+
+    def play_reply(self, start, landings):
+        '''
+        Method -- play_reply
+            Plays the computer's move.
+        Parameters:
+            self -- the current Session object
+            start -- the index of the square the piece starts on
+            landings -- a tuple of the indices of the squares it lands on
+        Returns:
+            True if the game is over after the move, False otherwise.
+        '''
+        self.reply = format_move(start, landings)
+        return self.game.apply_move(
+            parse_move(self.reply, self.game.get_legal_moves()))
+
+
+class GameServer:
+    '''
+    Class -- GameServer
+        Represents a server that runs a session for every client that
+            connects, with the computer's moves chosen in a process pool.
+    Attributes:
+        player -- the description of the computer player, see
+            selfplay.make_player
+        workers -- int, the number of worker processes
+        pool -- the ProcessPoolExecutor choosing the computer's moves
+        sessions -- a dict mapping session numbers to the Session objects
+            of the clients connected
+        connections -- a dict mapping session numbers to the asyncio
+            StreamWriter and Task of the clients connected
+        started -- int, the number of sessions started
+        replies -- int, the number of moves the computer has played
+        store -- the SnapshotStore the games are saved to, or None
+        flusher -- the asyncio Task writing the buffered snapshots every
+            store.max_delay seconds, or None
+        saved -- a dict mapping session numbers to the (token, position
+            from unpack_position) of saved games that no client is playing
+        server -- the asyncio Server, once started
+    Methods:
+        start -- starts accepting clients
+        close -- stops accepting clients and shuts the pool down
+        flush_snapshots -- writes the buffered snapshots regularly
+        handle_client -- runs the session of one client
+        resume -- replaces a client's new game with a saved one
+        save -- saves the game of a session
+        send -- sends a message to a client
+        choose_reply -- chooses and plays the computer's move
+    '''
+
+    def __init__(self, player=DEFAULT_PLAYER, workers=None, snapshots=None,
+                 snapshot_delay=DEFAULT_MAX_DELAY):
+        '''
+        Constructor -- creates a new instance of GameServer
+        Parameters:
+            self -- the current GameServer object
+            player -- the description of the computer player
+            workers -- the number of worker processes, or None for one per
+                processor
+            snapshots -- the path of the snapshot file to restore games
+                from and save them to, or None to keep no snapshots
+            snapshot_delay -- the most seconds a snapshot waits before it
+                is written to the file
+        '''
+        make_player(player)
+        self.player = player
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.pool = ProcessPoolExecutor(self.workers)
+        self.sessions = {}
+        self.connections = {}
+        self.started = 0
+        self.replies = 0
+        self.store = None
+        self.saved = {}
+        if snapshots is not None:
+            compact_snapshots(snapshots)
+            # Only the games that are resumed get a GameState.
+            self.saved = restore_sessions(snapshots)
+            self.started = max(self.saved, default=0)
+            self.store = SnapshotStore(snapshots, max_delay=snapshot_delay)
+        self.flusher = None
+        self.server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        '''
+        Method -- start
+            Starts the worker processes, then starts accepting clients.
+                The workers are started first so that a burst of clients
+                cannot use up the file descriptors they need.
+        Parameters:
+            self -- the current GameServer object
+            host -- the address to listen on
+            port -- the port to listen on, or 0 for any free port
+        Returns:
+            The port the server listens on.
+        '''
+        loop = asyncio.get_running_loop()
+        position = GameState().to_bytes()
+        await asyncio.gather(*[
+            loop.run_in_executor(self.pool, select_reply, position,
+                                 self.player)
+            for worker in range(self.workers)])
+        self.server = await asyncio.start_server(
+            self.handle_client, host, port, backlog=BACKLOG)
+        if self.store is not None:
+            self.flusher = asyncio.create_task(self.flush_snapshots())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def flush_snapshots(self):
+        '''
+        Method -- flush_snapshots
+            Writes the buffered snapshots every store.max_delay seconds.
+                The store only checks the age of its batch when a snapshot
+                is added, so without this the last snapshots before a quiet
+                spell would wait until the server closes.
+        Parameters:
+            self -- the current GameServer object
+        Returns:
+            Nothing. Runs until it is cancelled.
+        '''
+        while True:
+            await asyncio.sleep(self.store.max_delay)
+            self.store.flush()
+
+    async def close(self):
+        '''
+        Method -- close
+            Stops accepting clients, disconnects the clients still
+                connected, waits for their sessions to end and shuts the
+                worker processes down.
+        Parameters:
+            self -- the current GameServer object
+        Returns:
+            Nothing.
+        '''
+        if self.server is not None:
+            self.server.close()
+        for writer, task in list(self.connections.values()):
+            writer.close()
+        # Sessions end by themselves once their connection is closed, at
+        # worst after a move being chosen arrives.
+        await asyncio.gather(*[task for writer, task
+                               in list(self.connections.values())])
+        if self.server is not None:
+            await self.server.wait_closed()
+        if self.flusher is not None:
+            self.flusher.cancel()
+            try:
+                await self.flusher
+            except asyncio.CancelledError:
+                pass
+        if self.store is not None:
+            self.store.close()
+        self.pool.shutdown()
+
+    async def handle_client(self, reader, writer):
+        '''
+        Method -- handle_client
+            Runs the session of one client until the game ends or the
+                client disconnects.
+        Parameters:
+            self -- the current GameServer object
+            reader -- the asyncio StreamReader of the connection
+            writer -- the asyncio StreamWriter of the connection
+        Returns:
+            Nothing.
+        '''
+        self.started += 1
+        session = Session(self.started)
+        self.sessions[session.number] = session
+        self.connections[session.number] = (writer, asyncio.current_task())
+        try:
+            await self.send(writer, session.get_message())
+            while not session.game.is_over():
+                line = await reader.readline()
+                if len(line) == 0:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get("type") == "resume":
+                        self.resume(session, request.get("session"),
+                                    request.get("token"))
+                    else:
+                        session.play(request.get("move"))
+                except (ValueError, AttributeError) as error:
+                    await self.send(writer, {"type": "error",
+                                             "message": str(error)})
+                    continue
+                if not session.game.is_over() and \
+                        session.game.state.current_player == "RED":
+                    await self.choose_reply(session)
+                self.save(session)
+                await self.send(writer, session.get_message())
+        except ConnectionError:
+            pass
+        finally:
+            # A saved game the client left can be resumed later.
+            if session.saved and not session.game.is_over():
+                self.saved[session.number] = (session.token, unpack_position(
+                    session.game.state.to_bytes()))
+            del self.sessions[session.number]
+            del self.connections[session.number]
+            writer.close()
+
+    def resume(self, session, number, token):
+        '''
+        Method -- resume
+            Replaces a client's new game with a saved game.
+        Parameters:
+            self -- the current GameServer object
+            session -- the Session object of the client
+            number -- the number of the saved session
+            token -- the token of the saved session, in hexadecimal
+        Returns:
+            Nothing.
+        Raises:
+            ValueError if the session is not an int or the token not a
+                string, the client has already moved or there is no saved
+                game with that number and token.
+        '''
+        # JSON true and false would otherwise be taken as sessions 1 and 0.
+        if not isinstance(number, int) or isinstance(number, bool):
+            raise ValueError("the session must be an integer")
+        if not isinstance(token, str):
+            raise ValueError("the token must be a string")
+        if len(session.game.history) != 0 or session.saved:
+            raise ValueError("only a new session can resume a saved one")
+        saved = self.saved.get(number)
+        # A wrong token gets the same answer as a missing session, so
+        # session numbers cannot be probed.
+        if saved is None or not secrets.compare_digest(
+                token.encode("utf-8"), saved[0].hex().encode("ascii")):
+            raise ValueError("no saved session: " + str(number))
+        writer_and_task = self.connections.pop(session.number)
+        del self.sessions[session.number]
+        del self.saved[number]
+        session.number = number
+        session.token = saved[0]
+        session.game = Game(GameState.from_position(*saved[1]))
+        session.saved = True
+        self.sessions[number] = session
+        self.connections[number] = writer_and_task
+
+    def save(self, session):
+        '''
+        Method -- save
+            Saves the game of a session to the snapshot file, or records
+                that it has ended.
+        Parameters:
+            self -- the current GameServer object
+            session -- the Session object
+        Returns:
+            Nothing.
+        '''
+        if self.store is None:
+            return
+        if session.game.is_over():
+            if session.saved:
+                self.store.remove(session.number)
+        else:
+            self.store.save(session.number, session.game.state,
+                            session.token)
+        session.saved = True
+
+    async def send(self, writer, message):
+        '''
+        Method -- send
+            Sends a message to a client.
+        Parameters:
+            self -- the current GameServer object
+            writer -- the asyncio StreamWriter of the connection
+            message -- a dict
+        Returns:
+            Nothing.
+        '''
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def choose_reply(self, session):
+        '''
+        Method -- choose_reply
+            Chooses the computer's move in the pool and plays it. Other
+                sessions carry on while the move is chosen.
+        Parameters:
+            self -- the current GameServer object
+            session -- the Session object of the game
+        Returns:
+            Nothing.
+        '''
+        loop = asyncio.get_running_loop()
+        move = await loop.run_in_executor(
+            self.pool, select_reply, session.game.state.to_bytes(),
+            self.player)
+        if move is not None:
+            session.play_reply(*move)
+            self.replies += 1
+
+
+async def run_client(host, port, moves, rng, latencies):
+    '''
+    Function -- run_client
+        Plays random moves against a server as one simulated client.
+    Parameters:
+        host -- the address of the server
+        port -- the port of the server
+        moves -- the most moves to play
+        rng -- a random.Random object
+        latencies -- a list the time in seconds from sending each move to
+            receiving the position after the reply is added to
+    Returns:
+        Nothing.
+    '''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        message = json.loads(await reader.readline())
+        for turn in range(moves):
+            if message["over"]:
+                break
+            start = time.perf_counter()
+            writer.write(json.dumps(
+                {"type": "move", "move": rng.choice(message["moves"])}
+            ).encode("utf-8") + b"\n")
+            await writer.drain()
+            message = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load_test(sessions, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                        moves=DEFAULT_LOAD_TEST_MOVES, seed=1):
+    '''
+    Function -- run_load_test
+        Runs many simulated clients against a server at once.
+    Parameters:
+        sessions -- the number of clients
+        host -- the address of the server
+        port -- the port of the server
+        moves -- the most moves each client plays
+        seed -- the seed of the clients' random moves
+    Returns:
+        A dict with the number of sessions, the moves timed, the clients
+            that failed, the 50th and 99th percentile move latency in
+            milliseconds and the total time in seconds.
+    '''
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[run_client(host, port, moves, random.Random(seed + number),
+                     latencies) for number in range(sessions)],
+        return_exceptions=True)
+    seconds = time.perf_counter() - start
+    errors = sum(isinstance(result, Exception) for result in results)
+    if len(latencies) == 0:
+        latencies = [math.nan]
+    return {"sessions": sessions, "moves": len(latencies), "errors": errors,
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "seconds": seconds}
+
+
+async def serve(args):
+    '''
+    Function -- serve
+        Runs the server until it is interrupted or terminated, then shuts
+            it down along with its worker processes.
+    Parameters:
+        args -- the parsed command line arguments
+    Returns:
+        Nothing.
+    '''
+    server = GameServer(args.player, args.workers, args.snapshots,
+                        args.snapshot_delay)
+    port = await server.start(args.host, args.port)
+    loop = asyncio.get_running_loop()
+    serving = asyncio.current_task()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, serving.cancel)
+        except NotImplementedError:
+            pass  # Windows has no signal handlers in the event loop.
+    print("serving %s on %s:%d" % (args.player, args.host, port),
+          flush=True)
+    try:
+        await server.server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.close()
+
+
+async def load_test(args):
+    '''
+    Function -- load_test
+        Runs load tests of each number of sessions, against a local server
+            unless a port is given.
+    Parameters:
+        args -- the parsed command line arguments
+    Returns:
+        Nothing.
+    '''
+    process = None
+    port = args.port
+    if port is None:
+        # The server runs in its own process, so that the clients and the
+        # server each have a full allowance of file descriptors.
+        command = [sys.executable, os.path.abspath(__file__), "serve",
+                   "--host", args.host, "--port", "0", "--player",
+                   args.player]
+        if args.workers is not None:
+            command += ["--workers", str(args.workers)]
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE)
+        line = await process.stdout.readline()
+        if not line.startswith(b"serving"):
+            await process.wait()
+            raise RuntimeError("the server did not start")
+        port = int(line.rsplit(b":", 1)[1])
+    try:
+        for sessions in args.sessions:
+            results = await run_load_test(sessions, args.host, port,
+                                          args.moves, args.seed)
+            print("%6d sessions: p50 %.1f ms, p99 %.1f ms, %d moves, "
+                  "%d errors, %.1f s" % (
+                      sessions, results["p50_ms"], results["p99_ms"],
+                      results["moves"], results["errors"],
+                      results["seconds"]))
+    finally:
+        if process is not None:
+            process.terminate()
+            await process.wait()
+
+
+def raise_file_limit():
+    '''
+    Function -- raise_file_limit
+        Raises the number of files this process may open to the most it
+            is allowed, since every session holds a connection open.
+    Parameters:
+        None
+    Returns:
+        Nothing.
+    '''
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass  # Some systems refuse an unlimited hard limit.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkers game server")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--player", default=DEFAULT_PLAYER)
+    serve_parser.add_argument("--workers", type=int, default=None)
+    serve_parser.add_argument("--snapshots", default=None)
+    serve_parser.add_argument("--snapshot-delay", type=float,
+                              default=DEFAULT_MAX_DELAY)
+    load_parser = commands.add_parser("loadtest")
+    load_parser.add_argument("--sessions", type=int, nargs="+",
+                             default=[100, 1000, 10000])
+    load_parser.add_argument("--moves", type=int,
+                             default=DEFAULT_LOAD_TEST_MOVES)
+    load_parser.add_argument("--host", default=DEFAULT_HOST)
+    load_parser.add_argument("--port", type=int, default=None)
+    load_parser.add_argument("--player", default=DEFAULT_LOAD_TEST_PLAYER)
+    load_parser.add_argument("--workers", type=int, default=None)
+    load_parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    raise_file_limit()
+    try:
+        asyncio.run(serve(args) if args.command == "serve"
+                    else load_test(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
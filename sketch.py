@@ -1,5 +1,6 @@
+import math
+import time
 import turtle
-from gamestate import GameState
 
 
 class Sketch:
@@ -15,8 +16,31 @@ class Sketch:
         BOARD_SIZE -- int, representing the size of the game board
         BOTTOM_CORNER -- coordinate of the bottom corner of the board
         pen -- an instance of turtle
+        stamper -- an instance of turtle that stamps the registered shapes
+        use_shapes -- boolean, whether squares and pieces are stamped as
+            registered shapes instead of traced with the pen
+        stamps -- a dict mapping (row, column) to the id of the stamp of
+            the square and its piece
+        outline_stamps -- a dict mapping (row, column) to the id of the
+            stamp of the square's highlight
+        pieces -- a dict mapping (row, column) to the (color, is_king) of
+            the piece drawn there
+        outlines -- a dict mapping (row, column) to the color of the
+            squares drawn highlighted
+        dirty_squares -- a set of the (row, column) squares to redraw
+            completely in the next frame
+        dirty_outlines -- a set of the (row, column) squares whose outline
+            changed since the last frame
+        draw_calls -- int, the number of shapes drawn so far
+        frame_stats -- a list with a dict for every frame rendered: the
+            squares redrawn, the draw calls and the time taken in seconds
     Methods:
         start_UI -- initializes the UI
+        register_shapes -- registers the shapes of the squares and pieces
+        get_shape_name -- returns the name of the shape of a square and
+            its piece
+        get_outline_shape -- returns the name of the shape of a highlight,
+            registering it if needed
         draw_square -- helper method, draws a square
         draw_circle -- helper method, draws a circle
         draw_square_outline -- helper method, highlights a squares outline
@@ -35,9 +59,21 @@ class Sketch:
             object on the board
         draw_game_over -- clears the board and prints winner or
             loser to the screen
+        draw_board_square -- helper method, draws one empty square
+        draw_piece -- helper method, draws a piece given its color and king
+            status
+        stamp_square -- helper method, stamps one square and its piece
+        stamp_outline -- helper method, stamps the highlight of a square
+        draw_square_contents -- helper method, draws one square and its
+            piece
+        draw_outline -- helper method, draws the outline of a square
+        mark_dirty -- marks a square to be redrawn in the next frame
+        redraw_board -- redraws every playable square in one frame
+        render -- redraws every changed square once and updates the screen
+        get_frame_report -- describes the last frame rendered
         setup_click_handling -- enables clicks to be processed on the UI
     '''
-    def __init__(self):
+    def __init__(self, use_shapes=True):
         self.NUM_SQUARES = 8  # The number of squares on each row.
         self.SQUARE = 50  # The size of each square in the checkerboard.
         self.SQUARE_COLORS = ("light gray", "white")
@@ -45,9 +81,24 @@ class Sketch:
         self.BOARD_SIZE = self.NUM_SQUARES * self.SQUARE
         self.BOTTOM_CORNER = -self.BOARD_SIZE/2
         self.pen = turtle.Turtle()  # This variable does the drawing.
+        self.stamper = turtle.Turtle()  # This one stamps pieces and squares.
+        self.use_shapes = use_shapes
+        self.stamps = {}
+        self.outline_stamps = {}
+        self.pieces = {}
+        self.outlines = {}
+        self.dirty_squares = set()
+        self.dirty_outlines = set()
+        self.draw_calls = 0
+        self.frame_stats = []
         self.start_UI()
         self.pen.penup()  # This allows the pen to be moved.
         self.pen.hideturtle()  # This gets rid of the triangle cursor.
+        self.stamper.penup()
+        self.stamper.hideturtle()
+        self.stamper.setheading(90)  # Shapes are drawn the way they are made.
+        if self.use_shapes:
+            self.register_shapes()
 
     def start_UI(self):
         '''
@@ -67,6 +118,83 @@ class Sketch:
         turtle.bgcolor("white")  # The window's background color
         turtle.tracer(0, 0)  # makes the drawing appear immediately
 
+    def register_shapes(self):
+        '''
+        Method -- register_shapes
+            Registers a compound shape for an empty playable square and
+                for a square holding each kind of piece, so that drawing
+                a square and its piece takes one stamp.
+        Parameters:
+            self -- the current Sketch object
+        Returns:
+            Nothing.
+        '''
+        CIRCLE_POINTS = 36
+        STAR_POINTS = 5
+        half = self.SQUARE / 2
+        square = ((-half, -half), (half, -half), (half, half), (-half, half))
+        circle = tuple((half * math.cos(2 * math.pi * i / CIRCLE_POINTS),
+                        half * math.sin(2 * math.pi * i / CIRCLE_POINTS))
+                       for i in range(CIRCLE_POINTS))
+        # The crown of a king is a gold star, alternating outer and inner
+        # points.
+        star = tuple((radius * math.cos(math.pi / 2 + math.pi * i /
+                                        STAR_POINTS),
+                      radius * math.sin(math.pi / 2 + math.pi * i /
+                                        STAR_POINTS))
+                     for i, radius in enumerate([half / 2, half / 5] *
+                                                STAR_POINTS))
+        shape = turtle.Shape("compound")
+        shape.addcomponent(square, self.SQUARE_COLORS[0], "black")
+        turtle.register_shape(self.get_shape_name(None), shape)
+        for color, player_color in zip(("BLACK", "RED"), self.PLAYER_COLORS):
+            for is_king in (False, True):
+                shape = turtle.Shape("compound")
+                shape.addcomponent(square, self.SQUARE_COLORS[0], "black")
+                shape.addcomponent(circle, player_color, player_color)
+                if is_king:
+                    shape.addcomponent(star, "gold", "gold")
+                turtle.register_shape(
+                    self.get_shape_name((color, is_king)), shape)
+
+    def get_shape_name(self, piece):
+        '''
+        Method -- get_shape_name
+            Returns the name of the shape of a playable square and its
+                piece.
+        Parameters:
+            self -- the current Sketch object
+            piece -- a (color, is_king) tuple, or None for an empty square
+        Returns:
+            The name of a shape registered by register_shapes.
+        '''
+        if piece is None:
+            return "checkers square"
+        color, is_king = piece
+        return "checkers %s %s" % (color.lower(), "king" if is_king
+                                   else "man")
+
+    def get_outline_shape(self, outline_color):
+        '''
+        Method -- get_outline_shape
+            Returns the name of the shape of a highlight of a given color,
+                registering the shape the first time the color is used.
+        Parameters:
+            self -- the current Sketch object
+            outline_color -- the color of the highlight
+        Returns:
+            The name of the shape.
+        '''
+        name = "checkers %s outline" % outline_color
+        if name not in turtle.getshapes():
+            half = self.SQUARE / 2
+            shape = turtle.Shape("compound")
+            # An empty fill leaves the square and its piece visible.
+            shape.addcomponent(((-half, -half), (half, -half), (half, half),
+                                (-half, half)), "", outline_color)
+            turtle.register_shape(name, shape)
+        return name
+
     def draw_square(self, size):
         '''
         Method -- draw_square
@@ -79,6 +207,7 @@ class Sketch:
         '''
         SIDES = 4
         RIGHT_ANGLE = 90
+        self.draw_calls += 1
         self.pen.begin_fill()
         self.pen.pendown()
         for i in range(SIDES):
@@ -98,6 +227,7 @@ class Sketch:
         Returns:
             Nothing. Draws a circle in the graphics window.
         '''
+        self.draw_calls += 1
         self.pen.begin_fill()
         self.pen.color(color, color)
         self.pen.pendown()
@@ -117,6 +247,7 @@ class Sketch:
         '''
         RIGHT_ANGLE = 90
         SIDES = 4
+        self.draw_calls += 1
         self.pen.pendown()
         for i in range(SIDES):
             self.pen.forward(size)
@@ -133,12 +264,22 @@ class Sketch:
             Nothing. Draws a white and gray checkerboard in the
                 graphics window.
         '''
+        self.pieces = {}
+        self.outlines = {}
+        self.dirty_squares = set()
+        self.dirty_outlines = set()
+        self.pen.clear()
+        self.stamper.clearstamps()
+        self.stamps = {}
+        self.outline_stamps = {}
         self.pen.color("black", self.SQUARE_COLORS[1])
         self.pen.setposition(self.BOTTOM_CORNER, self.BOTTOM_CORNER)
         self.draw_square(self.BOARD_SIZE)
         for col in range(self.NUM_SQUARES):
             for row in range(self.NUM_SQUARES):
-                if col % 2 != row % 2:
+                if col % 2 != row % 2 and self.use_shapes:
+                    self.stamp_square(row, col)
+                elif col % 2 != row % 2:
                     self.pen.color("black", self.SQUARE_COLORS[0])
                     self.pen.setposition(self.BOTTOM_CORNER +
                                          self.SQUARE * col,
@@ -159,15 +300,17 @@ class Sketch:
         RADIUS = self.SQUARE/2
         for col in range(self.NUM_SQUARES):
             for row in range(self.NUM_SQUARES):
-                if col % 2 != row % 2:
+                if col % 2 != row % 2 and (row <= 2 or row >= 5):
+                    player = 0 if row <= 2 else 1
+                    self.pieces[row, col] = (("BLACK", "RED")[player], False)
+                    if self.use_shapes:
+                        self.stamp_square(row, col)
+                        continue
                     self.pen.setposition(self.BOTTOM_CORNER +
                                          self.SQUARE * col + RADIUS,
                                          self.BOTTOM_CORNER +
                                          self.SQUARE * row)
-                    if row <= 2:
-                        self.draw_circle(self.PLAYER_COLORS[0], RADIUS)
-                    if row >= 5:
-                        self.draw_circle(self.PLAYER_COLORS[1], RADIUS)
+                    self.draw_circle(self.PLAYER_COLORS[player], RADIUS)
 
     def get_coordinate(self, row_col):
         '''
@@ -188,100 +331,84 @@ class Sketch:
         '''
         Method -- highlight_squares
             This highlights a given set of squares on the game board
-                according to a specified color.
+                according to a specified color. The outlines are drawn by
+                the next call to render.
         Parameters:
             self -- the current Sketch object
             outline_color -- the color to use to highlight the squares
             squares -- a list, containing board square objects to
                 be highlighted
         Returns:
-            Nothing. Outputs highlighted squares to the graphics window.
+            Nothing.
         '''
-        self.pen.color(outline_color)
         for square in squares:
-            x = self.get_coordinate(square.column)
-            y = self.get_coordinate(square.row)
-            self.pen.setposition(x, y)
-            self.draw_square_outline(self.SQUARE)
+            self.outlines[square.row, square.column] = outline_color
+            self.dirty_outlines.add((square.row, square.column))
 
     def unhighlight_squares(self, squares):
         '''
         Method -- unhighlight_squares
-            Unhighlights the selected squares on the game board.
+            Unhighlights the selected squares on the game board. The
+                outlines are drawn by the next call to render.
         Parameters:
             self -- the current Sketch object
             squares -- a list, containing board square objects to
                 be unhighlighted
         Returns:
-            Nothing. Outputs the game board with the selected
-                squares unhighlighted.
+            Nothing.
         '''
         if squares is not None:
-            self.pen.color("black")
             for square in squares:
-                x = self.get_coordinate(square.column)
-                y = self.get_coordinate(square.row)
-                self.pen.setposition(x, y)
-                self.draw_square_outline(self.SQUARE)
+                if self.outlines.pop((square.row, square.column),
+                                     None) is not None:
+                    self.dirty_outlines.add((square.row, square.column))
 
-    def update_board_for_move(
-            self, row, col, prior_piece, gamestate: GameState):
+    def update_board_for_move(self, row, col, prior_square, piece):
         '''
         Method -- update_board_for_move
             This method updates the game board to reflect a players
-                move to an empty board square.
+                move to an empty board square. The move must already have
+                been played on the game, so the piece is drawn as it is
+                now (crowned or not). Both squares are redrawn by the next
+                call to render.
         Parameters:
             self -- the current Sketch object
             row -- this is the row in which to move the player's checker piece
             column -- this is the column in which to move the player's
                 checker piece
-            prior_piece -- this is the Checkerpiece object that is to be
-                moved on the game board
-            gamestate -- this is a GameState object representing the current
-                state of the game
+            prior_square -- this is the BoardSquare object the piece moved
+                from
+            piece -- this is the Checkerpiece object that was moved
         Returns:
-            Nothing. The game board in the UI is updated to reflect the
-                piece's move.
+            Nothing.
         '''
-        self.pen.color("black", "light gray")
-        self.pen.setposition(
-            self.get_coordinate(col), self.get_coordinate(row))
-        self.draw_square(self.SQUARE)
-        prior_piece_position = prior_piece.get_location_in_squares(
-            gamestate.squares)
-        self.pen.setposition(self.get_coordinate(prior_piece_position.column),
-                             self.get_coordinate(prior_piece_position.row))
-        self.pen.color("black", "light gray")
-        self.draw_square(self.SQUARE)
-        gamestate.update_squares(row, col, prior_piece)
-        prior_piece.end_turn(gamestate.squares)
-        self.draw_player_piece(row, col, prior_piece)
+        self.pieces.pop((prior_square.row, prior_square.column), None)
+        self.mark_dirty(prior_square.row, prior_square.column)
+        self.pieces[row, col] = (piece.color, piece.is_king)
+        self.mark_dirty(row, col)
 
     def update_board_for_capture(
-            self, row, col, prior_spot, jumped_square, gamestate):
+            self, row, col, prior_square, jumped_square, piece):
         '''
         Method -- update_board_for_capture
             This method updates the game board to reflect a players capturing
                 move and removes the captured piece from the game board.
+                The squares are redrawn by the next call to render.
         Parameters:
             self -- the current Sketch object
             row -- this is the row in which to move the player's checker piece
             column -- this is the column in which to move the player's checker
                 piece
-            prior_piece -- this is the Checkerpiece object that is to be
-                moved on the game board
+            prior_square -- this is the BoardSquare object the piece moved
+                from
             jumped_square -- the board square containing the captured piece
-            gamestate -- this is a GameState object representing the current
-                state of the game
+            piece -- this is the Checkerpiece object that was moved
         Returns:
-            Nothing. The game board in the UI is updated to reflect the
-                checker piece's capturing move.
+            Nothing.
         '''
-        self.update_board_for_move(row, col, prior_spot, gamestate)
-        self.pen.color("black", "light gray")
-        self.pen.setposition(self.get_coordinate(jumped_square.column),
-                             self.get_coordinate(jumped_square.row))
-        self.draw_square(self.SQUARE)
+        self.update_board_for_move(row, col, prior_square, piece)
+        self.pieces.pop((jumped_square.row, jumped_square.column), None)
+        self.mark_dirty(jumped_square.row, jumped_square.column)
 
     def draw_player_piece(self, row, col, piece):
         '''
@@ -296,18 +423,215 @@ class Sketch:
             Nothing. The board is updated to reflect the specified checkerpiece
                 in the given column and row.
         '''
+        self.draw_piece(row, col, piece.color, piece.is_king)
+
+    def draw_piece(self, row, col, color, is_king):
+        '''
+        Method -- draw_piece
+            Draws a piece on the board.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row in which to draw the piece
+            col -- the column in which to draw the piece
+            color -- "BLACK" or "RED"
+            is_king -- boolean, whether to mark the piece as a king
+        Returns:
+            Nothing.
+        '''
         HALF_SQUARE_SIZE = 25
         FONT_SIZE = 18
         self.pen.setposition(self.get_coordinate(col)+HALF_SQUARE_SIZE,
                              self.get_coordinate(row))
-        self.draw_circle(piece.color, self.SQUARE/2)
-        if piece.is_king:
+        self.draw_circle(color, self.SQUARE/2)
+        if is_king:
             self.pen.goto(self.get_coordinate(col)+HALF_SQUARE_SIZE,
                           self.get_coordinate(row)
                           + HALF_SQUARE_SIZE - FONT_SIZE // 2)
             self.pen.color("gold")
+            self.draw_calls += 1
             self.pen.write("K", align="center", font="Arial")
 
+    def draw_board_square(self, row, col):
+        '''
+        Method -- draw_board_square
+            Draws one empty square of the board with a black outline.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row of the square
+            col -- the column of the square
+        Returns:
+            Nothing.
+        '''
+        fill = self.SQUARE_COLORS[0] if col % 2 != row % 2 \
+            else self.SQUARE_COLORS[1]
+        self.pen.color("black", fill)
+        self.pen.setposition(self.get_coordinate(col),
+                             self.get_coordinate(row))
+        self.draw_square(self.SQUARE)
+
+    def stamp_square(self, row, col):
+        '''
+        Method -- stamp_square
+            Replaces the stamp of a playable square with one showing the
+                piece now on it.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row of the square
+            col -- the column of the square
+        Returns:
+            Nothing.
+        '''
+        HALF_SQUARE_SIZE = 25
+        if (row, col) in self.stamps:
+            self.stamper.clearstamp(self.stamps.pop((row, col)))
+        self.stamper.shape(self.get_shape_name(self.pieces.get((row, col))))
+        self.stamper.setposition(self.get_coordinate(col) + HALF_SQUARE_SIZE,
+                                 self.get_coordinate(row) + HALF_SQUARE_SIZE)
+        self.draw_calls += 1
+        self.stamps[row, col] = self.stamper.stamp()
+
+    def stamp_outline(self, row, col):
+        '''
+        Method -- stamp_outline
+            Replaces the highlight stamped over a square, removing it if
+                the square is not highlighted.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row of the square
+            col -- the column of the square
+        Returns:
+            Nothing.
+        '''
+        HALF_SQUARE_SIZE = 25
+        if (row, col) in self.outline_stamps:
+            self.stamper.clearstamp(self.outline_stamps.pop((row, col)))
+        outline_color = self.outlines.get((row, col))
+        if outline_color is None:
+            return
+        self.stamper.shape(self.get_outline_shape(outline_color))
+        self.stamper.setposition(self.get_coordinate(col) + HALF_SQUARE_SIZE,
+                                 self.get_coordinate(row) + HALF_SQUARE_SIZE)
+        self.draw_calls += 1
+        self.outline_stamps[row, col] = self.stamper.stamp()
+
+    def draw_square_contents(self, row, col):
+        '''
+        Method -- draw_square_contents
+            Draws one square and the piece on it, stamping them when
+                use_shapes is set and tracing them with the pen otherwise.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row of the square
+            col -- the column of the square
+        Returns:
+            Nothing.
+        '''
+        if self.use_shapes:
+            self.stamp_square(row, col)
+            return
+        self.draw_board_square(row, col)
+        piece = self.pieces.get((row, col))
+        if piece is not None:
+            self.draw_piece(row, col, *piece)
+
+    def draw_outline(self, row, col):
+        '''
+        Method -- draw_outline
+            Draws the outline of a square in its highlight color, or in
+                black if it is not highlighted.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row of the square
+            col -- the column of the square
+        Returns:
+            Nothing.
+        '''
+        if self.use_shapes:
+            self.stamp_outline(row, col)
+            return
+        self.pen.color(self.outlines.get((row, col), "black"))
+        self.pen.setposition(self.get_coordinate(col),
+                             self.get_coordinate(row))
+        self.draw_square_outline(self.SQUARE)
+
+    def mark_dirty(self, row, col):
+        '''
+        Method -- mark_dirty
+            Marks a square to be redrawn, with its piece and outline, in
+                the next frame.
+        Parameters:
+            self -- the current Sketch object
+            row -- the row of the square
+            col -- the column of the square
+        Returns:
+            Nothing.
+        '''
+        self.dirty_squares.add((row, col))
+
+    def redraw_board(self):
+        '''
+        Method -- redraw_board
+            Redraws every playable square, with its piece and outline, in
+                one frame.
+        Parameters:
+            self -- the current Sketch object
+        Returns:
+            The dict describing the frame, as returned by render.
+        '''
+        for col in range(self.NUM_SQUARES):
+            for row in range(self.NUM_SQUARES):
+                if col % 2 != row % 2:
+                    self.mark_dirty(row, col)
+        return self.render()
+
+    def render(self):
+        '''
+        Method -- render
+            Draws one frame: every dirty square is redrawn once with its
+                piece, then the outlines that changed are drawn, then the
+                screen is updated once.
+        Parameters:
+            self -- the current Sketch object
+        Returns:
+            A dict describing the frame: the squares redrawn, the draw
+                calls made and the time taken in seconds. It is also added
+                to self.frame_stats.
+        '''
+        start = time.perf_counter()
+        draw_calls = self.draw_calls
+        for row, col in self.dirty_squares:
+            self.draw_square_contents(row, col)
+        # A redrawn square lost its highlight, so its outline is drawn
+        # again along with the outlines that changed.
+        for row, col in self.dirty_outlines | self.dirty_squares:
+            self.draw_outline(row, col)
+        turtle.update()
+        stats = {"squares": len(self.dirty_squares),
+                 "draw_calls": self.draw_calls - draw_calls,
+                 "seconds": time.perf_counter() - start}
+        self.frame_stats.append(stats)
+        self.dirty_squares = set()
+        self.dirty_outlines = set()
+        return stats
+
+    def get_frame_report(self):
+        '''
+        Method -- get_frame_report
+            Describes the last frame rendered.
+        Parameters:
+            self -- the current Sketch object
+        Returns:
+            A string with the frame number, the squares redrawn, the draw
+                calls and the frame time, or an empty string before the
+                first frame.
+        '''
+        if len(self.frame_stats) == 0:
+            return ""
+        stats = self.frame_stats[-1]
+        return "frame %d: %d squares, %d draw calls, %.1f ms" % (
+            len(self.frame_stats), stats["squares"], stats["draw_calls"],
+            stats["seconds"] * 1000)
+
     def draw_game_over(self, msg, color):
         '''
         Method -- draw_game_over
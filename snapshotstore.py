@@ -0,0 +1,287 @@
+'''
+An append-only file of GameState snapshots, so that game sessions survive
+restarts. The file starts with the magic b"CKSS" and a version byte,
+followed by fixed-size records:
+    the session key (uint64), the kind of record (uint8: 1 for a snapshot,
+        0 for a removed session), the session's secret token (16 bytes)
+        and the state packed by GameState.to_bytes, all little-endian
+A later record for a key replaces the earlier ones. Snapshots are buffered
+and appended in batches, and a record cut short by a crash is ignored when
+the file is read and dropped when it is next opened. compact_snapshots
+rewrites the file with only the latest snapshot of each session.
+'''
+
+import os
+import struct
+import time
+from gamestate import STATE_FORMAT, unpack_position
+
+MAGIC = b"CKSS"
+VERSION = 2
+TOKEN_SIZE = 16
+FILE_HEADER = struct.Struct("<4sB")
+RECORD = struct.Struct("<QB%ds%ds" % (TOKEN_SIZE, STATE_FORMAT.size))
+NO_TOKEN = bytes(TOKEN_SIZE)
+SNAPSHOT = 1
+REMOVAL = 0
+DEFAULT_BATCH_SIZE = 256  # Snapshots buffered before they are written.
+DEFAULT_MAX_DELAY = 1.0  # Seconds a snapshot may wait to be written.
+
+
+class SnapshotStore:
+    '''
+    Class -- SnapshotStore
+        Represents a snapshot file that GameState snapshots are appended
+            to in batches. Can be used as a context manager.
+    Attributes:
+        path -- the path of the file
+        output -- the open file
+        batch_size -- int, the number of records buffered before they
+            are written
+        max_delay -- the seconds after which the batch is written when
+            the next record is added. Call flush at least this often to
+            write records when no more arrive.
+        sync -- boolean, whether each batch is forced to disk
+        pending -- a bytearray of the records not yet written
+        pending_since -- the time.perf_counter() time of the oldest record
+            not yet written, or None
+        count -- int, the number of records saved
+    Methods:
+        save -- adds a snapshot of a session
+        remove -- records that a session has ended
+        add_record -- helper method, buffers one record
+        flush -- writes the buffered records
+        close -- writes the buffered records and closes the file
+        __enter__ -- starts a with block
+        __exit__ -- closes the file at the end of a with block
+    '''
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE,
+                 max_delay=DEFAULT_MAX_DELAY, sync=False):
+        '''
+        Constructor -- creates a new instance of SnapshotStore, adding to
+            the file if it exists
+        Parameters:
+            self -- the current SnapshotStore object
+            path -- the path of the file
+            batch_size -- the number of records to buffer before writing
+            max_delay -- the seconds a record may wait for more records
+                before the batch is written
+            sync -- whether to force each batch to disk with os.fsync
+        Raises:
+            ValueError if the file exists but is not a snapshot file.
+        '''
+        self.path = path
+        self.output = open(path, "ab")
+        size = self.output.tell()
+        if size == 0:
+            self.output.write(FILE_HEADER.pack(MAGIC, VERSION))
+            self.output.flush()
+        else:
+            with open(path, "rb") as snapshots:
+                try:
+                    check_header(snapshots, path)
+                except ValueError:
+                    self.output.close()
+                    raise
+            # A record cut short by a crash would misalign every record
+            # appended after it.
+            extra = (size - FILE_HEADER.size) % RECORD.size
+            if extra:
+                self.output.truncate(size - extra)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.sync = sync
+        self.pending = bytearray()
+        self.pending_since = None
+        self.count = 0
+
+    def save(self, key, state, token=NO_TOKEN):
+        '''
+        Method -- save
+            Adds a snapshot of a session. It is written with the next
+                batch.
+        Parameters:
+            self -- the current SnapshotStore object
+            key -- the key of the session, from 0 to 2 ** 64 - 1
+            state -- the GameState object of the session
+            token -- the TOKEN_SIZE bytes needed to resume the session
+        Returns:
+            Nothing.
+        '''
+        self.add_record(RECORD.pack(key, SNAPSHOT, token, state.to_bytes()))
+
+    def remove(self, key):
+        '''
+        Method -- remove
+            Records that a session has ended, so it is not restored.
+        Parameters:
+            self -- the current SnapshotStore object
+            key -- the key of the session
+        Returns:
+            Nothing.
+        '''
+        self.add_record(RECORD.pack(key, REMOVAL, NO_TOKEN,
+                                    bytes(STATE_FORMAT.size)))
+
+    def add_record(self, record):
+        '''
+        Method -- add_record
+            Helper method. Buffers a record, writing the batch once it is
+                full or its oldest record has waited max_delay seconds.
+                Nothing is written while no records are added.
+        Parameters:
+            self -- the current SnapshotStore object
+            record -- a packed record
+        Returns:
+            Nothing.
+        '''
+        now = time.perf_counter()
+        if self.pending_since is None:
+            self.pending_since = now
+        self.pending += record
+        self.count += 1
+        if len(self.pending) >= self.batch_size * RECORD.size or \
+                now - self.pending_since >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        '''
+        Method -- flush
+            Writes the buffered records to the file in one write.
+        Parameters:
+            self -- the current SnapshotStore object
+        Returns:
+            Nothing.
+        '''
+        if len(self.pending) != 0:
+            self.output.write(self.pending)
+            self.pending = bytearray()
+        self.pending_since = None
+        self.output.flush()
+        if self.sync:
+            os.fsync(self.output.fileno())
+
+    def close(self):
+        '''
+        Method -- close
+            Writes the buffered records and closes the file.
+        Parameters:
+            self -- the current SnapshotStore object
+        Returns:
+            Nothing.
+        '''
+        self.flush()
+        self.output.close()
+
+    def __enter__(self):
+        '''
+        Method -- __enter__
+            Starts a with block.
+        Parameters:
+            self -- the current SnapshotStore object
+        Returns:
+            The SnapshotStore object.
+        '''
+        return self
+
+    def __exit__(self, *exception):
+        '''
+        Method -- __exit__
+            Closes the file at the end of a with block.
+        Parameters:
+            self -- the current SnapshotStore object
+            exception -- the exception raised in the block, if any
+        Returns:
+            Nothing.
+        '''
+        self.close()
+
+
+def check_header(snapshots, path):
+    '''
+    Function -- check_header
+        Reads the header of a snapshot file.
+    Parameters:
+        snapshots -- the file, open for reading at its start
+        path -- the path of the file, for the error message
+    Returns:
+        Nothing.
+    Raises:
+        ValueError if the file is not a snapshot file.
+    '''
+    header = snapshots.read(FILE_HEADER.size)
+    if len(header) != FILE_HEADER.size or \
+            FILE_HEADER.unpack(header) != (MAGIC, VERSION):
+        raise ValueError("not a snapshot file: " + str(path))
+
+
+def read_snapshots(path):
+    '''
+    Function -- read_snapshots
+        Reads the latest snapshot of every session that has not ended.
+            A record cut short at the end of the file is ignored.
+    Parameters:
+        path -- the path of a file written by SnapshotStore
+    Returns:
+        A dict mapping session keys to (token, packed state) tuples. An
+            empty dict if there is no file.
+    Raises:
+        ValueError if the file is not a snapshot file.
+    '''
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as snapshots:
+        check_header(snapshots, path)
+        data = snapshots.read()
+    snapshots = {}
+    end = len(data) - len(data) % RECORD.size
+    for key, kind, token, state in RECORD.iter_unpack(data[:end]):
+        if kind == SNAPSHOT:
+            snapshots[key] = (token, state)
+        else:
+            snapshots.pop(key, None)
+    return snapshots
+
+
+def restore_sessions(path):
+    '''
+    Function -- restore_sessions
+        Unpacks the position of every session that has not ended, checking
+            every snapshot. Only the Bitboard form is built, so restoring
+            is cheap; GameState.from_position builds the GameState of a
+            session once it is played again.
+    Parameters:
+        path -- the path of a file written by SnapshotStore
+    Returns:
+        A dict mapping session keys to (token, position) tuples, where the
+            position is the (Bitboard, player to move, jumping index)
+            tuple from unpack_position.
+    Raises:
+        ValueError if the file is not a snapshot file or holds a corrupt
+            snapshot.
+    '''
+    return {key: (token, unpack_position(state))
+            for key, (token, state) in read_snapshots(path).items()}
+
+
+def compact_snapshots(path):
+    '''
+    Function -- compact_snapshots
+        Rewrites a snapshot file with only the latest snapshot of every
+            session that has not ended. The new file replaces the old one
+            in a single rename, so a crash leaves one or the other.
+    Parameters:
+        path -- the path of a file written by SnapshotStore
+    Returns:
+        The number of snapshots kept.
+    '''
+    snapshots = read_snapshots(path)
+    temporary = path + ".compact"
+    with open(temporary, "wb") as output:
+        output.write(FILE_HEADER.pack(MAGIC, VERSION))
+        output.write(b"".join(RECORD.pack(key, SNAPSHOT, token, state)
+                              for key, (token, state)
+                              in snapshots.items()))
+    os.replace(temporary, path)
+    return len(snapshots)
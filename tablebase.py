@@ -0,0 +1,579 @@
+'''
+Endgame tablebases. Every position with up to a given number of pieces is
+solved by retrograde analysis under this project's rules (men move
+forwards, kings both ways, captures are forced, multiple jumps are one
+turn, a player without pieces or moves loses) and stored as win, loss or
+draw with the number of turns to the end. Build one with
+    python tablebase.py --pieces 4 --output endgame.tb
+Only tablebases of up to MAX_BUILD_PIECES pieces can be built: the four
+piece one has 19.3 million entries and takes about 12 minutes and 90 MB,
+while five pieces would be 518 million entries and six 11 billion.
+The file is probed through mmap, so processes share one copy of it in the
+page cache and nothing is read when it is opened.
+
+File layout, all little-endian:
+    header: magic b"CKTB", version (uint16), most pieces (uint16),
+        number of slices (uint32)
+    one directory entry per slice: black men, black kings, red men and
+        red kings (uint8 each), offset of the slice (uint64), number of
+        entries (uint32)
+    the slices: one uint16 per entry, (distance << 2) | result
+Positions in a slice are numbered by the colex rank of the squares of each
+group of pieces, see get_index, with black to move at even entries and
+red to move at odd ones.
+'''
+
+import argparse
+import mmap
+import struct
+import time
+from array import array
+from itertools import combinations
+from bitboard import Bitboard, NUM_PLAYABLE, BLACK_KING_ROW, RED_KING_ROW, \
+    iterate_bits
+
+DRAW = 0
+WIN = 1
+LOSS = 2
+INVALID = 3
+RESULT_NAMES = {DRAW: "draws", WIN: "wins", LOSS: "losses"}
+MAGIC = b"CKTB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+DIRECTORY_ENTRY = struct.Struct("<BBBBQI")
+ENTRY = struct.Struct("<H")
+MAX_DISTANCE = (1 << 14) - 1
+MAX_BUILD_PIECES = 4
+NO_LOSS = 0xFFFF  # No move leaving the slice reaches a loss.
+NOT_ALL_WINS = -1  # A move leaving the slice reaches a draw or a loss.
+
+
+def build_binomials():
+    '''
+    Function -- build_binomials
+        Builds Pascal's triangle for ranking sets of squares.
+    Returns:
+        A list of lists where binomials[n][k] is n choose k, for n up to
+            32 and k up to 32.
+    '''
+    binomials = [[0] * (NUM_PLAYABLE + 1) for n in range(NUM_PLAYABLE + 1)]
+    for n in range(NUM_PLAYABLE + 1):
+        binomials[n][0] = 1
+        for k in range(1, n + 1):
+            binomials[n][k] = binomials[n - 1][k - 1] + binomials[n - 1][k]
+    return binomials
+
+
+BINOMIALS = build_binomials()
+
+
+def count_bits(mask):
+    '''
+    Function -- count_bits
+        Counts the set bits in a mask.
+    Parameters:
+        mask -- a non-negative int
+    Returns:
+        The number of set bits.
+    '''
+    return bin(mask).count("1")
+
+
+def rank_squares(mask):
+    '''
+    Function -- rank_squares
+        Numbers a set of squares among all sets of the same size, in colex
+            order.
+    Parameters:
+        mask -- an int mask of playable squares
+    Returns:
+        An int from 0 to (32 choose the number of squares) - 1.
+    '''
+    rank = 0
+    for position, index in enumerate(iterate_bits(mask)):
+        rank += BINOMIALS[index][position + 1]
+    return rank
+
+
+def unrank_squares(rank, count):
+    '''
+    Function -- unrank_squares
+        Finds the set of squares with a given colex rank, the inverse of
+            rank_squares.
+    Parameters:
+        rank -- an int from 0 to (32 choose count) - 1
+        count -- the number of squares in the set
+    Returns:
+        An int mask of playable squares.
+    '''
+    mask = 0
+    index = NUM_PLAYABLE - 1
+    for position in range(count, 0, -1):
+        while BINOMIALS[index][position] > rank:
+            index -= 1
+        rank -= BINOMIALS[index][position]
+        mask |= 1 << index
+        index -= 1
+    return mask
+
+
+def get_signature(board):
+    '''
+    Function -- get_signature
+        Gets the material of a position, which names its slice.
+    Parameters:
+        board -- a Bitboard object
+    Returns:
+        A tuple (black men, black kings, red men, red kings).
+    '''
+    kings = board.kings
+    return (count_bits(board.black & ~kings), count_bits(board.black & kings),
+            count_bits(board.red & ~kings), count_bits(board.red & kings))
+
+
+def get_slice_size(signature):
+    '''
+    Function -- get_slice_size
+        Gets the number of entries of a slice.
+    Parameters:
+        signature -- a tuple (black men, black kings, red men, red kings)
+    Returns:
+        The number of entries, counting both players to move.
+    '''
+    size = 2
+    for count in signature:
+        size *= BINOMIALS[NUM_PLAYABLE][count]
+    return size
+
+
+def get_index(board, color, signature):
+    '''
+    Function -- get_index
+        Gets the entry of a position within its slice.
+    Parameters:
+        board -- a Bitboard object
+        color -- "BLACK" or "RED", the player to move
+        signature -- the slice of the position, from get_signature
+    Returns:
+        An int index into the slice.
+    '''
+    kings = board.kings
+    index = 0
+    for mask, count in ((board.black & ~kings, signature[0]),
+                        (board.black & kings, signature[1]),
+                        (board.red & ~kings, signature[2]),
+                        (board.red & kings, signature[3])):
+        index = index * BINOMIALS[NUM_PLAYABLE][count] + rank_squares(mask)
+    return index * 2 + (0 if color == "BLACK" else 1)
+
+
+def get_board(index, signature):
+    '''
+    Function -- get_board
+        Finds the position at an entry of a slice, the inverse of
+            get_index.
+    Parameters:
+        index -- an int index into the slice
+        signature -- a tuple (black men, black kings, red men, red kings)
+    Returns:
+        A tuple (Bitboard, player to move).
+    '''
+    color = "BLACK" if index & 1 == 0 else "RED"
+    index >>= 1
+    masks = []
+    for count in reversed(signature):
+        size = BINOMIALS[NUM_PLAYABLE][count]
+        masks.append(unrank_squares(index % size, count))
+        index //= size
+    red_kings, red_men, black_kings, black_men = masks
+    return Bitboard(black_men | black_kings, red_men | red_kings,
+                    black_kings | red_kings), color
+
+
+def get_slices(max_pieces):
+    '''
+    Function -- get_slices
+        Lists the slices to solve, each after every slice its moves can
+            lead to: fewer pieces first, and fewer men first since a man
+            can only be crowned.
+    Parameters:
+        max_pieces -- the most pieces on the board
+    Returns:
+        A list of signatures (black men, black kings, red men, red kings).
+    '''
+    slices = []
+    for total in range(2, max_pieces + 1):
+        for black in range(1, total):
+            red = total - black
+            for black_men in range(black + 1):
+                for red_men in range(red + 1):
+                    slices.append((black_men, black - black_men,
+                                   red_men, red - red_men))
+    slices.sort(key=lambda signature: (sum(signature),
+                                       signature[0] + signature[2]))
+    return slices
+
+
+def enumerate_slice(signature):
+    '''
+    Function -- enumerate_slice
+        Yields every legal position of a slice. Overlapping pieces and men
+            standing on their own king row are left out.
+    Parameters:
+        signature -- a tuple (black men, black kings, red men, red kings)
+    Returns:
+        A generator of (index for black to move, Bitboard) tuples.
+    '''
+    black_men, black_kings, red_men, red_kings = signature
+    groups = []
+    for count in signature:
+        masks = []
+        for squares in combinations(range(NUM_PLAYABLE), count):
+            mask = 0
+            for index in squares:
+                mask |= 1 << index
+            masks.append(mask)
+        masks.sort(key=rank_squares)
+        groups.append(masks)
+    sizes = [len(masks) for masks in groups]
+    for first, men in enumerate(groups[0]):
+        if men & BLACK_KING_ROW:
+            continue
+        for second, kings in enumerate(groups[1]):
+            if kings & men:
+                continue
+            black = men | kings
+            for third, red_man_mask in enumerate(groups[2]):
+                if red_man_mask & (black | RED_KING_ROW):
+                    continue
+                for fourth, red_king_mask in enumerate(groups[3]):
+                    if red_king_mask & (black | red_man_mask):
+                        continue
+                    index = ((first * sizes[1] + second) * sizes[2] +
+                             third) * sizes[3] + fourth
+                    yield index * 2, Bitboard(
+                        black, red_man_mask | red_king_mask,
+                        kings | red_king_mask)
+
+
+def play_sequence(board, sequence):
+    '''
+    Function -- play_sequence
+        Plays every hop of a move from Bitboard.get_sequences.
+    Parameters:
+        board -- a Bitboard object, changed in place
+        sequence -- a tuple (start, landings, captured)
+    Returns:
+        Nothing.
+    '''
+    start, landings, captured = sequence
+    if len(captured) == 0:
+        board.move_piece(start, -1, landings[0])
+        return
+    for jumped, end in zip(captured, landings):
+        board.move_piece(start, jumped, end)
+        start = end
+
+
+def get_predecessors(board, color, signature):
+    '''
+    Function -- get_predecessors
+        Finds the positions of a slice that lead to a position with a move
+            staying in the slice. Such a move is a step that does not
+            crown, since captures and crowning change the material, and it
+            is only legal when the mover had no capture.
+    Parameters:
+        board -- a Bitboard object
+        color -- "BLACK" or "RED", the player to move
+        signature -- the slice of the position, from get_signature
+    Returns:
+        A list of the indices of the positions, one per move.
+    '''
+    mover = "RED" if color == "BLACK" else "BLACK"
+    empty = board.get_empty()
+    predecessors = []
+    for shift, inverse, movers in board.get_directions(mover):
+        for end in iterate_bits(movers & shift(empty)):
+            start = inverse(1 << end).bit_length() - 1
+            parent = Bitboard(board.black, board.red, board.kings)
+            # Moving a piece back never lands it on its own king row.
+            parent.move_piece(end, -1, start)
+            if parent.get_jumpers(mover) == 0:
+                predecessors.append(get_index(parent, mover, signature))
+    return predecessors
+
+
+def solve_slice(signature, tables):
+    '''
+    Function -- solve_slice
+        Solves every position of a slice by retrograde analysis. Moves
+            leaving the slice are looked up in the slices already solved,
+            and every position counts its moves staying in the slice. Then,
+            for distance 0, 1, 2, ..., each position decided at that
+            distance is passed back to the positions leading to it: a loss
+            makes them wins one turn longer, and a win counts down their
+            moves, so a position is a loss once every move is known to
+            reach a win, one turn longer than the longest of them.
+            Positions never decided are draws. The working state is a few
+            flat arrays with a few bytes per position.
+    Parameters:
+        signature -- a tuple (black men, black kings, red men, red kings)
+        tables -- a dict mapping the signatures already solved to their
+            entries
+    Returns:
+        An array of uint16 entries, (distance << 2) | result.
+    '''
+    size = get_slice_size(signature)
+    entries = array("H", [INVALID]) * size
+    # The moves of each position staying in the slice that are not yet
+    # known to reach a win, and the longest win reached by its moves
+    # leaving the slice.
+    remaining = bytearray(size)
+    outside_wins = array("h", [NOT_ALL_WINS]) * size
+    # The positions to decide at each distance.
+    wins = {}
+    losses = {}
+    for black_index, board in enumerate_slice(signature):
+        for color, index in (("BLACK", black_index),
+                             ("RED", black_index + 1)):
+            entries[index] = DRAW
+            sequences = board.get_sequences(color)
+            opponent = "RED" if color == "BLACK" else "BLACK"
+            shortest_loss = NO_LOSS
+            longest_win = 0
+            inside = 0
+            for sequence in sequences:
+                child = Bitboard(board.black, board.red, board.kings)
+                play_sequence(child, sequence)
+                if child.get_pieces(opponent) == 0:
+                    shortest_loss = 0
+                    break
+                child_signature = get_signature(child)
+                if child_signature == signature:
+                    inside += 1
+                    continue
+                entry = tables[child_signature][
+                    get_index(child, opponent, child_signature)]
+                result = entry & 3
+                distance = entry >> 2
+                if result == LOSS:
+                    shortest_loss = min(shortest_loss, distance)
+                    longest_win = NOT_ALL_WINS
+                elif result == WIN and longest_win != NOT_ALL_WINS:
+                    longest_win = max(longest_win, distance)
+                else:
+                    longest_win = NOT_ALL_WINS
+            if shortest_loss != NO_LOSS:
+                wins.setdefault(shortest_loss + 1, array("I")).append(index)
+                continue
+            remaining[index] = inside
+            outside_wins[index] = longest_win
+            if inside == 0 and longest_win != NOT_ALL_WINS:
+                # With no moves at all, longest_win is 0 and the position
+                # is lost at once.
+                distance = longest_win + 1 if len(sequences) else 0
+                losses.setdefault(distance, array("I")).append(index)
+    distance = 0
+    while (wins or losses) and distance <= MAX_DISTANCE:
+        for index in losses.pop(distance, ()):
+            if entries[index] & 3 != DRAW:
+                continue
+            entries[index] = (distance << 2) | LOSS
+            board, color = get_board(index, signature)
+            for parent in get_predecessors(board, color, signature):
+                if entries[parent] & 3 == DRAW:
+                    wins.setdefault(distance + 1, array("I")).append(parent)
+        for index in wins.pop(distance, ()):
+            if entries[index] & 3 != DRAW:
+                continue
+            entries[index] = (distance << 2) | WIN
+            board, color = get_board(index, signature)
+            for parent in get_predecessors(board, color, signature):
+                # A position with a move that does not reach a win
+                # cannot be lost, so its moves are not counted down.
+                if entries[parent] & 3 != DRAW or \
+                        outside_wins[parent] == NOT_ALL_WINS:
+                    continue
+                remaining[parent] -= 1
+                if remaining[parent] == 0:
+                    # Wins are decided shortest first, so this is the
+                    # longest win reached inside the slice.
+                    losses.setdefault(
+                        max(distance, outside_wins[parent]) + 1,
+                        array("I")).append(parent)
+        distance += 1
+    return entries
+
+
+def generate(max_pieces, report=None):
+    '''
+    Function -- generate
+        Solves every slice with up to a given number of pieces.
+    Parameters:
+        max_pieces -- the most pieces on the board
+        report -- a function called with (signature, entries, seconds)
+            after each slice, or None
+    Returns:
+        A dict mapping each signature to its array of entries.
+    '''
+    tables = {}
+    for signature in get_slices(max_pieces):
+        start = time.perf_counter()
+        tables[signature] = solve_slice(signature, tables)
+        if report is not None:
+            report(signature, tables[signature],
+                   time.perf_counter() - start)
+    return tables
+
+
+def write_tablebase(path, tables, max_pieces):
+    '''
+    Function -- write_tablebase
+        Writes solved slices to a tablebase file.
+    Parameters:
+        path -- the path of the file to write
+        tables -- a dict mapping signatures to arrays of entries
+        max_pieces -- the most pieces on the board
+    Returns:
+        Nothing.
+    '''
+    signatures = sorted(tables)
+    offset = HEADER.size + DIRECTORY_ENTRY.size * len(signatures)
+    with open(path, "wb") as output:
+        output.write(HEADER.pack(MAGIC, VERSION, max_pieces,
+                                 len(signatures)))
+        for signature in signatures:
+            output.write(DIRECTORY_ENTRY.pack(
+                *signature, offset, len(tables[signature])))
+            offset += ENTRY.size * len(tables[signature])
+        for signature in signatures:
+            entries = tables[signature]
+            if struct.pack("=H", 1) != ENTRY.pack(1):
+                entries = array("H", entries)
+                entries.byteswap()
+            entries.tofile(output)
+
+
+class Tablebase:
+    '''
+    Class -- Tablebase
+        Represents a tablebase file opened for probing. The file is mapped
+            into memory, so opening it reads only the small directory and
+            processes probing the same file share its pages.
+    Attributes:
+        path -- the path of the file
+        max_pieces -- int, the most pieces of any position in the file
+        slices -- a dict mapping signatures to (offset, entries) tuples
+        probes -- int, the number of positions looked up
+        hits -- int, the number of lookups that found their position
+    Methods:
+        probe -- looks up a position
+        close -- closes the file
+        __reduce__ -- lets the tablebase be sent to another process, which
+            maps the same file
+    '''
+
+    def __init__(self, path):
+        '''
+        Constructor -- creates a new instance of Tablebase
+        Parameters:
+            self -- the current Tablebase object
+            path -- the path of a file written by write_tablebase
+        Raises:
+            ValueError if the file is not a tablebase.
+        '''
+        self.path = path
+        with open(path, "rb") as tablebase_file:
+            self.data = mmap.mmap(tablebase_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        magic, version, self.max_pieces, count = HEADER.unpack_from(
+            self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("not a tablebase file: " + str(path))
+        self.slices = {}
+        for number in range(count):
+            entry = DIRECTORY_ENTRY.unpack_from(
+                self.data, HEADER.size + number * DIRECTORY_ENTRY.size)
+            self.slices[entry[:4]] = (entry[4], entry[5])
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, board, color):
+        '''
+        Method -- probe
+            Looks up a position.
+        Parameters:
+            self -- the current Tablebase object
+            board -- a Bitboard object
+            color -- "BLACK" or "RED", the player to move
+        Returns:
+            A tuple (result, distance) where result is WIN, LOSS or DRAW
+                for the player to move and distance is the number of turns
+                to the end of the game, or None if the position is not in
+                the tablebase.
+        '''
+        self.probes += 1
+        signature = get_signature(board)
+        found = self.slices.get(signature)
+        if found is None:
+            return None
+        offset, size = found
+        entry = ENTRY.unpack_from(
+            self.data, offset + ENTRY.size * get_index(board, color,
+                                                       signature))[0]
+        if entry & 3 == INVALID:
+            return None
+        self.hits += 1
+        return entry & 3, entry >> 2
+
+    def close(self):
+        '''
+        Method -- close
+            Closes the file.
+        Parameters:
+            self -- the current Tablebase object
+        Returns:
+            Nothing.
+        '''
+        self.data.close()
+
+    def __reduce__(self):
+        '''
+        Method -- __reduce__
+            Tells pickle to open the same file again rather than copy it.
+        Parameters:
+            self -- the current Tablebase object
+        Returns:
+            A tuple of the Tablebase class and its arguments.
+        '''
+        return Tablebase, (self.path,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a tablebase")
+    parser.add_argument("--pieces", type=int, default=MAX_BUILD_PIECES,
+                        choices=range(2, MAX_BUILD_PIECES + 1))
+    parser.add_argument("--output", default="endgame.tb")
+    args = parser.parse_args()
+
+    def report(signature, entries, seconds):
+        counts = {result: 0 for result in RESULT_NAMES}
+        longest = 0
+        for entry in entries:
+            if entry & 3 != INVALID:
+                counts[entry & 3] += 1
+                longest = max(longest, entry >> 2)
+        print("%d%d%d%d  %s  longest %d  %.1f s" % (
+            signature + (", ".join("%d %s" % (counts[result], name)
+                                   for result, name in RESULT_NAMES.items()),
+                         longest, seconds)))
+
+    start = time.perf_counter()
+    tables = generate(args.pieces, report)
+    write_tablebase(args.output, tables, args.pieces)
+    print("wrote %s in %.1f s" % (args.output, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
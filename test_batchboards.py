@@ -0,0 +1,80 @@
+import random
+import pytest
+from gamestate import GameState
+from bitboard import Bitboard, square_to_index
+from test_bitboard import random_squares
+
+np = pytest.importorskip("numpy")
+from batchboards import BatchBoards, count_bits
+
+
+def get_positions(count, seed):
+    rng = random.Random(seed)
+    positions = []
+    for trial in range(count):
+        board = Bitboard.from_squares(random_squares(rng))
+        positions.append((board, rng.choice(("BLACK", "RED"))))
+    return positions
+
+
+def test_count_bits():
+    masks = np.array([0, 1, 0xFFFFFFFF, 0x80000001, 0x0F0F0F0F],
+                     dtype=np.uint32)
+    assert(list(count_bits(masks)) == [0, 1, 32, 2, 16])
+
+
+def test_from_bitboards():
+    positions = get_positions(5, 1)
+    batch = BatchBoards.from_bitboards(positions)
+    assert(len(batch) == 5)
+    for index, position in enumerate(positions):
+        assert(batch.get_bitboard(index) == position)
+
+
+def test_start_position():
+    board = Bitboard.from_squares(GameState().squares)
+    batch = BatchBoards.from_bitboards([(board, "BLACK"), (board, "RED")])
+    assert(list(batch.count_moves()) == [7, 7])
+    assert(list(batch.get_movable()) == [0x00000F00, 0x00F00000])
+    assert(list(batch.get_capture_mask()) == [0, 0])
+    assert(list(batch.get_promotions()) == [0, 0])
+
+
+def test_matches_checkerpiece():
+    positions = get_positions(300, 3)
+    batch = BatchBoards.from_bitboards(positions)
+    targets, is_capture = batch.get_legal_targets()
+    movable = batch.get_movable()
+    counts = batch.count_moves()
+    for index, (board, color) in enumerate(positions):
+        game = GameState()
+        game.load_squares(board.to_squares())
+        game.current_player = color
+        expected_pieces = 0
+        expected_moves = []
+        for piece in game.get_valid_pieces():
+            location = game.positions[piece]
+            start = square_to_index(location.row, location.column)
+            expected_pieces |= 1 << start
+            for move in piece.get_possible_moves(game.squares):
+                expected_moves.append(
+                    (start, square_to_index(move.row, move.column)))
+        moves = batch.get_moves(index, targets, is_capture)
+        assert(int(movable[index]) == expected_pieces)
+        assert(sorted((start, end) for start, jumped, end in moves) ==
+               sorted(expected_moves))
+        assert(counts[index] == len(expected_moves))
+        assert(moves == board.get_moves(color))
+
+
+def test_get_promotions():
+    positions = get_positions(300, 5)
+    promotions = BatchBoards.from_bitboards(positions).get_promotions()
+    for index, (board, color) in enumerate(positions):
+        expected = 0
+        for start, jumped, end in board.get_moves(color):
+            undo = (board.black, board.red, board.kings)
+            if board.move_piece(start, jumped, end):
+                expected |= 1 << start
+            board.black, board.red, board.kings = undo
+        assert(int(promotions[index]) == expected)
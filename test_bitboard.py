@@ -0,0 +1,122 @@
+import random
+from gamestate import GameState
+from checkerpiece import CheckerPiece
+from boardsquare import BoardSquare
+from bitboard import Bitboard, square_to_index, index_to_square, \
+    get_jumped_index
+
+
+def random_squares(rng):
+    squares = [[None] * 8 for i in range(8)]
+    for index in range(32):
+        roll = rng.random()
+        if roll < 0.5:
+            continue
+        piece = CheckerPiece("BLACK" if roll < 0.75 else "RED")
+        if rng.random() < 0.3:
+            piece.is_king = True
+            piece.can_move_forward = True
+            piece.can_move_back = True
+        row, column = index_to_square(index)
+        squares[row][column] = piece
+    return squares
+
+
+def test_square_to_index():
+    assert(square_to_index(0, 1) == 0)
+    assert(square_to_index(0, 7) == 3)
+    assert(square_to_index(1, 0) == 4)
+    assert(square_to_index(7, 6) == 31)
+    assert(square_to_index(0, 0) == -1)
+    assert(square_to_index(8, 1) == -1)
+    for index in range(32):
+        assert(square_to_index(*index_to_square(index)) == index)
+
+
+def test_from_squares():
+    game = GameState()
+    board = Bitboard.from_squares(game.squares)
+    assert(board.black == 0x00000FFF)
+    assert(board.red == 0xFFF00000)
+    assert(board.kings == 0)
+
+
+def test_to_squares():
+    game = GameState()
+    game.piece_selected(2, 1).is_king = True
+    squares = Bitboard.from_squares(game.squares).to_squares()
+    for row in range(8):
+        for column in range(8):
+            piece = game.squares[row][column]
+            if piece is None:
+                assert(squares[row][column] is None)
+            else:
+                assert(squares[row][column].color == piece.color)
+                assert(squares[row][column].is_king == piece.is_king)
+    assert(squares[2][1].can_move_back)
+
+
+def test_get_movable():
+    game = GameState()
+    board = Bitboard.from_squares(game.squares)
+    assert(board.get_movable("BLACK") == 0x00000F00)
+    game.update_squares(3, 2, game.piece_selected(5, 0))
+    board = Bitboard.from_squares(game.squares)
+    assert(board.get_movable("BLACK") == (1 << square_to_index(2, 1) |
+                                          1 << square_to_index(2, 3)))
+
+
+def test_get_moves_matches_checkerpiece():
+    rng = random.Random(7)
+    for trial in range(300):
+        squares = random_squares(rng)
+        board = Bitboard.from_squares(squares)
+        for color in ("BLACK", "RED"):
+            jumps = []
+            steps = []
+            for row in range(8):
+                for column in range(8):
+                    piece = squares[row][column]
+                    if piece is None or piece.color != color:
+                        continue
+                    start = square_to_index(row, column)
+                    for move in piece.get_capturing_moves(squares):
+                        jumped = piece.get_jumped_square(
+                            move, BoardSquare(row, column))
+                        jumps.append((start, square_to_index(
+                            jumped.row, jumped.column), square_to_index(
+                            move.row, move.column)))
+                    for move in piece.get_non_capturing_moves(squares):
+                        steps.append(
+                            (start, square_to_index(move.row, move.column)))
+            assert(board.get_jumps(color) == sorted(jumps))
+            assert(board.get_steps(color) == sorted(steps))
+            # get_moves has its own written-out generator.
+            assert(board.get_moves(color) ==
+                   (sorted(jumps) if jumps else
+                    [(start, -1, end) for start, end in sorted(steps)]))
+
+
+def test_get_jumped_index():
+    assert(get_jumped_index(square_to_index(2, 3), square_to_index(4, 1)) ==
+           square_to_index(3, 2))
+    assert(get_jumped_index(square_to_index(3, 2), square_to_index(5, 4)) ==
+           square_to_index(4, 3))
+    assert(get_jumped_index(square_to_index(5, 0), square_to_index(3, 2)) ==
+           square_to_index(4, 1))
+    assert(get_jumped_index(square_to_index(6, 7), square_to_index(4, 5)) ==
+           square_to_index(5, 6))
+
+
+def test_move_piece():
+    board = Bitboard(black=1 << square_to_index(6, 1),
+                     red=1 << square_to_index(5, 2))
+    assert(board.move_piece(square_to_index(6, 1), -1,
+                            square_to_index(7, 0)))
+    assert(board.kings == 1 << square_to_index(7, 0))
+    board = Bitboard(black=1 << square_to_index(3, 2),
+                     red=1 << square_to_index(4, 3))
+    assert(board.move_piece(square_to_index(4, 3), square_to_index(3, 2),
+                            square_to_index(2, 1)) is False)
+    assert(board.black == 0)
+    assert(board.red == 1 << square_to_index(2, 1))
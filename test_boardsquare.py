@@ -1,3 +1,5 @@
+import copy
+import pickle
 from boardsquare import BoardSquare
 
 
@@ -24,3 +26,38 @@ def test_str():
 def test_repr():
     square1 = BoardSquare(3, 5)
     assert(repr(square1) == "Row: 3 Column: 5")
+
+
+def test_shared_squares():
+    assert(BoardSquare(2, 3) is BoardSquare(2, 3))
+    assert(BoardSquare(0, 0) is not BoardSquare(0, 1))
+    # Squares off the board are not shared but still compare equal.
+    assert(BoardSquare(-1, 2) == BoardSquare(-1, 2))
+    assert(BoardSquare(8, 9) != BoardSquare(7, 7))
+
+
+def test_hash():
+    squares = {BoardSquare(1, 2), BoardSquare(1, 2), BoardSquare(10, 2)}
+    assert(len(squares) == 2)
+    assert(BoardSquare(1, 2) in squares)
+    assert(BoardSquare(10, 2) in squares)
+    assert(BoardSquare(2, 1) not in squares)
+    assert({BoardSquare(4, 7): "a"}[BoardSquare(4, 7)] == "a")
+
+
+def test_immutable():
+    square = BoardSquare(4, 7)
+    try:
+        square.row = 3
+        assert(False)
+    except AttributeError:
+        pass
+    assert(BoardSquare(4, 7).row == 4)
+    assert(not hasattr(square, "__dict__"))
+
+
+def test_copy():
+    square = BoardSquare(5, 6)
+    assert(copy.deepcopy(square) is square)
+    assert(pickle.loads(pickle.dumps(square)) is square)
+    assert(pickle.loads(pickle.dumps(BoardSquare(9, 9))) == BoardSquare(9, 9))
@@ -1,5 +1,6 @@
+import pytest
 from gamestate import GameState
-from checkerpiece import CheckerPiece
+from checkerpiece import CheckerPiece, STEP_TABLES, JUMP_TABLES
 from boardsquare import BoardSquare
 
 
@@ -61,40 +62,6 @@ def test_get_non_capturing_moves():
         game.squares) == [BoardSquare(4, 1)])
 
 
-def test_get_legal_non_capturing_moves():
-    game = GameState()
-    game_piece = game.piece_selected(2, 3)
-    assert(game_piece.get_legal_non_capturing_moves(
-        [BoardSquare(3, 2), BoardSquare(3, 4)], game.squares) ==
-        [BoardSquare(3, 2), BoardSquare(3, 4)])
-    game_piece2 = game.piece_selected(1, 0)
-    assert(game_piece2.get_legal_non_capturing_moves(
-        [BoardSquare(2, -1), BoardSquare(2, 1)], game.squares) == [])
-    game_piece3 = game.piece_selected(5, 0)
-    assert(game_piece3.get_legal_non_capturing_moves(
-        [BoardSquare(4, -1), BoardSquare(4, 1)], game.squares) ==
-        [BoardSquare(4, 1)])
-    game_piece4 = game.piece_selected(7, 6)
-    assert(game_piece4.get_legal_non_capturing_moves(
-        [BoardSquare(6, 5), BoardSquare(6, 7)], game.squares) == [])
-
-
-def test_get_legal_capturing_moves():
-    game = GameState()
-    game_piece = game.piece_selected(2, 3)
-    assert(game_piece.get_legal_capturing_moves(
-            BoardSquare(2, 3), [BoardSquare(4, 1), BoardSquare(4, 5)],
-            game.squares) == [])
-    game.update_squares(3, 2, game.piece_selected(5, 0))
-    assert(game_piece.get_legal_capturing_moves(
-            BoardSquare(2, 3), [BoardSquare(4, 1), BoardSquare(4, 5)],
-            game.squares) == [BoardSquare(4, 1)])
-    game_piece2 = game.piece_selected(5, 6)
-    assert(game_piece2.get_legal_capturing_moves(
-            BoardSquare(5, 6), [BoardSquare(3, 4), BoardSquare(3, 8)],
-            game.squares) == [])
-
-
 def test_get_jumped_square():
     game = GameState()
     piece = game.piece_selected(2, 3)
@@ -129,3 +96,47 @@ def test_end_turn():
     assert(game_piece_red.is_king)
     assert(game_piece_red.can_move_back)
     assert(game_piece_red.can_move_forward)
+
+
+def test_get_location_in_squares_without_gamestate():
+    game = GameState()
+    piece = game.piece_selected(2, 1)
+    squares = [[None] * 8 for i in range(8)]
+    squares[3][2] = piece
+    assert(piece.get_location_in_squares(squares) == BoardSquare(3, 2))
+
+
+def test_slots():
+    piece = CheckerPiece("RED")
+    assert(not hasattr(piece, "__dict__"))
+    try:
+        piece.colour = "BLACK"
+        assert(False)
+    except AttributeError:
+        pass
+
+
+def test_move_tables():
+    square = BoardSquare(0, 1)
+    assert(STEP_TABLES[False, True][square.key] ==
+           (BoardSquare(1, 0), BoardSquare(1, 2)))
+    assert(STEP_TABLES[True, False][square.key] == ())
+    assert(JUMP_TABLES[False, True][square.key] ==
+           ((BoardSquare(1, 2), BoardSquare(2, 3)),))
+    center = BoardSquare(4, 3)
+    assert(len(STEP_TABLES[True, True][center.key]) == 4)
+    assert([landing for jumped, landing in
+            JUMP_TABLES[True, True][center.key]] ==
+           [BoardSquare(2, 1), BoardSquare(2, 5), BoardSquare(6, 1),
+            BoardSquare(6, 5)])
+
+
+def test_get_jumped_square_off_table():
+    piece = CheckerPiece("BLACK")
+    assert(piece.get_jumped_square(BoardSquare(5, 4), BoardSquare(3, 2)) ==
+           BoardSquare(4, 3))
+    # Only jumps between squares on the board have a jumped square.
+    with pytest.raises(KeyError):
+        piece.get_jumped_square(BoardSquare(8, 9), BoardSquare(6, 7))
+    with pytest.raises(KeyError):
+        piece.get_jumped_square(BoardSquare(3, 2), BoardSquare(3, 2))
@@ -0,0 +1,78 @@
+from gamestate import GameState
+from bitboard import Bitboard
+from searchplayer import SearchPlayer, evaluate
+from perft import get_sample_positions
+from evaluator import Evaluator, make_evaluator, register_evaluator, \
+    build_piece_square_tables, EVALUATORS
+
+
+def turn_around(board):
+    def reverse(mask):
+        return int(format(mask, "032b")[::-1], 2)
+    return Bitboard(reverse(board.red), reverse(board.black),
+                    reverse(board.kings))
+
+
+def test_piece_square_tables():
+    man_table, king_table = build_piece_square_tables()
+    assert(len(man_table) == 32 and len(king_table) == 32)
+    # Guarding the back row and advancing are both rewarded.
+    assert(man_table[0] > man_table[4])
+    assert(man_table[24] > man_table[8])
+
+
+def test_evaluate():
+    evaluator = make_evaluator()
+    board = Bitboard.from_squares(GameState().squares)
+    assert(evaluator.evaluate(board, "BLACK") == 0)
+    for board, color in get_sample_positions(50):
+        score = evaluator.evaluate(board, color)
+        assert(evaluator.evaluate(board, "RED") ==
+               -evaluator.evaluate(board, "BLACK"))
+        # The same position seen from the other side scores the same.
+        other = "RED" if color == "BLACK" else "BLACK"
+        assert(evaluator.evaluate(turn_around(board), other) == score)
+
+
+def test_material_evaluator():
+    evaluator = make_evaluator("material")
+    for board, color in get_sample_positions(50):
+        assert(evaluator.evaluate(board, color) == evaluate(board, color))
+
+
+def test_register_evaluator():
+    class CountingEvaluator:
+        def __init__(self):
+            self.calls = 0
+
+        def evaluate(self, board, color):
+            self.calls += 1
+            return 0
+
+    register_evaluator("counting", CountingEvaluator)
+    try:
+        player = SearchPlayer(depth=3, evaluator="counting")
+        player.get_best_move(Bitboard.from_squares(GameState().squares),
+                             "BLACK")
+        assert(player.evaluator.calls > 0)
+    finally:
+        del EVALUATORS["counting"]
+    try:
+        make_evaluator("counting")
+        assert(False)
+    except ValueError:
+        pass
+
+
+class CheckingPlayer(SearchPlayer):
+    def search(self, board, color, depth, alpha, beta, ply, key):
+        assert(self.evaluation == self.evaluator.evaluate(board, "BLACK"))
+        return super().search(board, color, depth, alpha, beta, ply, key)
+
+
+def test_incremental_evaluation():
+    player = CheckingPlayer(depth=4, evaluator=Evaluator(
+        100, 160, list(range(32)), list(range(32, 64))))
+    for board, color in get_sample_positions(10):
+        player.get_best_move(board, color)
+    assert(player.nodes > 0)
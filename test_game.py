@@ -0,0 +1,102 @@
+import subprocess
+import sys
+import pytest
+from game import Game
+from gamestate import GameState
+from checkerpiece import CheckerPiece
+from boardsquare import BoardSquare
+from move import Move
+
+
+def make_game(black, red, current_player="BLACK"):
+    state = GameState()
+    squares = [[None] * 8 for i in range(8)]
+    for row, column in black:
+        squares[row][column] = CheckerPiece("BLACK")
+    for row, column in red:
+        squares[row][column] = CheckerPiece("RED")
+    state.current_player = current_player
+    state.load_squares(squares)
+    return Game(state)
+
+
+def test_constructor():
+    game = Game()
+    assert(game.state.current_player == "BLACK")
+    assert(game.history == [])
+    assert(game.is_over() is False)
+    assert(game.get_winner() is None)
+
+
+def test_get_legal_moves():
+    game = Game()
+    moves = game.get_legal_moves()
+    assert(len(moves) == 7)
+    assert(moves[0] == Move(BoardSquare(2, 1), [BoardSquare(3, 0)]))
+
+
+def test_get_legal_moves_multiple_jump():
+    game = make_game([(0, 1)], [(1, 2), (3, 2), (3, 4), (6, 7)])
+    moves = game.get_legal_moves()
+    assert(moves == [
+        Move(BoardSquare(0, 1), [BoardSquare(2, 3), BoardSquare(4, 1)],
+             [BoardSquare(1, 2), BoardSquare(3, 2)]),
+        Move(BoardSquare(0, 1), [BoardSquare(2, 3), BoardSquare(4, 5)],
+             [BoardSquare(1, 2), BoardSquare(3, 4)])])
+
+
+def test_get_legal_moves_promotion():
+    game = make_game([(1, 2), (7, 0)], [(2, 3)], "RED")
+    moves = game.get_legal_moves()
+    assert(moves == [Move(BoardSquare(2, 3), [BoardSquare(0, 1)],
+                          [BoardSquare(1, 2)], True)])
+
+
+def test_apply_move():
+    game = make_game([(0, 1)], [(1, 2), (3, 2), (3, 4), (6, 7)])
+    move = game.get_legal_moves()[1]
+    assert(game.apply_move(move) is False)
+    assert(game.history == [move])
+    assert(game.state.current_player == "RED")
+    assert(game.state.get_red_count() == 2)
+    assert(game.state.piece_selected(4, 5).color == "BLACK")
+
+
+def test_apply_hop():
+    game = make_game([(0, 1)], [(1, 2), (3, 2), (3, 4), (6, 7)])
+    game.apply_hop(BoardSquare(0, 1), BoardSquare(2, 3))
+    assert(game.state.current_player == "BLACK")
+    assert(len(game.get_legal_moves()) == 2)
+    game.apply_hop(BoardSquare(2, 3), BoardSquare(4, 1))
+    assert(game.history == [
+        Move(BoardSquare(0, 1), [BoardSquare(2, 3), BoardSquare(4, 1)],
+             [BoardSquare(1, 2), BoardSquare(3, 2)])])
+    with pytest.raises(ValueError):
+        game.apply_hop(BoardSquare(4, 1), BoardSquare(5, 2))
+    # A game starting in the middle of a multiple jump.
+    game = make_game([(0, 1)], [(1, 2), (3, 2), (3, 4), (6, 7)])
+    game.apply_hop(BoardSquare(0, 1), BoardSquare(2, 3))
+    game = Game(game.state)
+    assert(game.apply_move(game.get_legal_moves()[1]) is False)
+    assert(game.history == [Move(BoardSquare(2, 3), [BoardSquare(4, 5)],
+                                 [BoardSquare(3, 4)])])
+    assert(game.state.current_player == "RED")
+
+
+def test_get_winner():
+    game = make_game([(2, 1)], [(3, 2)])
+    assert(game.apply_move(game.get_legal_moves()[0]))
+    assert(game.is_over())
+    assert(game.get_winner() == "BLACK")
+    assert(game.get_legal_moves() == [])
+    blocked = make_game([(6, 1)], [(7, 0), (7, 2)], "RED")
+    assert(blocked.is_over() is False)
+    blocked.apply_move(blocked.get_legal_moves()[0])
+    assert(blocked.get_winner() == "RED")
+
+
+def test_no_turtle_import():
+    code = "import game, sys; print('turtle' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, text=True, check=True)
+    assert(result.stdout.strip() == "False")
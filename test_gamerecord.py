@@ -0,0 +1,114 @@
+from game import Game
+from gamestate import GameState
+from computerplayer import ComputerPlayer
+from bitboard import square_to_index
+from gamerecord import GameRecord, GameRecordWriter, read_records, \
+    pack_moves, unpack_moves, FILE_HEADER, MAGIC
+
+
+def play_random_game(seed, max_turns=150):
+    game = Game()
+    player = ComputerPlayer(seed)
+    while not game.is_over() and len(game.history) < max_turns:
+        game.apply_move(player.select_move(game.state))
+    return game
+
+
+def test_pack_moves():
+    moves = [(9, (13,)), (22, (13,)), (9, (18, 27, 20)), (31, (27,))]
+    data = pack_moves(moves)
+    assert(len(data) == 10)
+    assert(unpack_moves(data) == moves)
+    assert(unpack_moves(b"") == [])
+    for data in (data[:-1], b"\x09", b"\x09\x92"):
+        try:
+            unpack_moves(data)
+            assert(False)
+        except ValueError:
+            pass
+
+
+def test_write_and_read(tmp_path):
+    path = str(tmp_path / "games.rec")
+    records = []
+    with GameRecordWriter(path) as writer:
+        for seed in range(5):
+            record = GameRecord.from_game(play_random_game(seed), "random",
+                                          "rändom", seed)
+            records.append(record)
+            writer.write(record)
+    assert(writer.count == 5)
+    assert(list(read_records(path)) == records)
+    with GameRecordWriter(path, append=True) as writer:
+        writer.write(records[0])
+    assert(list(read_records(path)) == records + records[:1])
+
+
+def test_replay():
+    for seed in range(5):
+        game = play_random_game(seed)
+        record = GameRecord.from_game(game)
+        assert(record.winner == game.get_winner())
+        turns = 0
+        for move, state in record.replay(validate=True):
+            assert(move == game.history[turns])
+            turns += 1
+        assert(turns == len(game.history))
+        assert(state.zobrist_hash == game.state.zobrist_hash)
+        for row in range(8):
+            for column in range(8):
+                played = game.state.squares[row][column]
+                replayed = state.squares[row][column]
+                assert((played is None) == (replayed is None))
+                if played is not None:
+                    assert(played.color == replayed.color)
+                    assert(played.is_king == replayed.is_king)
+
+
+def test_replay_illegal_move():
+    start = square_to_index(2, 1)
+    record = GameRecord([(start, (square_to_index(4, 3),))])
+    try:
+        list(record.replay(validate=True))
+        assert(False)
+    except ValueError:
+        pass
+    state = GameState()
+    assert(len(list(GameRecord([]).replay(state))) == 0)
+
+
+def test_truncated_file(tmp_path):
+    path = tmp_path / "games.rec"
+    with GameRecordWriter(str(path)) as writer:
+        writer.write(GameRecord.from_game(play_random_game(1)))
+    path.write_bytes(path.read_bytes()[:-3])
+    try:
+        list(read_records(str(path)))
+        assert(False)
+    except ValueError:
+        pass
+
+
+def test_results(tmp_path):
+    path = str(tmp_path / "games.rec")
+    records = [GameRecord([], "BLACK"), GameRecord([], "RED"),
+               GameRecord([], None, finished=True), GameRecord([], None)]
+    assert([record.finished for record in records] ==
+           [True, True, True, False])
+    with GameRecordWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    read = list(read_records(path))
+    assert(read == records)
+    assert(read[2] != read[3])
+    # Version 1 files cannot tell draws from unfinished games.
+    data = open(path, "rb").read()
+    with open(path, "wb") as old:
+        old.write(FILE_HEADER.pack(MAGIC, 1) +
+                  data[FILE_HEADER.size:].replace(b"\x03", b"\x00", 1))
+    assert(list(read_records(path))[2] == records[3])
+    try:
+        GameRecordWriter(path, append=True)
+        assert(False)
+    except ValueError:
+        pass
@@ -1,4 +1,9 @@
-from gamestate import GameState
+import random
+from gamestate import GameState, unpack_position
+from bitboard import Bitboard
+from game import Game
+from zobrist import hash_squares
+from test_bitboard import random_squares
 from checkerpiece import CheckerPiece
 from boardsquare import BoardSquare
 
@@ -135,3 +140,237 @@ def test_update_squares():
     game.update_squares(3, 4, gamepiece)
     assert(game.piece_selected(3, 4) == gamepiece)
     assert(game.piece_selected(2, 3) is None)
+
+
+def test_positions():
+    game = GameState()
+    assert(len(game.positions) == 24)
+    gamepiece = game.piece_selected(2, 3)
+    assert(game.positions[gamepiece] == BoardSquare(2, 3))
+    game.update_squares(3, 4, gamepiece)
+    assert(game.positions[gamepiece] == BoardSquare(3, 4))
+    captured = game.piece_selected(5, 0)
+    game.end_capture_move(game.piece_selected(2, 1), BoardSquare(5, 0))
+    assert(captured not in game.positions)
+    assert(captured.location is None)
+    assert(len(game.positions) == 23)
+
+
+def test_load_squares():
+    game = GameState()
+    squares = [[None] * 8 for i in range(8)]
+    piece = CheckerPiece("RED")
+    squares[4][3] = piece
+    game.load_squares(squares)
+    assert(game.positions == {piece: BoardSquare(4, 3)})
+    assert(piece.get_location_in_squares(game.squares) == BoardSquare(4, 3))
+
+
+def get_snapshot(game):
+    return (game.zobrist_hash, [row[:] for row in game.squares],
+            dict(game.positions), game.red_count, game.black_count,
+            {piece: (piece.is_king, piece.can_move_forward,
+                     piece.can_move_back, piece.location)
+             for piece in game.positions})
+
+
+def test_get_legal_moves():
+    game = GameState()
+    moves = game.get_legal_moves()
+    assert(len(moves) == 7)
+    assert(all(not move.is_capture() for move in moves))
+    # The black piece on (0, 1) must take three pieces, turning left or
+    # right after the first jump.
+    game.load_squares([[None] * 8 for i in range(8)])
+    for row, column in [(0, 1), (0, 5), (1, 6)]:
+        game.squares[row][column] = CheckerPiece("BLACK")
+    for row, column in [(1, 2), (3, 2), (3, 4), (5, 4), (5, 2), (6, 7)]:
+        game.squares[row][column] = CheckerPiece("RED")
+    game.load_squares(game.squares)
+    before = get_snapshot(game)
+    moves = game.get_legal_moves()
+    assert(sorted(str(move) for move in moves) ==
+           ["(0, 1) x (2, 3) x (4, 1) x (6, 3)",
+            "(0, 1) x (2, 3) x (4, 5) x (6, 3)"])
+    assert(moves[0].captured[0] == BoardSquare(1, 2))
+    assert(get_snapshot(game) == before)
+
+
+def test_get_legal_moves_matches_bitboard():
+    rng = random.Random(11)
+    for trial in range(200):
+        game = GameState()
+        game.current_player = rng.choice(["BLACK", "RED"])
+        game.load_squares(random_squares(rng))
+        before = get_snapshot(game)
+        moves = sorted((str(move), move.captured, move.promotes)
+                       for move in game.get_legal_moves())
+        assert(get_snapshot(game) == before)
+        expected = sorted((str(move), move.captured, move.promotes)
+                          for move in Game(game).get_legal_moves())
+        assert(moves == expected)
+
+
+def test_make_hop():
+    game = GameState()
+    game.update_squares(3, 2, game.piece_selected(5, 0))
+    game.end_move()
+    before = get_snapshot(game)
+    piece = game.piece_selected(2, 1)
+    undo = game.make_hop(piece, BoardSquare(4, 3))
+    assert(game.piece_selected(3, 2) is None)
+    assert(game.positions[piece] == BoardSquare(4, 3))
+    assert(game.get_red_count() == 11)
+    game.unmake_hop(undo)
+    assert(get_snapshot(game) == before)
+
+
+def test_make_move_and_unmake_move():
+    rng = random.Random(5)
+    game = GameState()
+    snapshots = []
+    undos = []
+    promotions = 0
+    for turn in range(100):
+        moves = game.get_legal_moves()
+        if len(moves) == 0:
+            break
+        snapshots.append((get_snapshot(game), game.current_player))
+        player = game.current_player
+        move = moves[rng.randint(0, len(moves) - 1)]
+        promotions += move.promotes
+        undos.append(game.make_move(move))
+        assert(game.current_player != player)
+        assert(game.zobrist_hash == hash_squares(game.squares,
+                                                 game.current_player))
+    while undos:
+        game.unmake_move(undos.pop())
+        assert((get_snapshot(game), game.current_player) == snapshots.pop())
+    assert(game.get_black_count() == 12 and game.get_red_count() == 12)
+    # The game reached positions where pieces were crowned and uncrowned.
+    assert(promotions > 0)
+
+
+def test_make_move_continuing_jump():
+    game = GameState()
+    game.load_squares([[None] * 8 for i in range(8)])
+    game.squares[2][1] = CheckerPiece("BLACK")
+    game.squares[3][2] = CheckerPiece("RED")
+    game.squares[5][4] = CheckerPiece("RED")
+    game.squares[7][0] = CheckerPiece("RED")
+    game.load_squares(game.squares)
+    jumper = game.piece_selected(2, 1)
+    game.update_squares(4, 3, jumper)
+    game.end_capture_move(jumper, BoardSquare(3, 2))
+    before = get_snapshot(game)
+    moves = game.get_legal_moves()
+    assert(len(moves) == 1)
+    undo = game.make_move(moves[0])
+    assert(game.jumping_piece is None)
+    assert(game.current_player == "RED")
+    assert(game.get_red_count() == 1)
+    game.unmake_move(undo)
+    assert(game.jumping_piece is jumper)
+    assert(game.current_player == "BLACK")
+    assert(get_snapshot(game) == before)
+
+
+def scan_valid_pieces(game):
+    capturing = []
+    movable = []
+    for row in range(8):
+        for column in range(8):
+            piece = game.squares[row][column]
+            if piece is None or piece.color != game.current_player:
+                continue
+            if len(piece.get_capturing_moves(game.squares)) != 0:
+                capturing.append(piece)
+            elif len(piece.get_non_capturing_moves(game.squares)) != 0:
+                movable.append(piece)
+    return capturing if len(capturing) != 0 else movable
+
+
+def test_valid_pieces_cache():
+    rng = random.Random(9)
+    for trial in range(5):
+        play = Game()
+        game = play.state
+        undos = []
+        while not play.is_over() and len(play.history) < 80:
+            assert(game.get_valid_pieces() == scan_valid_pieces(game))
+            moves = game.get_legal_moves()
+            move = moves[rng.randint(0, len(moves) - 1)]
+            if rng.random() < 0.3:
+                undos.append(game.make_move(move))
+                assert(game.get_valid_pieces() == scan_valid_pieces(game))
+                game.unmake_move(undos.pop())
+            play.apply_move(move)
+    hits = game.cache_hits
+    game.get_valid_pieces()
+    game.get_valid_squares()
+    assert(game.cache_hits == hits + 2)
+    stats = game.get_cache_stats()
+    assert(stats["hits"] > 0 and stats["misses"] > 0)
+    assert(0 < stats["hit_rate"] < 1)
+    # Only pieces near the squares that changed are worked out again.
+    assert(stats["pieces_refreshed"] < 12 * stats["misses"])
+    misses = game.cache_misses
+    valid_pieces = game.get_valid_pieces()
+    game.clear_move_cache()
+    assert(game.piece_moves == {})
+    assert(game.get_valid_pieces() == valid_pieces)
+    assert(game.cache_misses == misses + 1)
+
+
+def test_to_bytes():
+    game = Game()
+    rng = random.Random(11)
+    positions = 0
+    while not game.is_over() and positions < 300:
+        move = rng.choice(game.get_legal_moves())
+        current = move.start
+        # Check every hop, so positions in the middle of a multiple jump
+        # are packed too.
+        for landing in move.landings:
+            game.apply_hop(current, landing)
+            current = landing
+            state = game.state
+            data = state.to_bytes()
+            assert(len(data) < 16)
+            copy = GameState.from_bytes(data)
+            assert(copy.to_bytes() == data)
+            assert(Bitboard.from_squares(copy.squares) ==
+                   Bitboard.from_squares(state.squares))
+            assert(copy.current_player == state.current_player)
+            assert(copy.zobrist_hash == state.zobrist_hash)
+            assert(copy.black_count == state.black_count)
+            assert(copy.red_count == state.red_count)
+            if state.jumping_piece is None:
+                assert(copy.jumping_piece is None)
+            else:
+                assert(copy.positions[copy.jumping_piece] ==
+                       state.positions[state.jumping_piece])
+            assert(copy.get_legal_moves() == state.get_legal_moves())
+            board, color, jumping = unpack_position(data)
+            assert(board == Bitboard.from_squares(state.squares))
+            assert(color == state.current_player)
+            assert((jumping >= 0) == (state.jumping_piece is not None))
+            positions += 1
+
+
+def test_from_bytes_rejects_corrupt_data():
+    data = GameState().to_bytes()
+    corrupt = [data[:-1], data + b"\0",
+               # a square that is both black and red
+               bytes([data[0] | 1, data[1], data[2], data[3],
+                      data[4] | 1]) + data[5:],
+               # the wrong piece count
+               data[:12] + bytes([11]) + data[13:],
+               # a jumping piece that is not there
+               data[:14] + bytes([20])]
+    for packed in corrupt:
+        try:
+            GameState.from_bytes(packed)
+            assert(False)
+        except ValueError:
+            pass
@@ -0,0 +1,38 @@
+from boardsquare import BoardSquare
+from move import Move
+
+
+def test_constructor():
+    move = Move(BoardSquare(2, 1), [BoardSquare(3, 2)])
+    assert(move.start == BoardSquare(2, 1))
+    assert(move.landings == [BoardSquare(3, 2)])
+    assert(move.captured == [])
+    assert(move.promotes is False)
+
+
+def test_is_capture():
+    assert(Move(BoardSquare(2, 1), [BoardSquare(3, 2)]).is_capture() is False)
+    assert(Move(BoardSquare(2, 1), [BoardSquare(4, 3)],
+                [BoardSquare(3, 2)]).is_capture())
+
+
+def test_get_end():
+    move = Move(BoardSquare(0, 1), [BoardSquare(2, 3), BoardSquare(4, 1)],
+                [BoardSquare(1, 2), BoardSquare(3, 2)])
+    assert(move.get_end() == BoardSquare(4, 1))
+
+
+def test_eq():
+    move1 = Move(BoardSquare(2, 1), [BoardSquare(3, 2)])
+    move2 = Move(BoardSquare(2, 1), [BoardSquare(3, 0)])
+    assert(move1 == Move(BoardSquare(2, 1), [BoardSquare(3, 2)]))
+    assert(move1 != move2)
+    assert(move1 != "to compare types")
+
+
+def test_str():
+    move = Move(BoardSquare(0, 1), [BoardSquare(2, 3), BoardSquare(4, 1)],
+                [BoardSquare(1, 2), BoardSquare(3, 2)])
+    assert(str(move) == "(0, 1) x (2, 3) x (4, 1)")
+    assert(repr(Move(BoardSquare(2, 1), [BoardSquare(3, 2)])) ==
+           "Move((2, 1) - (3, 2))")
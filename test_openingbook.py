@@ -0,0 +1,102 @@
+import pickle
+import random
+from gamestate import GameState
+from bitboard import Bitboard
+from computerplayer import ComputerPlayer
+from searchplayer import SearchPlayer
+from selfplay import build_book
+from zobrist import hash_bitboard
+from openingbook import OpeningBook, encode_move, decode_move, \
+    encode_game_move, write_book, merge_books
+
+
+def test_encode_move():
+    assert(decode_move(encode_move(9, (13,))) == (9, (13,)))
+    assert(decode_move(encode_move(31, (22, 15, 6, 0))) ==
+           (31, (22, 15, 6, 0)))
+    assert(encode_move(0, (9, 18, 27, 20, 13)) is None)
+    assert(encode_move(31, (22, 15, 6, 0)) < 1 << 32)
+    state = GameState()
+    for move in state.get_legal_moves():
+        start, landings = decode_move(encode_game_move(move))
+        assert(start == move.start.row * 4 + move.start.column // 2)
+
+
+def test_write_and_find(tmp_path):
+    path = str(tmp_path / "a.book")
+    weights = {(5, 1): 3, (5, 2): 1, (2, 7): 4, (9, 1): 0, (1 << 63, 3): 2}
+    assert(write_book(path, weights) == 4)
+    book = OpeningBook(path)
+    assert(len(book) == 4)
+    assert(list(book) == sorted((key, move, weight) for (key, move), weight
+                                in weights.items() if weight > 0))
+    assert(book.get_moves(5) == [(1, 3), (2, 1)])
+    assert(book.get_moves(1 << 63) == [(3, 2)])
+    assert(book.get_moves(9) == [] and book.get_moves(0) == [])
+    assert(book.lookups == 4 and book.hits == 2)
+    copy = pickle.loads(pickle.dumps(book))
+    assert(copy.get_moves(2) == [(7, 4)])
+    copy.close()
+    book.close()
+
+
+def test_merge_books(tmp_path):
+    first = str(tmp_path / "a.book")
+    second = str(tmp_path / "b.book")
+    merged = str(tmp_path / "c.book")
+    write_book(first, {(5, 1): 3, (2, 7): 4})
+    write_book(second, {(5, 1): 2, (5, 2): 1, (8, 8): 1})
+    assert(merge_books([first, second], merged) == 4)
+    book = OpeningBook(merged)
+    assert(list(book) == [(2, 7, 4), (5, 1, 5), (5, 2, 1), (8, 8, 1)])
+    book.close()
+    # The output can be one of the books being merged.
+    assert(merge_books([merged, second], merged) == 4)
+    book = OpeningBook(merged)
+    assert(list(book) == [(2, 7, 4), (5, 1, 7), (5, 2, 2), (8, 8, 2)])
+    book.close()
+    assert(sorted(path.name for path in tmp_path.iterdir()) ==
+           ["a.book", "b.book", "c.book"])
+
+
+def test_choose_move(tmp_path):
+    path = str(tmp_path / "a.book")
+    write_book(path, {(5, 1): 3, (5, 2): 1, (5, 3): 100})
+    book = OpeningBook(path)
+    legal = {1: "one", 2: "two"}
+    # Move 3 is not legal, so it is never chosen.
+    assert(book.choose_move(5, legal) == "one")
+    rng = random.Random(4)
+    picks = [book.choose_move(5, legal, rng) for i in range(400)]
+    assert(set(picks) == {"one", "two"})
+    assert(picks.count("one") > 2 * picks.count("two"))
+    assert(book.choose_move(6, legal, rng) is None)
+    book.close()
+
+
+def test_players_use_book(tmp_path):
+    path = str(tmp_path / "a.book")
+    state = GameState()
+    move = state.get_legal_moves()[3]
+    write_book(path, {(state.zobrist_hash, encode_game_move(move)): 1})
+    book = OpeningBook(path)
+    player = ComputerPlayer(seed=1, book=book)
+    for i in range(10):
+        assert(player.select_move(state) == move)
+    searcher = SearchPlayer(depth=4, book=book)
+    assert(searcher.select_move(state) == move)
+    assert(searcher.nodes == 0)
+    book.close()
+
+
+def test_build_book(tmp_path):
+    path = str(tmp_path / "a.book")
+    count = build_book(4, "random", path, plies=2, workers=1, seed=2,
+                       max_turns=30)
+    book = OpeningBook(path)
+    assert(len(book) == count)
+    board = Bitboard.from_squares(GameState().squares)
+    assert(GameState().zobrist_hash == hash_bitboard(board, "BLACK"))
+    for key, move, weight in book:
+        assert(weight > 0)
+    book.close()
@@ -0,0 +1,45 @@
+from gamestate import GameState
+from bitboard import Bitboard
+from searchplayer import SearchPlayer, WIN_SCORE
+from zobrist import hash_bitboard
+from parallelsearch import ParallelSearchPlayer, search_root_move
+
+
+def test_search_root_move():
+    board = Bitboard.from_squares(GameState().squares)
+    move = board.get_sequences("BLACK")[0]
+    score, nodes, stopped = search_root_move(
+        (board.black, board.red, board.kings), "BLACK", move, 3,
+        -WIN_SCORE - 1, None)
+    assert(nodes > 0)
+    assert(stopped is False)
+    player = SearchPlayer(3)
+    player.start_evaluation(board)
+    assert(score == player.search_move(
+        board, "BLACK", move, 3, -WIN_SCORE - 1, WIN_SCORE + 1, 0,
+        hash_bitboard(board, "BLACK")))
+
+
+def test_matches_serial_search():
+    board = Bitboard.from_squares(GameState().squares)
+    player = ParallelSearchPlayer(depth=4, workers=2)
+    try:
+        move = player.get_best_move(board, "BLACK")
+        assert(player.completed_depth == 4)
+        assert(player.nodes > 0)
+    finally:
+        player.close()
+    assert(player.pool is None)
+    assert(move == SearchPlayer(depth=4).get_best_move(board, "BLACK"))
+
+
+def test_select_piece():
+    game = GameState()
+    player = ParallelSearchPlayer(depth=2, workers=1)
+    try:
+        piece = player.select_piece(game)
+    finally:
+        player.close()
+    assert(piece in game.get_valid_pieces())
+    assert(player.make_move(piece, game.squares) in
+           piece.get_possible_moves(game.squares))
@@ -0,0 +1,117 @@
+from game import Game
+from gamestate import GameState
+from computerplayer import ComputerPlayer
+from bitboard import Bitboard
+from gamerecord import GameRecord, GameRecordWriter, read_records
+from pdn import square_to_number, number_to_square, to_fen, from_fen, \
+    format_move, parse_move, format_game, parse_game, iterate_games, \
+    convert_to_records, convert_to_pdn, START_FEN
+
+
+def play_random_game(seed, max_turns=150):
+    game = Game()
+    player = ComputerPlayer(seed)
+    while not game.is_over() and len(game.history) < max_turns:
+        game.apply_move(player.select_move(game.state))
+    return GameRecord.from_game(game, "random", "random", seed)
+
+
+def test_square_numbers():
+    assert(square_to_number(0, 1) == 1)
+    assert(square_to_number(1, 0) == 5)
+    assert(square_to_number(7, 6) == 32)
+    for number in range(1, 33):
+        assert(square_to_number(*number_to_square(number)) == number)
+    try:
+        number_to_square(33)
+        assert(False)
+    except ValueError:
+        pass
+
+
+def test_fen():
+    state = GameState()
+    assert(to_fen(state) == START_FEN)
+    assert(from_fen('"B:W21-32:B1-12."').zobrist_hash == state.zobrist_hash)
+    state = from_fen("W:WK3,30:B9,K28")
+    assert(state.current_player == "RED")
+    assert(state.black_count == 2 and state.red_count == 2)
+    board = Bitboard.from_squares(state.squares)
+    assert(board.kings == (1 << 2) | (1 << 27))
+    assert(to_fen(state) == "W:WK3,30:B9,K28")
+    for text in ("X:W1:B2", "B:W1:B1", "B:W33:B1", "B:Wa:B1"):
+        try:
+            from_fen(text)
+            assert(False)
+        except ValueError:
+            pass
+
+
+def test_moves():
+    assert(format_move(8, (12,)) == "9-13")
+    assert(format_move(8, (17, 26)) == "9x18x27")
+    state = from_fen("B:W14,23:B9")
+    moves = state.get_legal_moves()
+    move = parse_move("9x27", moves)
+    assert(parse_move("9x18x27", moves) == move)
+    for text in ("9-13", "9x18", "10-14"):
+        try:
+            parse_move(text, moves)
+            assert(False)
+        except ValueError:
+            pass
+
+
+def test_game_round_trip():
+    for seed in range(5):
+        record = play_random_game(seed)
+        text = format_game(record)
+        assert(all(len(line) <= 79 for line in text.splitlines()))
+        assert(parse_game(text) == record)
+
+
+def test_parse_game():
+    text = '''[Event "test"]
+[Black "Ann"]
+[White "Bob"]
+[Result "0-1"]
+1. 11-15 {a comment} 23-19 (1... 22-18) 2. 8-11! 22-17 0-1
+'''
+    record = parse_game(text)
+    assert(record.black == "Ann" and record.red == "Bob")
+    assert(record.winner == "RED")
+    assert(len(record.moves) == 4)
+    assert(record.moves[0] == (10, (14,)))
+    assert(parse_game('[Result "1/2-1/2"]\n').finished)
+    assert(not parse_game('[Result "*"]\n').finished)
+    assert(format_game(GameRecord([], None, finished=True)).count(
+        "1/2-1/2") == 2)
+    try:
+        parse_game('[Result "*"]\n1. 11-17 *\n')
+        assert(False)
+    except ValueError:
+        pass
+
+
+def test_iterate_games():
+    text = '[Result "1-0"]\n\n1. 11-15 1-0\n\n[Result "*"]\n1. 9-13\n*\n'
+    games = list(iterate_games(text.splitlines(True)))
+    assert(len(games) == 2)
+    assert(games[1].startswith('[Result "*"]'))
+
+
+def test_convert(tmp_path):
+    records = [play_random_game(seed) for seed in range(6)]
+    source = str(tmp_path / "games.rec")
+    with GameRecordWriter(source) as writer:
+        for record in records:
+            writer.write(record)
+    pdn_path = str(tmp_path / "games.pdn")
+    assert(convert_to_pdn(source, pdn_path, workers=2, batch_size=4) == 6)
+    with open(pdn_path, "a") as pdn_file:
+        pdn_file.write('[Result "*"]\n1. 11-17 *\n')
+    destination = str(tmp_path / "copy.rec")
+    count, errors = convert_to_records(pdn_path, destination, workers=1,
+                                       batch_size=4)
+    assert(count == 6 and len(errors) == 1)
+    assert(list(read_records(destination)) == records)
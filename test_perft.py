@@ -0,0 +1,33 @@
+from perft import POSITIONS, KNOWN_COUNTS, get_position, get_gamestate, \
+    perft, perft_gamestate, run_perft
+
+
+def test_get_position():
+    board, color = get_position("start")
+    assert(bin(board.black).count("1") == 12)
+    assert(color == "BLACK")
+    board, color = get_position("forced")
+    assert(bin(board.kings).count("1") == 2)
+    assert(color == "BLACK")
+
+
+def test_perft_bitboard():
+    for name in POSITIONS:
+        board, color = get_position(name)
+        for depth, count in enumerate(KNOWN_COUNTS[name][:6], 1):
+            assert(perft(board, color, depth) == count)
+        assert(board == get_position(name)[0])
+
+
+def test_perft_gamestate():
+    for name in POSITIONS:
+        board, color = get_position(name)
+        game = get_gamestate(board, color)
+        for depth, count in enumerate(KNOWN_COUNTS[name][:4], 1):
+            assert(perft_gamestate(game, depth) == count)
+
+
+def test_run_perft():
+    results = run_perft("multijump", 2)
+    assert([nodes for depth, nodes, seconds, rate in results] == [2, 10])
+    assert(results[-1][3] > 0)
@@ -0,0 +1,78 @@
+from gamestate import GameState
+from checkerpiece import CheckerPiece
+from profiler import Profiler
+
+
+class Counter:
+    def count_down(self, n):
+        if n == 0:
+            return 0
+        return self.count_down(n - 1)
+
+
+class SubCounter(Counter):
+    pass
+
+
+def test_install_and_uninstall():
+    original = GameState.__dict__["get_valid_pieces"]
+    profiler = Profiler()
+    profiler.install()
+    try:
+        state = GameState()
+        pieces = state.get_valid_pieces()
+        assert(GameState.__dict__["get_valid_pieces"] is not original)
+        for piece in pieces:
+            piece.can_capture(state.squares)
+    finally:
+        profiler.uninstall()
+    assert(GameState.__dict__["get_valid_pieces"] is original)
+    assert(profiler.installed == [])
+    stats = profiler.get_stats()
+    assert(stats["GameState.get_valid_pieces"]["calls"] == 1)
+    assert(stats["CheckerPiece.can_capture"]["calls"] == len(pieces))
+    # can_capture works out the piece's moves and location again.
+    assert(stats["CheckerPiece.get_location_in_squares"]["calls"] >=
+           len(pieces))
+    for label in stats:
+        assert(0 <= stats[label]["self_seconds"] <=
+               stats[label]["seconds"])
+    # Calls after uninstall are not counted.
+    GameState().get_valid_pieces()
+    assert(profiler.get_stats()["GameState.get_valid_pieces"]["calls"] == 1)
+    assert("CheckerPiece.can_capture" in profiler.get_report())
+
+
+def test_folded_stacks(tmp_path):
+    profiler = Profiler()
+    profiler.install([(CheckerPiece, ["can_capture", "get_possible_moves"])])
+    try:
+        state = GameState()
+        state.get_valid_pieces()[0].can_capture(state.squares)
+    finally:
+        profiler.uninstall()
+    stacks = [line.rsplit(" ", 1)[0] for line in profiler.get_folded()]
+    assert(stacks == ["CheckerPiece.can_capture",
+                      "CheckerPiece.can_capture;"
+                      "CheckerPiece.get_possible_moves"])
+    path = str(tmp_path / "game.folded")
+    profiler.write_folded(path)
+    with open(path) as folded:
+        assert(folded.read().splitlines() == profiler.get_folded())
+    profiler.reset()
+    assert(profiler.get_stats() == {} and profiler.get_folded() == [])
+
+
+def test_recursion_and_inherited_methods():
+    profiler = Profiler()
+    profiler.install([(SubCounter, ["count_down"])])
+    try:
+        assert(SubCounter().count_down(3) == 0)
+    finally:
+        profiler.uninstall()
+    assert("count_down" not in SubCounter.__dict__)
+    stats = profiler.get_stats()["SubCounter.count_down"]
+    assert(stats["calls"] == 4)
+    # The recursive calls are not counted twice in the total.
+    assert(stats["self_seconds"] <= stats["seconds"] * 1.0001)
+    assert(len(profiler.get_folded()) == 4)
@@ -0,0 +1,130 @@
+from gamestate import GameState
+from checkerpiece import CheckerPiece
+from boardsquare import BoardSquare
+from bitboard import Bitboard
+from searchplayer import SearchPlayer, evaluate
+
+
+def empty_game():
+    game = GameState()
+    game.load_squares([[None] * 8 for i in range(8)])
+    return game
+
+
+def test_evaluate():
+    board = Bitboard.from_squares(GameState().squares)
+    assert(evaluate(board, "BLACK") == 0)
+    board.red &= ~(1 << 31)
+    assert(evaluate(board, "BLACK") > 0)
+    assert(evaluate(board, "RED") < 0)
+
+
+def test_select_piece_and_make_move():
+    game = GameState()
+    game.update_squares(4, 1, game.piece_selected(2, 3))
+    game.end_move()
+    player = SearchPlayer(depth=4)
+    piece = player.select_piece(game)
+    # The capture is forced for red.
+    assert(piece is game.piece_selected(5, 0))
+    assert(player.make_move(piece, game.squares) == BoardSquare(3, 2))
+
+
+def test_select_piece_no_moves():
+    game = empty_game()
+    game.squares[2][1] = CheckerPiece("BLACK")
+    game.load_squares(game.squares)
+    game.current_player = "RED"
+    assert(SearchPlayer(depth=2).select_piece(game) is None)
+
+
+def test_prefers_multiple_jump():
+    game = empty_game()
+    game.squares[5][0] = CheckerPiece("RED")
+    game.squares[6][7] = CheckerPiece("RED")
+    game.squares[4][1] = CheckerPiece("BLACK")
+    game.squares[2][3] = CheckerPiece("BLACK")
+    game.squares[5][6] = CheckerPiece("BLACK")
+    game.load_squares(game.squares)
+    game.current_player = "RED"
+    player = SearchPlayer(depth=3)
+    piece = player.select_piece(game)
+    assert(piece is game.piece_selected(5, 0))
+    assert(player.make_move(piece, game.squares) == BoardSquare(3, 2))
+
+
+def test_continues_multiple_jump():
+    game = empty_game()
+    game.squares[2][1] = CheckerPiece("BLACK")
+    game.squares[3][2] = CheckerPiece("RED")
+    game.squares[5][4] = CheckerPiece("RED")
+    game.squares[7][0] = CheckerPiece("RED")
+    game.load_squares(game.squares)
+    jumper = game.piece_selected(2, 1)
+    game.update_squares(4, 3, jumper)
+    assert(game.end_capture_move(jumper, BoardSquare(3, 2)) is False)
+    assert(game.jumping_piece is jumper)
+    assert(game.get_valid_pieces() == [jumper])
+    player = SearchPlayer(depth=2)
+    assert(player.select_piece(game) is jumper)
+    assert(player.make_move(jumper, game.squares) == BoardSquare(6, 5))
+
+
+def test_search_depth_eight_from_start():
+    board = Bitboard.from_squares(GameState().squares)
+    player = SearchPlayer(depth=8)
+    move = player.get_best_move(board, "BLACK")
+    assert(move in board.get_sequences("BLACK"))
+    assert(board == Bitboard.from_squares(GameState().squares))
+    assert(0 < player.nodes < 100000)
+
+
+def test_repeated_search_uses_table():
+    board = Bitboard.from_squares(GameState().squares)
+    player = SearchPlayer(depth=6)
+    first = player.get_best_move(board, "BLACK")
+    first_nodes = player.nodes
+    assert(player.get_best_move(board, "BLACK") == first)
+    assert(player.nodes < first_nodes)
+    assert(player.table.get_stats()["hits"] > 0)
+    no_table = SearchPlayer(depth=6, table_size=0)
+    assert(no_table.get_best_move(board, "BLACK") == first)
+
+
+def test_time_budget():
+    board = Bitboard.from_squares(GameState().squares)
+    player = SearchPlayer(depth=64, time_budget_ms=100)
+    move = player.get_best_move(board, "BLACK")
+    assert(move in board.get_sequences("BLACK"))
+    stats = player.get_search_stats()
+    assert(player.stopped)
+    assert(1 <= stats["depth"] < 64)
+    assert(stats["seconds"] < 0.5)
+    assert(stats["nodes"] > 0 and stats["nodes_per_second"] > 0)
+    assert(board == Bitboard.from_squares(GameState().squares))
+
+
+def test_iterative_deepening_matches_fixed_depth():
+    board = Bitboard.from_squares(GameState().squares)
+    player = SearchPlayer(depth=5, time_budget_ms=60000)
+    move = player.get_best_move(board, "BLACK")
+    assert(player.completed_depth == 5)
+    assert(player.stopped is False)
+    assert(move == SearchPlayer(depth=5).get_best_move(board, "BLACK"))
+
+
+def test_select_move():
+    game = empty_game()
+    game.squares[2][1] = CheckerPiece("BLACK")
+    game.squares[3][2] = CheckerPiece("RED")
+    game.squares[5][4] = CheckerPiece("RED")
+    game.squares[7][0] = CheckerPiece("RED")
+    game.load_squares(game.squares)
+    move = SearchPlayer(depth=2).select_move(game)
+    assert(str(move) == "(2, 1) x (4, 3) x (6, 5)")
+    assert(move.captured == [BoardSquare(3, 2), BoardSquare(5, 4)])
+    assert(move.promotes is False)
+    game.current_player = "RED"
+    game.squares[2][1] = None
+    game.load_squares(game.squares)
+    assert(SearchPlayer(depth=2).select_move(game) is not None)
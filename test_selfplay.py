@@ -0,0 +1,81 @@
+import json
+import math
+from gamestate import GameState
+from computerplayer import ComputerPlayer
+from searchplayer import SearchPlayer
+from selfplay import make_player, play_game, elo_difference, \
+    score_to_elo, run_match
+from gamerecord import read_records
+
+
+CONFIG = {"player_a": "search:2", "player_b": "random", "seed": 7,
+          "max_turns": 150, "opening_turns": 2}
+
+
+def test_make_player():
+    assert(isinstance(make_player("random", 1), ComputerPlayer))
+    player = make_player("search:3")
+    assert(isinstance(player, SearchPlayer))
+    assert(player.depth == 3)
+    assert(make_player("timed:50").time_budget_ms == 50)
+    try:
+        make_player("human")
+        assert(False)
+    except ValueError:
+        pass
+
+
+def test_random_player_select_move():
+    game = GameState()
+    move = ComputerPlayer(5).select_move(game)
+    assert(move in game.get_legal_moves())
+    assert(ComputerPlayer(5).select_move(game) == move)
+
+
+def test_play_game():
+    first = play_game(0, CONFIG)
+    assert(first["black"] == "search:2")
+    assert(first["red"] == "random")
+    assert(first["winner"] in ("BLACK", "RED", None))
+    # Colors alternate and each pair of games shares a seed.
+    second = play_game(1, CONFIG)
+    assert(second["black"] == "random")
+    assert(second["seed"] == first["seed"])
+    # The same seed plays the same game.
+    assert(play_game(0, CONFIG) == first)
+
+
+def test_draw_by_move_limit():
+    config = dict(CONFIG, max_turns=6)
+    result = play_game(0, config)
+    assert(result["winner"] is None)
+    assert(result["score_a"] == 0.5)
+    assert(result["turns"] == 6)
+
+
+def test_elo_difference():
+    elo, low, high = elo_difference(10, 10, 0)
+    assert(elo == 0)
+    assert(low < 0 < high)
+    elo, low, high = elo_difference(30, 10, 10)
+    assert(low < elo < high)
+    assert(elo > 0)
+    assert(elo_difference(5, 0, 0)[0] == math.inf)
+    assert(round(score_to_elo(0.75)) == 191)
+
+
+def test_run_match(tmp_path):
+    output = tmp_path / "results.jsonl"
+    records = tmp_path / "games.rec"
+    summary = run_match(4, "search:1", "random", str(output), workers=1,
+                        seed=3, max_turns=40, records=str(records))
+    assert(summary["games"] == 4)
+    assert(summary["wins"] + summary["losses"] + summary["draws"] == 4)
+    lines = output.read_text().splitlines()
+    assert(sorted(json.loads(line)["game"] for line in lines) ==
+           [0, 1, 2, 3])
+    games = list(read_records(str(records)))
+    assert(sorted(record.seed for record in games) ==
+           sorted(json.loads(line)["seed"] for line in lines))
+    for record in games:
+        assert(0 < len(record.moves) <= 40)
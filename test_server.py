@@ -0,0 +1,147 @@
+import asyncio
+import json
+from server import GameServer, Session, select_reply, percentile, \
+    run_load_test
+from snapshotstore import read_snapshots
+
+
+def test_percentile():
+    values = list(range(100, 0, -1))
+    assert(percentile(values, 0.5) == 50)
+    assert(percentile(values, 0.99) == 99)
+    assert(percentile([7], 0.99) == 7)
+
+
+def test_session():
+    session = Session(1)
+    message = session.get_message()
+    assert(message["moves"] == ["9-13", "9-14", "10-14", "10-15", "11-15",
+                                "11-16", "12-16"])
+    assert(not message["over"] and message["reply"] is None)
+    for text in ("9-18", "22-18", 9):
+        try:
+            session.play(text)
+            assert(False)
+        except ValueError:
+            pass
+    session.play("11-15")
+    try:
+        session.play("22-18")
+        assert(False)
+    except ValueError:
+        pass
+    start, landings = select_reply(session.game.state.to_bytes(),
+                                   "search:2")
+    assert(select_reply(session.game.state.to_bytes(), "random") in
+           [(move.start.key >> 1,
+             tuple(square.key >> 1 for square in move.landings))
+            for move in session.game.get_legal_moves()])
+    session.play_reply(start, landings)
+    assert(session.game.state.current_player == "BLACK")
+    assert(session.get_message()["reply"] == session.reply)
+    assert(len(session.game.history) == 2)
+
+
+def test_server():
+    async def play():
+        server = GameServer("random", workers=1)
+        port = await server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        first = json.loads(await reader.readline())
+        assert(first["session"] == 1 and server.sessions.keys() == {1})
+        for line in (b"not json\n", b'{"move": "9-18"}\n', b"[]\n"):
+            writer.write(line)
+            assert(json.loads(await reader.readline())["type"] == "error")
+        writer.write(json.dumps({"type": "move", "move": first["moves"][0]})
+                     .encode("utf-8") + b"\n")
+        second = json.loads(await reader.readline())
+        assert(second["reply"] is not None)
+        assert(second["position"] != first["position"])
+        assert(server.replies == 1)
+        results = await run_load_test(5, "127.0.0.1", port, moves=3)
+        assert(results["errors"] == 0 and results["moves"] > 0)
+        assert(results["p99_ms"] >= results["p50_ms"])
+        await server.close()
+        assert(server.sessions == {})
+        writer.close()
+
+    asyncio.run(play())
+
+
+def test_resume(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+
+    async def connect(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        return reader, writer, json.loads(await reader.readline())
+
+    async def send(reader, writer, message):
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        return json.loads(await reader.readline())
+
+    async def play():
+        server = GameServer("random", workers=1, snapshots=path)
+        port = await server.start("127.0.0.1", 0)
+        reader, writer, first = await connect(port)
+        second = await send(reader, writer,
+                            {"type": "move", "move": first["moves"][0]})
+        writer.close()
+        await server.close()
+        # The server restarts and the client gets its game back.
+        server = GameServer("random", workers=1, snapshots=path)
+        assert(list(server.saved) == [1])
+        port = await server.start("127.0.0.1", 0)
+        reader, writer, fresh = await connect(port)
+        assert(fresh["session"] == 2)
+        assert(len(bytes.fromhex(first["token"])) == 16)
+        assert(fresh["token"] != first["token"])
+        assert((await send(reader, writer, {"type": "resume", "session": 5,
+                                            "token": first["token"]}))
+               ["type"] == "error")
+        for number, token in [([1], first["token"]), (True, first["token"]),
+                              (1, None), (1, ["x"])]:
+            assert((await send(reader, writer, {"type": "resume",
+                                                "session": number,
+                                                "token": token}))
+                   ["type"] == "error")
+        # Without the token of the saved game there is nothing to resume.
+        for token in [fresh["token"], "00" * 16, "\u00e9" * 32]:
+            assert((await send(reader, writer, {"type": "resume",
+                                                "session": 1,
+                                                "token": token}))
+                   == {"type": "error",
+                       "message": "no saved session: 1"})
+        resumed = await send(reader, writer, {"type": "resume",
+                                              "session": 1,
+                                              "token": first["token"]})
+        assert(resumed["token"] == first["token"])
+        assert(resumed["session"] == 1)
+        assert(resumed["position"] == second["position"])
+        assert(resumed["moves"] == second["moves"])
+        assert(server.saved == {} and list(server.sessions) == [1])
+        writer.close()
+        await server.close()
+
+    asyncio.run(play())
+
+
+def test_snapshots_are_flushed(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+
+    async def play():
+        server = GameServer("random", workers=1, snapshots=path,
+                            snapshot_delay=0.05)
+        port = await server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        first = json.loads(await reader.readline())
+        writer.write(json.dumps({"type": "move", "move": first["moves"][0]})
+                     .encode("utf-8") + b"\n")
+        await reader.readline()
+        # No more snapshots arrive, but the batch is written anyway.
+        await asyncio.sleep(0.2)
+        assert(list(read_snapshots(path)) == [1])
+        writer.close()
+        await server.close()
+        assert(server.flusher.done())
+
+    asyncio.run(play())
@@ -7,3 +7,14 @@ def test_get_coordinate():
     assert(sketch.get_coordinate(1) == -150)
     assert(sketch.get_coordinate(4) == 0)
     assert(sketch.get_coordinate(7) == 150)
+
+
+def test_redraw_board():
+    sketch = Sketch()
+    sketch.draw_checkerboard()
+    sketch.draw_checkerpieces()
+    sketch.render()
+    assert(sketch.redraw_board()["draw_calls"] == 32)
+    assert(len(sketch.stamps) == 32)
+    assert(sketch.get_shape_name(sketch.pieces[0, 1]) ==
+           "checkers black man")
@@ -0,0 +1,75 @@
+import os
+from gamestate import GameState, unpack_position
+from game import Game
+from snapshotstore import SnapshotStore, read_snapshots, restore_sessions, \
+    compact_snapshots, RECORD, FILE_HEADER, NO_TOKEN
+
+
+def play(turns):
+    game = Game()
+    for turn in range(turns):
+        game.apply_move(game.get_legal_moves()[0])
+    return game.state
+
+
+def test_save_and_restore(tmp_path):
+    path = str(tmp_path / "a.snap")
+    assert(read_snapshots(path) == {})
+    with SnapshotStore(path, batch_size=3) as store:
+        store.save(1, play(1))
+        store.save(2, play(2))
+        assert(os.path.getsize(path) == FILE_HEADER.size)
+        store.save(1, play(3))
+        # The third record fills the batch, which is written at once.
+        assert(os.path.getsize(path) == FILE_HEADER.size + 3 * RECORD.size)
+        store.save(3, play(4), b"0123456789abcdef")
+        store.remove(2)
+    assert(store.count == 5)
+    snapshots = read_snapshots(path)
+    assert(list(snapshots) == [1, 3])
+    assert(snapshots[1] == (NO_TOKEN, play(3).to_bytes()))
+    sessions = restore_sessions(path)
+    token, position = sessions[3]
+    assert(token == b"0123456789abcdef")
+    assert(position == unpack_position(play(4).to_bytes()))
+    state = GameState.from_position(*position)
+    assert(state.to_bytes() == play(4).to_bytes())
+    assert(state.get_legal_moves() == play(4).get_legal_moves())
+
+
+def test_truncated_record(tmp_path):
+    path = str(tmp_path / "a.snap")
+    with SnapshotStore(path) as store:
+        store.save(1, GameState())
+        store.save(2, play(1))
+    with open(path, "r+b") as snapshots:
+        snapshots.truncate(os.path.getsize(path) - 3)
+    assert(list(read_snapshots(path)) == [1])
+    # Reopening drops the partial record, so new records line up.
+    with SnapshotStore(path) as store:
+        store.save(3, play(2))
+    assert(list(read_snapshots(path)) == [1, 3])
+
+
+def test_compact(tmp_path):
+    path = str(tmp_path / "a.snap")
+    with SnapshotStore(path) as store:
+        for turn in range(10):
+            store.save(7, play(turn))
+        store.save(8, GameState())
+        store.remove(8)
+    assert(compact_snapshots(path) == 1)
+    assert(os.path.getsize(path) == FILE_HEADER.size + RECORD.size)
+    assert(read_snapshots(path) == {7: (NO_TOKEN, play(9).to_bytes())})
+
+
+def test_not_a_snapshot_file(tmp_path):
+    path = str(tmp_path / "a.snap")
+    with open(path, "wb") as output:
+        output.write(b"something else")
+    for function in (read_snapshots, SnapshotStore):
+        try:
+            function(path)
+            assert(False)
+        except ValueError:
+            pass
@@ -0,0 +1,122 @@
+import pickle
+from itertools import combinations
+from bitboard import Bitboard, square_to_index
+from searchplayer import SearchPlayer
+from tablebase import Tablebase, generate, write_tablebase, get_slices, \
+    get_signature, get_index, get_slice_size, rank_squares, \
+    unrank_squares, get_board, enumerate_slice, play_sequence, BINOMIALS, \
+    WIN, LOSS, DRAW
+
+
+def open_tablebase(tmp_path, max_pieces=2):
+    path = str(tmp_path / "endgame.tb")
+    write_tablebase(path, generate(max_pieces), max_pieces)
+    return Tablebase(path)
+
+
+def test_rank_squares():
+    for count in range(4):
+        ranks = set()
+        for squares in combinations(range(32), count):
+            ranks.add(rank_squares(sum(1 << index for index in squares)))
+        assert(ranks == set(range(BINOMIALS[32][count])))
+        for rank in range(0, BINOMIALS[32][count], 97):
+            mask = unrank_squares(rank, count)
+            assert(bin(mask).count("1") == count)
+            assert(rank_squares(mask) == rank)
+
+
+def test_slice_order():
+    slices = get_slices(4)
+    assert(len(slices) == len(set(slices)))
+    for number, signature in enumerate(slices):
+        black_men, black_kings, red_men, red_kings = signature
+        assert(black_men + black_kings > 0 and red_men + red_kings > 0)
+        # Crowning a man leads to a slice solved earlier.
+        if black_men > 0:
+            crowned = (black_men - 1, black_kings + 1, red_men, red_kings)
+            assert(slices.index(crowned) < number)
+
+
+def test_enumerate_slice():
+    signature = (1, 0, 0, 1)
+    positions = list(enumerate_slice(signature))
+    # A black man cannot stand on row 7 or share the red king's square.
+    assert(len(positions) == 28 * 31)
+    for index, board in positions:
+        assert(get_signature(board) == signature)
+        assert(get_index(board, "BLACK", signature) == index)
+        assert(get_index(board, "RED", signature) == index + 1)
+        assert(index + 1 < get_slice_size(signature))
+        assert(get_board(index, signature) == (board, "BLACK"))
+        assert(get_board(index + 1, signature) == (board, "RED"))
+
+
+def test_probe_is_consistent(tmp_path):
+    tablebase = open_tablebase(tmp_path)
+    for signature in get_slices(2):
+        for index, board in enumerate_slice(signature):
+            for color in ("BLACK", "RED"):
+                result, distance = tablebase.probe(board, color)
+                other = "RED" if color == "BLACK" else "BLACK"
+                children = []
+                for sequence in board.get_sequences(color):
+                    child = Bitboard(board.black, board.red, board.kings)
+                    play_sequence(child, sequence)
+                    if child.get_pieces(other) == 0:
+                        children.append((LOSS, 0))
+                    else:
+                        children.append(tablebase.probe(child, other))
+                if result == WIN:
+                    assert(min(child_distance for child_result, child_distance
+                               in children if child_result == LOSS) ==
+                           distance - 1)
+                elif result == LOSS:
+                    assert(all(child_result == WIN
+                               for child_result, child_distance in children))
+                    assert(max([-1] + [child_distance for child_result,
+                                       child_distance in children]) ==
+                           distance - 1)
+                else:
+                    assert(result == DRAW)
+                    assert(all(child_result != LOSS
+                               for child_result, child_distance in children))
+                    assert(not all(child_result == WIN
+                                   for child_result, child_distance
+                                   in children))
+    tablebase.close()
+
+
+def test_probe(tmp_path):
+    tablebase = open_tablebase(tmp_path)
+    assert(tablebase.max_pieces == 2)
+    # Black captures the last red piece at once.
+    board = Bitboard(1 << square_to_index(2, 1), 1 << square_to_index(3, 2))
+    assert(tablebase.probe(board, "BLACK") == (WIN, 1))
+    # A red man on row 0 would have been crowned.
+    board = Bitboard(1 << square_to_index(4, 1), 1 << square_to_index(0, 1))
+    assert(tablebase.probe(board, "RED") is None)
+    # Positions with more pieces are not in the file.
+    board = Bitboard(0b11, 1 << 31)
+    assert(tablebase.probe(board, "BLACK") is None)
+    assert(tablebase.hits == 1 and tablebase.probes == 3)
+    copy = pickle.loads(pickle.dumps(tablebase))
+    assert(copy.path == tablebase.path and copy.slices == tablebase.slices)
+    copy.close()
+    tablebase.close()
+
+
+def test_search_player_uses_tablebase(tmp_path):
+    tablebase = open_tablebase(tmp_path)
+    player = SearchPlayer(depth=1, tablebase=tablebase)
+    for signature in get_slices(2):
+        for index, board in enumerate_slice(signature):
+            result, distance = tablebase.probe(board, "BLACK")
+            if result != WIN or len(board.get_sequences("BLACK")) < 2:
+                continue
+            # One turn of search is enough to follow the fastest win.
+            move = player.get_best_move(board, "BLACK")
+            play_sequence(board, move)
+            if board.red:
+                assert(tablebase.probe(board, "RED") == (LOSS, distance - 1))
+    tablebase.close()
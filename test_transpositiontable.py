@@ -0,0 +1,46 @@
+from transpositiontable import TranspositionTable, EXACT, LOWER_BOUND, \
+    UPPER_BOUND
+
+
+def test_constructor():
+    table = TranspositionTable(1000)
+    assert(table.size == 1024)
+    assert(table.get_stats()["fill"] == 0)
+
+
+def test_store_and_probe():
+    table = TranspositionTable(16)
+    assert(table.probe(5) is None)
+    table.store(5, 3, 42, EXACT, (1, -1, 5))
+    assert(table.probe(5) == (3, 42, EXACT, (1, -1, 5)))
+    # 21 shares a bucket with 5 but is a different position.
+    assert(table.probe(21) is None)
+    stats = table.get_stats()
+    assert(stats["probes"] == 3)
+    assert(stats["hits"] == 1)
+    assert(stats["collisions"] == 1)
+    assert(stats["fill"] == 1 / 32)
+
+
+def test_replacement():
+    table = TranspositionTable(16)
+    table.store(5, 6, 1, EXACT, None)
+    # A shallower result for another position goes in the always-replace
+    # slot and keeps the deeper one.
+    table.store(21, 2, 2, LOWER_BOUND, None)
+    table.store(37, 1, 3, UPPER_BOUND, None)
+    assert(table.probe(5) == (6, 1, EXACT, None))
+    assert(table.probe(21) is None)
+    assert(table.probe(37) == (1, 3, UPPER_BOUND, None))
+    # A deeper result takes the depth-preferred slot.
+    table.store(53, 7, 4, EXACT, None)
+    assert(table.probe(53) == (7, 4, EXACT, None))
+    assert(table.probe(5) == (6, 1, EXACT, None))
+
+
+def test_clear():
+    table = TranspositionTable(16)
+    table.store(5, 6, 1, EXACT, None)
+    table.clear()
+    assert(table.probe(5) is None)
+    assert(table.get_stats()["stores"] == 0)
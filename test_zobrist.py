@@ -0,0 +1,48 @@
+from gamestate import GameState
+from boardsquare import BoardSquare
+from bitboard import Bitboard
+from zobrist import hash_squares, hash_bitboard, get_piece_key, \
+    get_side_key, SIDE_KEY
+
+
+def test_get_piece_key():
+    assert(get_piece_key("BLACK", False, 0) != get_piece_key("RED", False, 0))
+    assert(get_piece_key("BLACK", False, 0) != get_piece_key("BLACK", True, 0))
+    assert(get_piece_key("BLACK", False, 0) != get_piece_key("BLACK", False, 1))
+
+
+def test_get_side_key():
+    assert(get_side_key("BLACK") == 0)
+    assert(get_side_key("RED") == SIDE_KEY)
+
+
+def test_hash_bitboard_matches_hash_squares():
+    game = GameState()
+    game.piece_selected(2, 1).is_king = True
+    board = Bitboard.from_squares(game.squares)
+    for color in ("BLACK", "RED"):
+        assert(hash_bitboard(board, color) ==
+               hash_squares(game.squares, color))
+
+
+def test_gamestate_hash_is_incremental():
+    game = GameState()
+    assert(game.zobrist_hash == hash_squares(game.squares, "BLACK"))
+    start = game.zobrist_hash
+    game.update_squares(3, 2, game.piece_selected(2, 1))
+    game.end_move()
+    assert(game.zobrist_hash == hash_squares(game.squares, "RED"))
+    assert(game.zobrist_hash != start)
+    game.update_squares(4, 1, game.piece_selected(5, 0))
+    game.end_capture_move(game.piece_selected(2, 3), BoardSquare(3, 2))
+    assert(game.zobrist_hash ==
+           hash_squares(game.squares, game.current_player))
+
+
+def test_gamestate_hash_tracks_promotion():
+    game = GameState()
+    game.remove_piece(7, 2)
+    piece = game.piece_selected(2, 1)
+    game.update_squares(7, 2, piece)
+    assert(piece.is_king)
+    assert(game.zobrist_hash == hash_squares(game.squares, "BLACK"))
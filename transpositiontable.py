@@ -0,0 +1,130 @@
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    '''
+    Class -- TranspositionTable
+        Represents a fixed-size table of search results indexed by
+            Zobrist hash. Every bucket has a depth-preferred slot, which
+            keeps the most expensive result, and an always-replace slot,
+            which keeps the most recent one.
+    Attributes:
+        size -- int, the number of buckets (a power of two)
+        mask -- int, size - 1, used to find a key's bucket
+        deep -- list, the depth-preferred slot of every bucket
+        recent -- list, the always-replace slot of every bucket
+        probes -- int, the number of lookups
+        hits -- int, the number of lookups that found their position
+        collisions -- int, the number of lookups that found only other
+            positions in their bucket
+        stores -- int, the number of results stored
+    Methods:
+        probe -- looks up a position
+        store -- stores a search result
+        clear -- empties the table and resets the statistics
+        get_stats -- reports the hit rate, collisions and fill
+    '''
+
+    def __init__(self, size=1 << 16):
+        '''
+        Constructor -- creates a new instance of TranspositionTable
+        Parameters:
+            self -- the current TranspositionTable object
+            size -- the number of buckets, rounded up to a power of two
+        '''
+        self.size = 1
+        while self.size < size:
+            self.size <<= 1
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        '''
+        Method -- clear
+            Empties every slot and resets the statistics.
+        Parameters:
+            self -- the current TranspositionTable object
+        Returns:
+            Nothing.
+        '''
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        '''
+        Method -- probe
+            Looks up the stored result for a position.
+        Parameters:
+            self -- the current TranspositionTable object
+            key -- the Zobrist hash of the position
+        Returns:
+            A tuple (depth, score, flag, move), or None if the position is
+                not in the table.
+        '''
+        self.probes += 1
+        index = key & self.mask
+        entry = self.deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:]
+        other = self.recent[index]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other[1:]
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        '''
+        Method -- store
+            Stores a search result. It replaces the depth-preferred slot if
+                it is empty, holds the same position or holds a shallower
+                result; otherwise it goes in the always-replace slot.
+        Parameters:
+            self -- the current TranspositionTable object
+            key -- the Zobrist hash of the position
+            depth -- the depth the position was searched to
+            score -- the score found by the search
+            flag -- EXACT, LOWER_BOUND or UPPER_BOUND
+            move -- the best move found, or None
+        Returns:
+            Nothing.
+        '''
+        self.stores += 1
+        index = key & self.mask
+        entry = (key, depth, score, flag, move)
+        deep = self.deep[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            # A different position pushed out of the depth-preferred slot
+            # still gets a chance in the always-replace slot.
+            if deep is not None and deep[0] != key:
+                self.recent[index] = deep
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
+
+    def get_stats(self):
+        '''
+        Method -- get_stats
+            Reports how well the table is working.
+        Parameters:
+            self -- the current TranspositionTable object
+        Returns:
+            A dict with the number of probes, hits and collisions, the hit
+                rate, the number of stores and the fraction of slots used.
+        '''
+        used = (self.size - self.deep.count(None) +
+                self.size - self.recent.count(None))
+        return {"probes": self.probes,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.probes if self.probes else 0.0,
+                "collisions": self.collisions,
+                "stores": self.stores,
+                "fill": used / (2 * self.size)}
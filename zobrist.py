@@ -0,0 +1,98 @@
+import random
+from bitboard import NUM_PLAYABLE, square_to_index, iterate_bits
+
+ZOBRIST_SEED = 20201
+COLORS = ("BLACK", "RED")
+
+
+def make_keys(seed=ZOBRIST_SEED):
+    '''
+    Function -- make_keys
+        Generates the random 64-bit keys used for Zobrist hashing.
+    Parameters:
+        seed -- the seed for the random number generator, fixed so that
+            hashes are the same in every process
+    Returns:
+        A tuple (piece_keys, side_key) where piece_keys[color][king][index]
+            is the key of a piece of that color and king status on a
+            playable square and side_key is mixed in when red is to move.
+    '''
+    rng = random.Random(seed)
+    piece_keys = {}
+    for color in COLORS:
+        piece_keys[color] = (
+            [rng.getrandbits(64) for i in range(NUM_PLAYABLE)],
+            [rng.getrandbits(64) for i in range(NUM_PLAYABLE)])
+    side_key = rng.getrandbits(64)
+    return piece_keys, side_key
+
+
+PIECE_KEYS, SIDE_KEY = make_keys()
+
+
+def get_piece_key(color, is_king, index):
+    '''
+    Function -- get_piece_key
+        Gets the key of one piece on one square.
+    Parameters:
+        color -- "BLACK" or "RED"
+        is_king -- boolean, whether the piece is a king
+        index -- the index of the playable square, from 0 to 31
+    Returns:
+        A 64-bit int.
+    '''
+    return PIECE_KEYS[color][1 if is_king else 0][index]
+
+
+def get_side_key(color):
+    '''
+    Function -- get_side_key
+        Gets the key for the player to move.
+    Parameters:
+        color -- "BLACK" or "RED"
+    Returns:
+        SIDE_KEY when red is to move, 0 otherwise.
+    '''
+    return SIDE_KEY if color == "RED" else 0
+
+
+def hash_squares(squares, color):
+    '''
+    Function -- hash_squares
+        Computes the Zobrist hash of a GameState board from scratch.
+    Parameters:
+        squares -- list of lists representing the state of the game board
+        color -- the player to move
+    Returns:
+        A 64-bit int.
+    '''
+    NUM_ROW_COL = 8
+    key = get_side_key(color)
+    for row in range(NUM_ROW_COL):
+        for column in range(NUM_ROW_COL):
+            piece = squares[row][column]
+            if piece is not None:
+                key ^= get_piece_key(
+                    piece.color, piece.is_king, square_to_index(row, column))
+    return key
+
+
+def hash_bitboard(board, color):
+    '''
+    Function -- hash_bitboard
+        Computes the Zobrist hash of a Bitboard from scratch. The result
+            matches hash_squares for the same position.
+    Parameters:
+        board -- a Bitboard object
+        color -- the player to move
+    Returns:
+        A 64-bit int.
+    '''
+    key = get_side_key(color)
+    for piece_color, pieces in (("BLACK", board.black), ("RED", board.red)):
+        men, kings = PIECE_KEYS[piece_color]
+        for index in iterate_bits(pieces & ~board.kings):
+            key ^= men[index]
+        for index in iterate_bits(pieces & board.kings):
+            key ^= kings[index]
+    return key